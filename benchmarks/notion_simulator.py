@@ -0,0 +1,382 @@
+"""
+CRC Card:
+    Class: NotionSimulator
+    Responsibilities:
+        - Stands in for the Notion endpoints the project uses, in process,
+          through an httpx transport: databases retrieve/update/query
+          (pagination, RelativeID and last_edited_time filters,
+          filter_properties) and pages create/update (archive included).
+        - Behaves like the real API where the sync depends on it: property
+          IDs come back URL-encoded, last_edited_time has minute precision,
+          archived pages leave query results and cannot be edited.
+        - Injects latency, 429 responses (with Retry-After), 5xx errors and
+          lost responses (applied, but answered with a 504), and can enforce a
+          requests-per-second limit like Notion does.
+        - Counts every request by endpoint, for requests-per-item metrics.
+    Collaborators:
+        - NotionRepository (through the httpx.Client it builds)
+"""
+
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from urllib.parse import quote
+
+import httpx
+
+from src.infrastructure.notion_http import NOTION_API_URL, endpoint_name
+
+DEFAULT_PROPERTIES = {
+    "Name": "title",
+    "RelativeID": "rich_text",
+    "Extension": "rich_text",
+    "MagicLink": "url",
+}
+
+
+def _minute(moment: datetime) -> str:
+    # last_edited_time en Notion se redondea al minuto
+    moment = moment.replace(second=0, microsecond=0)
+    return moment.isoformat().replace("+00:00", ".000Z")
+
+
+def _now_minute() -> str:
+    return _minute(datetime.now(timezone.utc))
+
+
+def _json(status: int, payload: dict[str, Any], **headers: str) -> httpx.Response:
+    return httpx.Response(status, json=payload, headers=headers)
+
+
+def _error(status: int, code: str, message: str, **headers: str) -> httpx.Response:
+    payload = {"object": "error", "status": status, "code": code, "message": message}
+    return _json(status, payload, **headers)
+
+
+class NotionSimulator:
+    def __init__(
+        self,
+        database_id: str = "00000000-0000-4000-8000-000000000000",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        error_rate: float = 0.0,
+        lost_response_rate: float = 0.0,
+        requests_per_second: float | None = None,
+        seed: int | None = None,
+        properties: dict[str, str] | None = None,
+    ):
+        self.database_id = database_id
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.lost_response_rate = lost_response_rate
+        self.requests_per_second = requests_per_second
+        self.stats: Counter[str] = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._schema: dict[str, dict[str, Any]] = {}
+        self._pages: dict[str, dict[str, Any]] = {}
+        self._window: list[float] = []
+        for name, type_ in (properties or DEFAULT_PROPERTIES).items():
+            self._add_property(name, type_, {})
+
+    # --- API pública para los benchmarks ---
+
+    def client(self) -> httpx.Client:
+        """httpx.Client wired to the simulator (drop-in for build_http_client)."""
+        return httpx.Client(
+            transport=httpx.MockTransport(self.handle),
+            base_url=NOTION_API_URL + "/",
+        )
+
+    @property
+    def requests(self) -> int:
+        return sum(self.stats.values())
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
+
+    def live_pages(self) -> dict[str, dict[str, Any]]:
+        """{RelativeID: page} of every non-archived page."""
+        with self._lock:
+            return {
+                self._text(page, "RelativeID"): page
+                for page in self._pages.values()
+                if not page["archived"]
+            }
+
+    def age(self, minutes: float):
+        """Pretends `minutes` went by since every page was last edited.
+
+        Lets back-to-back benchmark runs behave like runs spaced in time,
+        so the incremental fetch does not pick up the previous run's writes.
+        """
+        delta = timedelta(minutes=minutes)
+        with self._lock:
+            for page in self._pages.values():
+                for key in ("created_time", "last_edited_time"):
+                    page[key] = _minute(_parse(page[key]) - delta)
+
+    def archive(self, rel_id: str):
+        """Archives the live page of `rel_id` by hand, as a user would in
+        Notion (outside the sync)."""
+        with self._lock:
+            for page in self._pages.values():
+                if not page["archived"] and self._text(page, "RelativeID") == rel_id:
+                    page["archived"] = True
+                    page["last_edited_time"] = _now_minute()
+
+    def duplicates(self) -> list[str]:
+        """RelativeIDs held by more than one live page."""
+        with self._lock:
+            seen = Counter(
+                self._text(page, "RelativeID")
+                for page in self._pages.values()
+                if not page["archived"]
+            )
+        return sorted(rel_id for rel_id, n in seen.items() if n > 1)
+
+    # --- Transporte ---
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/v1/").strip("/")
+        parts = path.split("/")
+        endpoint = endpoint_name(request.method, path)
+        with self._lock:
+            self.stats[endpoint] += 1
+
+        delay = self.latency + (
+            self._random.uniform(0, self.jitter) if self.jitter else 0
+        )
+        if delay:
+            time.sleep(delay)
+
+        throttled = self._throttle()
+        if throttled:
+            return throttled
+        if self.error_rate and self._random.random() < self.error_rate:
+            status = self._random.choice((500, 502, 503, 504))
+            return _error(status, "service_unavailable", "Simulated failure")
+
+        body = json.loads(request.content) if request.content else {}
+        with self._lock:
+            response = self._route(request, endpoint, parts, body)
+        if self.lost_response_rate and self._random.random() < self.lost_response_rate:
+            # Aplicado en Notion, pero la respuesta nunca llega al cliente
+            return _error(504, "gateway_timeout", "Simulated lost response")
+        return response
+
+    def _throttle(self) -> httpx.Response | None:
+        if self.rate_limit_rate and self._random.random() < self.rate_limit_rate:
+            return _error(429, "rate_limited", "Simulated 429", **{"Retry-After": "0"})
+        if not self.requests_per_second:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.requests_per_second:
+                retry_after = max(0.0, 1.0 - (now - self._window[0]))
+                return _error(
+                    429,
+                    "rate_limited",
+                    "Rate limited",
+                    **{"Retry-After": f"{retry_after:.2f}"},
+                )
+            self._window.append(now)
+        return None
+
+    def _route(
+        self,
+        request: httpx.Request,
+        endpoint: str,
+        parts: list[str],
+        body: dict[str, Any],
+    ) -> httpx.Response:
+        if parts[0] == "databases":
+            if len(parts) < 2 or parts[1] != self.database_id:
+                return _error(
+                    404, "object_not_found", f"Database {parts[1:]} not found"
+                )
+            if endpoint == "databases.retrieve":
+                return _json(200, self._database())
+            if endpoint == "databases.update":
+                for name, config in body.get("properties", {}).items():
+                    type_ = next(iter(config))
+                    self._add_property(name, type_, config[type_])
+                return _json(200, self._database())
+            return self._query(body, request.url.params.get_list("filter_properties"))
+
+        if endpoint == "pages.create":
+            return self._create_page(body)
+        if endpoint == "pages.update" and len(parts) == 2:
+            return self._update_page(parts[1], body)
+        return _error(400, "invalid_request_url", f"Unsupported: {request.url.path}")
+
+    # --- Esquema ---
+
+    def _add_property(self, name: str, type_: str, config: dict[str, Any]):
+        if name in self._schema:
+            return
+        # Notion devuelve los IDs de propiedad URL-encoded (p.ej. "a%3Bc")
+        prop_id = "title" if type_ == "title" else quote(f"{next(self._ids)}:x", "")
+        self._schema[name] = {"id": prop_id, "name": name, "type": type_, type_: config}
+
+    def _database(self) -> dict[str, Any]:
+        return {
+            "object": "database",
+            "id": self.database_id,
+            "properties": {name: dict(prop) for name, prop in self._schema.items()},
+        }
+
+    def _resolve(self, key: str) -> dict[str, Any] | None:
+        if key in self._schema:
+            return self._schema[key]
+        return next(
+            (p for p in self._schema.values() if p["id"] in (key, quote(key, ""))),
+            None,
+        )
+
+    # --- Páginas ---
+
+    def _create_page(self, body: dict[str, Any]) -> httpx.Response:
+        if body.get("parent", {}).get("database_id") not in (self.database_id, None):
+            return _error(404, "object_not_found", "Parent database not found")
+        now = _now_minute()
+        page = {
+            "object": "page",
+            "id": str(uuid.UUID(int=self._random.getrandbits(128), version=4)),
+            "created_time": now,
+            "last_edited_time": now,
+            "archived": False,
+            "icon": body.get("icon"),
+            "parent": {"type": "database_id", "database_id": self.database_id},
+            "properties": {},
+        }
+        error = self._set_properties(page, body.get("properties", {}))
+        if error:
+            return error
+        self._pages[page["id"]] = page
+        return _json(200, page)
+
+    def _update_page(self, page_id: str, body: dict[str, Any]) -> httpx.Response:
+        page = self._pages.get(page_id)
+        if page is None:
+            return _error(404, "object_not_found", f"Page {page_id} not found")
+        if page["archived"] and body.get("archived") is not False:
+            return _error(400, "validation_error", "Can't edit block that is archived.")
+        if "archived" in body:
+            page["archived"] = bool(body["archived"])
+        if "icon" in body:
+            page["icon"] = body["icon"]
+        error = self._set_properties(page, body.get("properties", {}))
+        if error:
+            return error
+        page["last_edited_time"] = _now_minute()
+        return _json(200, page)
+
+    def _set_properties(
+        self, page: dict[str, Any], values: dict[str, Any]
+    ) -> httpx.Response | None:
+        for key, value in values.items():
+            prop = self._resolve(key)
+            if prop is None:
+                return _error(400, "validation_error", f"{key} is not a property")
+            type_ = prop["type"]
+            if type_ not in value:
+                return _error(
+                    400, "validation_error", f"{prop['name']} expects {type_}"
+                )
+            raw = value[type_]
+            if type_ in ("title", "rich_text"):
+                raw = [
+                    {
+                        "type": "text",
+                        "text": item["text"],
+                        "plain_text": item["text"]["content"],
+                    }
+                    for item in raw
+                ]
+            elif type_ == "relation":
+                raw = [{"id": item["id"]} for item in raw]
+            page["properties"][prop["name"]] = {
+                "id": prop["id"],
+                "type": type_,
+                type_: raw,
+            }
+        return None
+
+    # --- Query ---
+
+    def _query(
+        self, body: dict[str, Any], filter_properties: list[str]
+    ) -> httpx.Response:
+        pages = [p for p in self._pages.values() if not p["archived"]]
+        filter_ = body.get("filter")
+        if filter_:
+            pages = [p for p in pages if self._matches(p, filter_)]
+
+        size = min(int(body.get("page_size", 100)), 100)
+        start = int(body.get("start_cursor") or 0)
+        chunk = pages[start : start + size]
+        has_more = start + size < len(pages)
+
+        wanted = {
+            self._resolve(key)["name"]
+            for key in filter_properties
+            if self._resolve(key)
+        }
+        results = [
+            {
+                **page,
+                "properties": {
+                    name: value
+                    for name, value in page["properties"].items()
+                    if not wanted or name in wanted
+                },
+            }
+            for page in chunk
+        ]
+        return _json(
+            200,
+            {
+                "object": "list",
+                "results": results,
+                "has_more": has_more,
+                "next_cursor": str(start + size) if has_more else None,
+            },
+        )
+
+    def _matches(self, page: dict[str, Any], filter_: dict[str, Any]) -> bool:
+        if "and" in filter_:
+            return all(self._matches(page, f) for f in filter_["and"])
+        if "or" in filter_:
+            return any(self._matches(page, f) for f in filter_["or"])
+        if filter_.get("timestamp") == "last_edited_time":
+            since = filter_["last_edited_time"]["on_or_after"]
+            return _parse(page["last_edited_time"]) >= _parse(since)
+        prop = self._resolve(filter_.get("property", ""))
+        if prop is None:
+            return False
+        if "rich_text" in filter_:
+            return self._text(page, prop["name"]) == filter_["rich_text"].get("equals")
+        return False
+
+    @staticmethod
+    def _text(page: dict[str, Any], name: str) -> str | None:
+        prop = page["properties"].get(name)
+        items = prop.get(prop["type"]) if prop else None
+        return items[0]["plain_text"] if items else None
+
+
+def _parse(timestamp: str) -> datetime:
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
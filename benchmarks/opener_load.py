@@ -0,0 +1,305 @@
+"""
+CRC Card:
+    Module: Opener Load Test
+    Responsibilities:
+        - Builds a synthetic tree and the sync state indexing it, starts an
+          OpenerService on it (without launching applications) and drives
+          many concurrent /open requests through keep-alive connections.
+        - Mixes a hot set of links (repeated clicks, served by the LRU), cold
+          links across the whole tree, traversal attempts and links with a
+          forged signature, which must be refused. Requests carry the Fetch
+          Metadata headers of a click, so they go through every check.
+        - Reports throughput, client-side latency percentiles, status codes
+          and the service's own /stats; fails if a valid link is not opened
+          or a hostile one is not refused.
+        - With --url, drives an opener that is already running instead,
+          taking the links from its state file (and its OPENER_SECRET).
+    Collaborators:
+        - OpenerService
+        - PathIndex
+        - SyncStateStore
+        - Trees
+
+Usage:
+    python -m benchmarks.opener_load [--items 20000] [--requests 20000] [--concurrency 64]
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import io
+import json
+import os
+import random
+import secrets
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from benchmarks.trees import build_small_files
+from src.domain import RemotePage
+from src.infrastructure.magic_link import sign_path
+from src.infrastructure.opener import OpenerService, PathIndex
+from src.infrastructure.state_store import SyncStateStore, read_synced_ids
+
+HOSTILE = (
+    "../../etc/passwd",
+    "/etc/passwd",
+    "group_00/../../secret",
+    "C:/Windows/win.ini",
+    "group_00\\..\\..\\secret",
+    "group_00//note_0000.md",
+)
+
+
+def _target(rel_id: str, secret: str | None, forged: bool = False) -> str:
+    """The /open target of the MagicLink for `rel_id`."""
+    target = f"/open?f={base64.urlsafe_b64encode(rel_id.encode()).decode()}"
+    if secret:
+        target += f"&s={sign_path(rel_id, 'forged' if forged else secret)}"
+    return target
+
+
+def _index_tree(root: Path, state: Path) -> list[str]:
+    """Records every file of `root` in a state file, as a sync would."""
+    rel_ids = sorted(
+        p.relative_to(root).as_posix() for p in root.rglob("*") if p.is_file()
+    )
+    store = SyncStateStore(state, "load-test")
+    try:
+        store.put_many(
+            {rel: RemotePage(f"page-{i}", 1, 0.0) for i, rel in enumerate(rel_ids)}
+        )
+    finally:
+        store.close()
+    return rel_ids
+
+
+def _workload(
+    rel_ids: list[str], args: argparse.Namespace
+) -> list[tuple[str, bool, bool]]:
+    """(RelativeID, should open, forged signature) for each request."""
+    rng = random.Random(args.seed)
+    hot = rng.sample(rel_ids, min(args.hot_links, len(rel_ids)))
+    requests = []
+    for _ in range(args.requests):
+        draw = rng.random()
+        if draw < args.hostile:
+            # Mitad traversal, mitad enlaces válidos con la firma falsificada
+            if args.secret and rng.random() < 0.5:
+                requests.append((rng.choice(rel_ids), False, True))
+            else:
+                requests.append((rng.choice(HOSTILE), False, False))
+        elif draw < args.hostile + args.hot:
+            requests.append((rng.choice(hot), True, False))
+        else:
+            requests.append((rng.choice(rel_ids), True, False))
+    return requests
+
+
+class _Connection:
+    """A keep-alive HTTP/1.1 client connection, lean enough that the load
+    generator does not dominate the latencies it measures."""
+
+    def __init__(self, host: str, port: int):
+        self._address = (host, port)
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def get(self, target: str) -> tuple[int, bytes]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(*self._address)
+        # Las cabeceras de un click en un enlace
+        self._writer.write(
+            f"GET {target} HTTP/1.1\r\nHost: {self._address[0]}\r\n"
+            "Sec-Fetch-Mode: navigate\r\nSec-Fetch-Dest: document\r\n\r\n".encode()
+        )
+        head = await self._reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        length = 0
+        keep_alive = True
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+            elif name.lower() == "connection":
+                keep_alive = value.strip().lower() != "close"
+        body = await self._reader.readexactly(length)
+        if not keep_alive:
+            await self.close()
+        return int(status_line.split(" ")[1]), body
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            with contextlib.suppress(ConnectionError):
+                await self._writer.wait_closed()
+            self._reader = self._writer = None
+
+
+async def _drive(
+    url: str,
+    requests: list[tuple[str, bool, bool]],
+    concurrency: int,
+    secret: str | None,
+) -> tuple[list[float], Counter, list[str], float]:
+    latencies: list[float] = []
+    statuses: Counter[int] = Counter()
+    wrong: list[str] = []
+    queue = iter(requests)
+    address = urlsplit(url)
+
+    async def worker():
+        connection = _Connection(address.hostname, address.port)
+        try:
+            for rel_id, valid, forged in queue:
+                started = time.perf_counter()
+                status, _ = await connection.get(_target(rel_id, secret, forged))
+                latencies.append(time.perf_counter() - started)
+                statuses[status] += 1
+                if (status == 200) != valid:
+                    wrong.append(f"{status} {rel_id}")
+        finally:
+            await connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, wrong, time.perf_counter() - started
+
+
+async def _server_stats(url: str) -> dict:
+    address = urlsplit(url)
+    connection = _Connection(address.hostname, address.port)
+    try:
+        return json.loads((await connection.get("/stats"))[1])
+    finally:
+        await connection.close()
+
+
+def _percentiles(latencies: list[float]) -> dict[str, float]:
+    ordered = sorted(latencies)
+
+    def at(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {"p50": at(0.5), "p95": at(0.95), "p99": at(0.99), "max": at(1.0)}
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    if args.url:
+        rel_ids = sorted(read_synced_ids(Path(args.state)))
+        requests = _workload(rel_ids, args)
+        latencies, statuses, wrong, wall = await _drive(
+            args.url, requests, args.concurrency, args.secret
+        )
+        server = await _server_stats(args.url)
+        return _result(rel_ids, latencies, statuses, wrong, wall, server)
+
+    with tempfile.TemporaryDirectory(prefix="opener-load-") as tmp:
+        root = Path(tmp) / "tree"
+        root.mkdir()
+        build_small_files(root, args.items, random.Random(args.seed))
+        rel_ids = _index_tree(root, Path(tmp) / "state.sqlite3")
+        requests = _workload(rel_ids, args)
+        service = OpenerService(
+            PathIndex([(None, root)], [Path(tmp) / "state.sqlite3"], args.cache_size),
+            launcher=None,
+            port=0,
+            secret=args.secret,
+        )
+        # Los rechazos se loguean uno por uno: fuera del reporte
+        with contextlib.redirect_stdout(io.StringIO()):
+            await service.start()
+            try:
+                latencies, statuses, wrong, wall = await _drive(
+                    f"http://127.0.0.1:{service.port}",
+                    requests,
+                    args.concurrency,
+                    args.secret,
+                )
+            finally:
+                await service.close()
+        return _result(rel_ids, latencies, statuses, wrong, wall, service.stats())
+
+
+def _result(rel_ids, latencies, statuses, wrong, wall, server) -> dict:
+    return {
+        "indexed": len(rel_ids),
+        "requests": len(latencies),
+        "wall_s": round(wall, 3),
+        "requests_per_s": round(len(latencies) / wall, 1) if wall else None,
+        "client_latency_ms": _percentiles(latencies),
+        "statuses": dict(sorted(statuses.items())),
+        "wrong": wrong[:10],
+        "server": server,
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("Usage:")[0])
+    parser.add_argument("--items", type=int, default=20000, help="files in the tree")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument(
+        "--hot", type=float, default=0.8, help="share of clicks on the hot links"
+    )
+    parser.add_argument("--hot-links", type=int, default=200)
+    parser.add_argument(
+        "--hostile",
+        type=float,
+        default=0.02,
+        help="share of traversal attempts and forged links",
+    )
+    parser.add_argument("--cache-size", type=int, default=4096)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--url", help="drive a running opener instead")
+    parser.add_argument("--state", help="its state file (with --url)")
+    parser.add_argument(
+        "--unsigned", action="store_true", help="test links without a signature"
+    )
+    parser.add_argument("--json", action="store_true", help="print the raw result")
+    args = parser.parse_args(argv)
+    if args.url and not args.state:
+        parser.error("--url needs --state")
+    # Un opener en marcha firma con el secreto del .env; el local, con uno nuevo
+    if args.unsigned:
+        args.secret = None
+    elif args.url:
+        args.secret = os.getenv("OPENER_SECRET")
+    else:
+        args.secret = secrets.token_urlsafe(32)
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    result = asyncio.run(_run(args))
+    if args.json:
+        print(json.dumps(result))
+    else:
+        client, server = result["client_latency_ms"], result["server"]
+        print(
+            f"[BENCH] {result['requests']} opens over {result['indexed']} indexed "
+            f"paths, concurrency {args.concurrency}: {result['requests_per_s']} req/s"
+        )
+        print(
+            f"[BENCH] client ms p50 {client['p50']} p95 {client['p95']} "
+            f"p99 {client['p99']} max {client['max']}"
+        )
+        latency, cache = server["latency_ms"], server["cache"]
+        print(
+            f"[BENCH] server ms p50 {latency['p50']} p95 {latency['p95']} "
+            f"p99 {latency['p99']} | cache hit rate {cache['hit_rate']}"
+        )
+        print(f"[BENCH] statuses {result['statuses']}")
+    for line in result["wrong"]:
+        print(f"[REGRESSION] unexpected {line}")
+    return 1 if result["wrong"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
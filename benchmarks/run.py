@@ -0,0 +1,346 @@
+"""
+CRC Card:
+    Module: Benchmark Runner
+    Responsibilities:
+        - Syncs each synthetic tree against the NotionSimulator through the
+          real Synchronizer/NotionRepository stack, phase by phase: cold sync,
+          warm no-op sync, then incremental edits, a rename and a mass delete.
+        - Measures requests per item, wall time, items/s, peak RSS and the
+          per-phase timings from SyncMetrics, and checks that Notion ends up
+          matching the local tree.
+        - Runs every scenario in its own process so peak RSS is not shared.
+        - Appends results to benchmarks/results/history.jsonl and compares
+          them with the previous run of the same configuration.
+    Collaborators:
+        - NotionSimulator
+        - Trees
+        - Synchronizer
+        - NotionRepository
+        - SyncStateStore
+
+Usage:
+    python -m benchmarks.run [--items 2000] [--scenario deep] [--latency 0.01]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from benchmarks.notion_simulator import NotionSimulator
+from benchmarks.trees import TREES, edit_and_add, mass_delete, rename
+from src.application.factories import FileMetaFactory
+from src.application.fingerprints import Fingerprinter
+from src.application.metrics import SyncMetrics
+from src.application.synchronizer import Synchronizer
+from src.infrastructure.content_hash import ALGORITHM as HASH_ALGORITHM
+from src.infrastructure.content_hash import hash_file
+from src.infrastructure.magic_link import SantiFSMagicLinkGenerator
+from src.infrastructure.notion_adapter import NotionRepository
+from src.infrastructure.notion_http import RetryPolicy
+from src.infrastructure.rate_limiter import TokenBucket
+from src.infrastructure.state_store import SyncStateStore
+
+RESULTS_DIR = Path(__file__).parent / "results"
+HISTORY_FILE = RESULTS_DIR / "history.jsonl"
+
+PHASES = ("cold", "warm", "incremental", "rename", "mass-delete")
+MUTATIONS = {"incremental": edit_and_add, "rename": rename, "mass-delete": mass_delete}
+
+# Tiempo simulado entre runs: el fetch incremental no ve las escrituras previas
+MINUTES_BETWEEN_RUNS = 60
+# Diferencias de wall time menores a esto son ruido (fases de milisegundos)
+MIN_WALL_DELTA = 0.1
+
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KiB; macOS, bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _config(args: argparse.Namespace) -> dict:
+    return {
+        "items": args.items,
+        "workers": args.workers,
+        "latency": args.latency,
+        "rps": args.rps,
+        "error_rate": args.error_rate,
+        "rate_limit_rate": args.rate_limit_rate,
+        "lost_response_rate": args.lost_response_rate,
+        "content_hash": args.content_hash,
+        "state": not args.no_state,
+        **({"shards": args.shards} if args.shards else {}),
+    }
+
+
+def run_scenario(name: str, args: argparse.Namespace) -> list[dict]:
+    rng = random.Random(args.seed)
+    simulator = NotionSimulator(
+        latency=args.latency,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        lost_response_rate=args.lost_response_rate,
+        requests_per_second=args.rps,
+        seed=args.seed,
+    )
+    # Sin --rps no hay límite: se mide el costo propio del sync, no la espera
+    limiter = TokenBucket(args.rps, max(1, int(args.rps))) if args.rps else None
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        root = Path(tmp) / "tree"
+        root.mkdir()
+        TREES[name].build(root, args.items, rng)
+        store = (
+            None
+            if args.no_state
+            else SyncStateStore(Path(tmp) / "state.sqlite3", simulator.database_id)
+        )
+        try:
+            for phase in PHASES:
+                mutate = MUTATIONS.get(phase)
+                changed = mutate(root, rng) if mutate else None
+                simulator.age(MINUTES_BETWEEN_RUNS)
+                simulator.reset_stats()
+                result = _run_phase(simulator, root, store, limiter, args)
+                result.update(scenario=name, phase=phase, changed=changed)
+                results.append(result)
+        finally:
+            if store:
+                store.close()
+    return results
+
+
+def _run_phase(
+    simulator: NotionSimulator,
+    root: Path,
+    store: SyncStateStore | None,
+    limiter: TokenBucket | None,
+    args: argparse.Namespace,
+) -> dict:
+    """One process run of the tool: builds the stack, syncs, tears it down."""
+    log = io.StringIO()
+    metrics = SyncMetrics()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        repo = NotionRepository(
+            "bench-token",
+            simulator.database_id,
+            SantiFSMagicLinkGenerator(),
+            store,
+            limiter or TokenBucket(rate=1e9, burst=10**9),
+            RetryPolicy(base_delay=0.05, max_delay=1.0),
+            simulator.client(),
+            fingerprints=args.content_hash,
+            metrics=metrics,
+        )
+        try:
+            fingerprinter = (
+                Fingerprinter(hash_file, HASH_ALGORITHM, store, metrics=metrics)
+                if args.content_hash
+                else None
+            )
+            synchronizer = Synchronizer(
+                repo,
+                FileMetaFactory(root, "bench"),
+                root,
+                workers=args.workers,
+                fingerprinter=fingerprinter,
+                shard_processes=args.shards,
+                metrics=metrics,
+                journal=store,
+            )
+            report = synchronizer.sync()
+        finally:
+            repo.close()
+    wall = time.perf_counter() - started
+
+    items = len(synchronizer.local_ids)
+    return {
+        "items": items,
+        "requests": simulator.requests,
+        "requests_per_item": round(simulator.requests / max(1, items), 4),
+        "wall_s": round(wall, 3),
+        "items_per_s": round(items / wall, 1) if wall else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "failures": len(report.failures),
+        "duplicates": len(simulator.duplicates()),
+        "consistent": set(simulator.live_pages()) == synchronizer.local_ids
+        and not simulator.duplicates(),
+        "endpoints": dict(sorted(simulator.stats.items())),
+        "phases": metrics.last_run["phases"],
+        "retries": metrics.last_run["api"]["retries"],
+    }
+
+
+def _run_isolated(name: str, argv: list[str]) -> list[dict]:
+    """Runs one scenario in a child process (fresh peak RSS)."""
+    child = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", *argv, "--child", name],
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).resolve().parent.parent,
+    )
+    if child.returncode != 0:
+        raise RuntimeError(f"Scenario {name} failed:\n{child.stderr}")
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def _revision() -> str:
+    try:
+        rev = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+        return rev.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _previous_run(config: dict) -> dict | None:
+    if not HISTORY_FILE.exists():
+        return None
+    previous = None
+    with HISTORY_FILE.open(encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry.get("config") == config:
+                previous = entry
+    return previous
+
+
+def _save(entry: dict):
+    RESULTS_DIR.mkdir(exist_ok=True)
+    with HISTORY_FILE.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def compare(results: list[dict], previous: dict | None, tolerance: float) -> list[str]:
+    """Regressions against the previous run: any extra request, or wall time
+    beyond `tolerance` (wall time is noisy; request counts are not)."""
+    if previous is None:
+        return []
+    before = {(r["scenario"], r["phase"]): r for r in previous["results"]}
+    regressions = []
+    for r in results:
+        old = before.get((r["scenario"], r["phase"]))
+        if old is None:
+            continue
+        key = f"{r['scenario']}/{r['phase']}"
+        if r["requests"] > old["requests"]:
+            regressions.append(f"{key}: requests {old['requests']} -> {r['requests']}")
+        slower = r["wall_s"] - old["wall_s"]
+        if slower > MIN_WALL_DELTA and slower > old["wall_s"] * tolerance:
+            regressions.append(f"{key}: wall {old['wall_s']}s -> {r['wall_s']}s")
+        if old["consistent"] and not r["consistent"]:
+            regressions.append(f"{key}: Notion no longer matches the local tree")
+    return regressions
+
+
+def print_table(results: list[dict], previous: dict | None):
+    before = {
+        (r["scenario"], r["phase"]): r for r in (previous or {}).get("results", [])
+    }
+    header = (
+        f"{'scenario':<12} {'phase':<12} {'items':>7} {'changed':>7} {'requests':>8} "
+        f"{'req/item':>8} {'wall s':>8} {'items/s':>9} {'rss MB':>7} {'ok':>3} {'vs prev':>14}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        old = before.get((r["scenario"], r["phase"]))
+        delta = ""
+        if old:
+            delta = f"{r['requests'] - old['requests']:+d} req"
+            if old["wall_s"]:
+                delta += f" {100 * (r['wall_s'] / old['wall_s'] - 1):+.0f}%"
+        ok = "yes" if r["consistent"] and not r["failures"] else "NO"
+        print(
+            f"{r['scenario']:<12} {r['phase']:<12} {r['items']:>7} "
+            f"{r['changed'] if r['changed'] is not None else '-':>7} {r['requests']:>8} "
+            f"{r['requests_per_item']:>8.3f} {r['wall_s']:>8.2f} "
+            f"{r['items_per_s'] or 0:>9.0f} {r['peak_rss_mb'] or 0:>7.1f} {ok:>3} {delta:>14}"
+        )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("Usage:")[0])
+    parser.add_argument("--items", type=int, default=2000, help="items per tree")
+    parser.add_argument(
+        "--scenario", action="append", choices=sorted(TREES), help="repeatable"
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds/request")
+    parser.add_argument("--rps", type=float, help="enforce Notion-like rate limit")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--lost-response-rate", type=float, default=0.0, help="applied, then 504"
+    )
+    parser.add_argument("--content-hash", action="store_true")
+    parser.add_argument(
+        "--shards", type=int, default=0, help="processes for the sharded scan"
+    )
+    parser.add_argument("--no-state", action="store_true", help="no SQLite store")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed wall time increase"
+    )
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_args(argv)
+    if args.child:
+        print(json.dumps(run_scenario(args.child, args)))
+        return 0
+
+    results = []
+    for name in args.scenario or TREES:
+        print(f"[BENCH] {name}: {TREES[name].description} ({args.items} items)")
+        results.extend(_run_isolated(name, argv))
+
+    config = _config(args)
+    previous = _previous_run(config)
+    print()
+    print_table(results, previous)
+
+    regressions = compare(results, previous, args.tolerance)
+    for regression in regressions:
+        print(f"[REGRESSION] {regression}")
+    if not args.no_save:
+        _save(
+            {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "revision": _revision(),
+                "config": config,
+                "results": results,
+            }
+        )
+        print(f"[BENCH] Results appended to {HISTORY_FILE}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
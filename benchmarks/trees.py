@@ -0,0 +1,145 @@
+"""
+CRC Card:
+    Module: Trees
+    Responsibilities:
+        - Generates the synthetic directory trees the benchmarks sync: deep
+          (a long chain of nested folders), wide (one flat folder) and many
+          small files (a balanced tree of tiny files).
+        - Applies the mutations measured between runs: content edits plus
+          new files, renaming a folder (or files, in a flat tree) and a mass
+          delete that stays under the deletion guard.
+        - Deterministic for a given seed, so runs are comparable.
+    Collaborators:
+        - benchmarks.run
+"""
+
+import os
+import random
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class TreeSpec:
+    name: str
+    build: Callable[[Path, int, random.Random], None]
+    description: str
+
+
+def _write(path: Path, rng: random.Random, max_size: int):
+    path.write_bytes(rng.randbytes(rng.randint(1, max_size)))
+
+
+def build_deep(root: Path, items: int, rng: random.Random, levels: int = 25):
+    per_level = max(1, items // levels - 1)
+    folder = root
+    for level in range(levels):
+        folder = folder / f"level_{level:02d}"
+        folder.mkdir()
+        for i in range(per_level):
+            _write(folder / f"file_{i:04d}.txt", rng, 4096)
+
+
+def build_wide(root: Path, items: int, rng: random.Random):
+    folder = root / "flat"
+    folder.mkdir()
+    for i in range(items - 1):
+        _write(folder / f"file_{i:06d}.bin", rng, 4096)
+
+
+def build_small_files(root: Path, items: int, rng: random.Random, fanout: int = 10):
+    leaves = fanout * fanout
+    per_leaf = max(1, items // leaves - 1)
+    for a in range(fanout):
+        for b in range(fanout):
+            folder = root / f"group_{a:02d}" / f"sub_{b:02d}"
+            folder.mkdir(parents=True)
+            for i in range(per_leaf):
+                _write(folder / f"note_{i:04d}.md", rng, 64)
+
+
+TREES = {
+    spec.name: spec
+    for spec in (
+        TreeSpec("deep", build_deep, "25 nested folders, files at every level"),
+        TreeSpec("wide", build_wide, "one folder holding every file"),
+        TreeSpec("small-files", build_small_files, "10x10 folders of tiny files"),
+    )
+}
+
+
+def list_tree(root: Path) -> tuple[list[Path], list[Path]]:
+    """(folders, files) under `root`, sorted for determinism."""
+    folders, files = [], []
+    for current, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        base = Path(current)
+        folders.extend(base / d for d in dirnames)
+        files.extend(base / f for f in sorted(filenames))
+    return folders, files
+
+
+def _folder_near(root: Path, share: float) -> tuple[Path, int] | None:
+    """(folder, subtree size) of the folder whose subtree is closest to
+    `share` of the tree, or None in a flat tree."""
+    folders, files = list_tree(root)
+    paths = [*folders, *files]
+    sizes = {f: 1 + sum(1 for p in paths if f in p.parents) for f in folders}
+    candidates = [f for f in folders if sizes[f] < len(paths)]
+    if not candidates:
+        return None
+    folder = min(candidates, key=lambda f: abs(sizes[f] - share * len(paths)))
+    return folder, sizes[folder]
+
+
+def edit_and_add(root: Path, rng: random.Random, share: float = 0.01) -> int:
+    """Rewrites `share` of the files and adds as many new ones. Returns changes."""
+    _, files = list_tree(root)
+    count = max(1, int(len(files) * share))
+    for path in rng.sample(files, count):
+        stat = path.stat()
+        # Otro tamaño y otro mtime: se detecta con o sin hashing
+        path.write_bytes(rng.randbytes(stat.st_size + 1))
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    folders = sorted({p.parent for p in files})
+    for i in range(count):
+        _write(rng.choice(folders) / f"added_{i:05d}.txt", rng, 1024)
+    return 2 * count
+
+
+def rename(root: Path, rng: random.Random, share: float = 0.1) -> int:
+    """Renames the folder covering ~`share` of the tree (or files, if flat)."""
+    near = _folder_near(root, share)
+    if near is not None:
+        folder, moved = near
+        folder.rename(folder.with_name(folder.name + "_renamed"))
+        return moved
+    _, files = list_tree(root)
+    count = max(1, int(len(files) * share))
+    for path in rng.sample(files, count):
+        path.rename(path.with_name("renamed_" + path.name))
+    return count
+
+
+def mass_delete(root: Path, rng: random.Random, share: float = 0.3) -> int:
+    """Deletes ~`share` of the tree (below DeletionGuard's default 50%),
+    whole folders first, then loose files for the remainder."""
+    folders, files = list_tree(root)
+    target = int(share * (len(folders) + len(files)))
+    removed = 0
+    while removed < target:
+        near = _folder_near(root, (target - removed) / (len(folders) + len(files)))
+        if near is None:
+            break
+        folder, size = near
+        if removed + size > target * 1.2:
+            break
+        shutil.rmtree(folder)
+        removed += size
+    _, files = list_tree(root)
+    for path in rng.sample(files, max(0, min(len(files), target - removed))):
+        path.unlink()
+        removed += 1
+    return removed
@@ -4,71 +4,428 @@ CRC Card:
     Responsibilities:
         - Entry point of the application.
         - Loads environment variables.
-        - Initializes dependencies (Repository, Factory, Synchronizer).
-        - Executes the sync process.
+        - Initializes dependencies (State Store, Repository, Factory, Synchronizer).
+        - Executes the sync process (one-shot, or continuous in watch mode).
+        - Builds the ignore rules of each root; IGNORE_DRY_RUN only reports
+          what they exclude, without contacting Notion.
+        - SYNC_DRY_RUN only plans: prints each target's operations with a
+          request / duration estimate and saves them (PLAN_FILE) as JSON;
+          EXECUTE_PLAN runs such a file later.
+        - With SYNC_TARGETS, serves several (root, device, database) targets
+          from one process: one HTTP pool, rate limiter and metrics for all,
+          one repository / snapshot / state file per database, and one fair
+          pool of upload workers across the roots.
     Collaborators:
         - Synchronizer
         - NotionRepository
         - FileMetaFactory
+        - SyncStateStore
+        - WatchSynchronizer
+        - MultiRootSync / FairScheduler / NamespacedRepository
+        - SyncMetrics (+ JSON log / Prometheus exporters)
 """
 
+import json
 import os
 import sys
+import threading
+from datetime import timedelta
 from pathlib import Path
 
 from dotenv import load_dotenv
 
+from src.application.deletions import DeletionGuard
 from src.application.factories import FileMetaFactory
+from src.application.fingerprints import Fingerprinter
+from src.application.ignore import IgnoreRules
+from src.application.metrics import SyncMetrics
+from src.application.multi_root import FairScheduler, MultiRootSync
+from src.application.namespaces import NamespacedRepository, SharedSnapshot
+from src.application.plan import CostModel, PlanError, SyncPlan
+from src.application.priority import SECONDS_PER_HOUR, PriorityPolicy
+from src.application.report import SyncReport
+from src.application.scanner import FileScanner
 from src.application.synchronizer import Synchronizer
-from src.domain import IMagicLinkGenerator
+from src.application.watcher import WatchSynchronizer
+from src.infrastructure.content_hash import ALGORITHM as HASH_ALGORITHM
+from src.infrastructure.content_hash import hash_file
+from src.infrastructure.fs_events import create_event_source
+from src.infrastructure.magic_link import OPENER_URL, SantiFSMagicLinkGenerator
 from src.infrastructure.notion_adapter import NotionRepository
+from src.infrastructure.observability import (
+    JsonRunSummary,
+    PrometheusServer,
+    PrometheusTextFile,
+    install_json_logging,
+)
+from src.infrastructure.notion_http import (
+    HttpSettings,
+    RetryPolicy,
+    build_http_client,
+)
+from src.infrastructure.rate_limiter import (
+    NOTION_BURST,
+    NOTION_REQUESTS_PER_SECOND,
+    TokenBucket,
+)
+from src.infrastructure.state_store import SyncStateStore
+from src.infrastructure.targets import (
+    SyncTarget,
+    TargetConfigError,
+    load_targets,
+    state_path,
+)
 
+TRUTHY = {"1", "true", "yes", "on"}
 
-class FileUriGenerator(IMagicLinkGenerator):
-    """Generates file:// URIs (Passive link generation)."""
 
-    def generate(self, relative_path: Path) -> str:
-        # Since we don't have a server, we return a file URI.
-        # Note: Notion Desktop might block this, but it's the standard way without a server.
-        return Path(relative_path).as_uri()
+def _split(value: str | None) -> list[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def _ignore_rules(extra: tuple[str, ...] = ()) -> IgnoreRules:
+    """Ignore rules from the environment (plus a target's own patterns)."""
+    patterns = _split(os.getenv("SYNC_IGNORE"))
+    ignore_file = os.getenv("SYNC_IGNORE_FILE")
+    if ignore_file:
+        patterns += Path(ignore_file).read_text(encoding="utf-8").splitlines()
+    max_size_mb = os.getenv("IGNORE_MAX_SIZE_MB")
+    older_than = os.getenv("IGNORE_OLDER_THAN_DAYS")
+    return IgnoreRules(
+        [*patterns, *extra],
+        max_size=int(float(max_size_mb) * 1024 * 1024) if max_size_mb else None,
+        extensions=_split(os.getenv("IGNORE_EXTENSIONS")),
+        older_than_days=float(older_than) if older_than else None,
+    )
+
+
+def _ignore_dry_run(factory: FileMetaFactory, scan_workers: int):
+    """Scans with the ignore rules and reports what each one keeps out."""
+    factory.ignore.measure_subtrees = True
+    kept = sum(1 for _ in FileScanner(factory, scan_workers).scan())
+    print(f"[IGNORE] {factory.root}")
+    print(factory.ignore.report(kept))
+
+
+def _write_plans(path: str, plans: list[SyncPlan], cost: CostModel):
+    text = json.dumps({"plans": [plan.to_dict(cost) for plan in plans]}, indent=2)
+    if path == "-":
+        print(text)
+    else:
+        Path(path).write_text(text + "\n", encoding="utf-8")
+        print(f"[PLAN] Saved to {path}")
+
+
+def _read_plans(path: Path) -> dict[str, SyncPlan]:
+    """Saved plans by device."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        plans = [SyncPlan.from_dict(plan) for plan in data["plans"]]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise PlanError(f"Cannot read plan file {path}: {e}") from e
+    return {plan.device: plan for plan in plans}
+
+
+def _print_failures(reports: dict[str, SyncReport], multi: bool):
+    for device, report in reports.items():
+        prefix = f"{device}: " if multi else ""
+        for failure in report.failures:
+            print(
+                f"[FAILED] {prefix}{failure.action} {failure.rel_id}: {failure.error}"
+            )
+
+
+def _dry_run(synchronizers: dict[str, Synchronizer], cost: CostModel, path: str | None):
+    """Plans every target without writing to Notion."""
+    plans = [synchronizer.plan() for synchronizer in synchronizers.values()]
+    for plan in plans:
+        print(f"[PLAN] {plan.describe(cost)}")
+        for warning in plan.warnings:
+            print(f"[PLAN] {plan.device}: {warning}")
+    if len(plans) > 1:
+        # Todos los targets comparten el rate limiter: el total es lo que cuenta
+        total = SyncPlan(
+            "total",
+            "",
+            [op for plan in plans for op in plan.operations],
+            sum(plan.unchanged for plan in plans),
+        )
+        print(f"[PLAN] {total.describe(cost)}")
+    if path:
+        _write_plans(path, plans, cost)
 
 
 def main():
     load_dotenv()
 
+    # Antes del primer print: con LOG_FORMAT=json cada línea sale como JSON
+    exporters = []
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        exporters.append(JsonRunSummary(install_json_logging()))
+    metrics_file = os.getenv("METRICS_FILE")
+    if metrics_file:
+        exporters.append(PrometheusTextFile(Path(metrics_file)))
+    metrics_port = os.getenv("METRICS_PORT")
+    metrics = SyncMetrics(exporters)
+
     token = os.getenv("NOTION_TOKEN")
     db_id = os.getenv("NOTION_DATABASE_ID")
     watch_dir_str = os.getenv("WATCH_DIR")
     device_name = os.getenv("DEVICE_NAME", "DockerWorker")
-
-    if not all([token, db_id, watch_dir_str]):
+    # JSON con varios (root, dispositivo, base); reemplaza WATCH_DIR / DEVICE_NAME
+    targets_file = os.getenv("SYNC_TARGETS")
+    # Ruta vacía desactiva el estado persistente (cada run hace fetch completo)
+    state_db_path = os.getenv("STATE_DB_PATH", "sync_state.sqlite3")
+    full_resync = os.getenv("FULL_RESYNC", "").lower() in TRUTHY
+    # Cada tanto, fetch completo aunque haya índice (0 lo desactiva)
+    reconcile_hours = float(os.getenv("FULL_RECONCILE_HOURS", "24"))
+    workers = int(os.getenv("SYNC_WORKERS", "4"))
+    scan_workers = int(os.getenv("SCAN_WORKERS", "1"))
+    content_hash = os.getenv("CONTENT_HASH", "").lower() in TRUTHY
+    hash_workers = int(os.getenv("HASH_WORKERS", os.cpu_count() or 1))
+    # Procesos para el scan y el diff de árboles enormes (0/1: en este proceso)
+    shard_processes = int(os.getenv("SYNC_SHARDS", "0"))
+    if shard_processes > 1 and content_hash:
         print(
-            "ERROR: Missing .env variables (NOTION_TOKEN, NOTION_DATABASE_ID, WATCH_DIR)"
+            "[WARN] SYNC_SHARDS is ignored with CONTENT_HASH: hashing already "
+            "runs on its own process pool."
         )
-        sys.exit(1)
+    deletion_guard = DeletionGuard(
+        max_ratio=float(os.getenv("MAX_DELETE_RATIO", DeletionGuard.max_ratio))
+    )
+    rate = float(os.getenv("RATE_LIMIT_RPS", NOTION_REQUESTS_PER_SECOND))
+    burst = int(os.getenv("RATE_LIMIT_BURST", NOTION_BURST))
+    http_settings = HttpSettings(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", max(workers, 10))),
+        http2=os.getenv("HTTP2", "true").lower() in TRUTHY,
+    )
+    watch_mode = os.getenv("WATCH_MODE", "").lower() in TRUTHY
+    watch_backend = os.getenv("WATCH_BACKEND", "auto")  # auto | inotify | polling
+    watch_debounce = float(os.getenv("WATCH_DEBOUNCE", "2"))
+    watch_poll_interval = float(os.getenv("WATCH_POLL_INTERVAL", "5"))
+    # Solo planificar (sin escribir en Notion), o ejecutar un plan guardado
+    dry_run = os.getenv("SYNC_DRY_RUN", "").lower() in TRUTHY
+    plan_file = os.getenv("PLAN_FILE")
+    execute_plan = os.getenv("EXECUTE_PLAN")
+    cost = CostModel(rate, burst, workers)
+    # Lo modificado en las últimas SYNC_HOT_HOURS sube primero; pasado
+    # SYNC_TIME_BUDGET (segundos) el run solo termina ese hot set
+    time_budget = os.getenv("SYNC_TIME_BUDGET")
+    priority = PriorityPolicy(
+        hot_window=float(os.getenv("SYNC_HOT_HOURS", "24")) * SECONDS_PER_HOUR,
+        time_budget=float(time_budget) if time_budget else None,
+    )
+    retry_policy = RetryPolicy(
+        run_budget=int(os.getenv("RETRY_BUDGET", RetryPolicy.run_budget))
+    )
 
-    watch_dir = Path(watch_dir_str)
-    if not watch_dir.exists():
-        # In Docker, we expect the volume to be mounted here
+    if targets_file:
+        try:
+            targets = load_targets(Path(targets_file), db_id)
+        except TargetConfigError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+    elif watch_dir_str:
+        targets = [SyncTarget(device_name, Path(watch_dir_str), (db_id or "").strip())]
+    else:
+        targets = []
+    if targets and os.getenv("IGNORE_DRY_RUN", "").lower() in TRUTHY:
+        for target in targets:
+            factory = FileMetaFactory(
+                target.watch_dir, target.device, _ignore_rules(target.ignore)
+            )
+            _ignore_dry_run(factory, scan_workers)
+        return
+    if not token or not targets or not all(t.database_id for t in targets):
         print(
-            f"WARNING: Watch directory {watch_dir} does not exist. Ensure Docker volume is mounted."
+            "ERROR: Missing .env variables (NOTION_TOKEN, NOTION_DATABASE_ID, WATCH_DIR)"
         )
+        sys.exit(1)
+    multi = len(targets) > 1
+    saved_plans = None
+    if execute_plan:
+        try:
+            saved_plans = _read_plans(Path(execute_plan))
+        except PlanError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        unknown = set(saved_plans) - {t.device for t in targets}
+        if unknown:
+            print(f"ERROR: Plan for unknown targets: {', '.join(sorted(unknown))}")
+            sys.exit(1)
 
     print(f"--- SantiFS Sync Tool (Dockerized) ---")
-    print(f"Target: {watch_dir}")
+    for target in targets:
+        if not target.watch_dir.exists():
+            # In Docker, we expect the volume to be mounted here
+            print(
+                f"WARNING: Watch directory {target.watch_dir} does not exist. Ensure Docker volume is mounted."
+            )
+        print(f"Target: {target.watch_dir}" + (f" ({target.device})" if multi else ""))
 
     # Dependency Injection
-    link_gen = FileUriGenerator()
-    repo = NotionRepository(token, db_id, link_gen)
-    factory = FileMetaFactory(watch_dir, device_name)
+    # Un solo pool HTTP y un solo rate limiter: el límite de Notion es por token
+    # Enlaces al opener del escritorio (opener.py); Notion bloquea los file://
+    # OPENER_SECRET firma cada enlace: el opener no abre enlaces ajenos
+    link_gen = SantiFSMagicLinkGenerator(
+        os.getenv("OPENER_URL", OPENER_URL), os.getenv("OPENER_SECRET")
+    )
+    limiter = TokenBucket(rate, burst)
+    http_client = build_http_client(token, http_settings)
+    databases = list(dict.fromkeys(t.database_id for t in targets))
+    stores: dict[str, SyncStateStore | None] = {}
+    repos: dict[str, NotionRepository] = {}
+    try:
+        for database_id in databases:
+            store = (
+                SyncStateStore(
+                    state_path(state_db_path, database_id, len(databases)),
+                    database_id,
+                )
+                if state_db_path
+                else None
+            )
+            stores[database_id] = store
+            repos[database_id] = NotionRepository(
+                token,
+                database_id,
+                link_gen,
+                store,
+                limiter,
+                retry_policy,
+                http_client,
+                fingerprints=content_hash,
+                metrics=metrics,
+                devices=multi,
+                full_reconcile_every=(
+                    timedelta(hours=reconcile_hours) if reconcile_hours > 0 else None
+                ),
+            )
+    except Exception as e:
+        # p.ej. SchemaError si faltan RelativeID / Extension / MagicLink
+        print(f"CRITICAL FAILURE: {e}")
+        http_client.close()
+        for store in stores.values():
+            if store:
+                store.close()
+        sys.exit(1)
+
+    # Con varios roots: un snapshot por base y un pool de subida repartido por turnos
+    snapshots = {db: SharedSnapshot(repo) for db, repo in repos.items()}
+    scheduler = FairScheduler(workers) if multi else None
+    stacks = {}
+    for target in targets:
+        store = stores[target.database_id]
+        factory = FileMetaFactory(
+            target.watch_dir, target.device, _ignore_rules(target.ignore)
+        )
+        fingerprinter = (
+            Fingerprinter(hash_file, HASH_ALGORITHM, store, hash_workers, metrics)
+            if content_hash
+            else None
+        )
+        repository = (
+            NamespacedRepository(snapshots[target.database_id], target.namespace)
+            if multi
+            else repos[target.database_id]
+        )
+        synchronizer = Synchronizer(
+            repository,
+            factory,
+            target.watch_dir,
+            full_resync=full_resync,
+            workers=workers,
+            scan_workers=scan_workers,
+            shard_processes=shard_processes,
+            deletion_guard=deletion_guard,
+            fingerprinter=fingerprinter,
+            metrics=metrics,
+            journal=store.journal(target.device) if store and multi else store,
+            executor=scheduler.lane(target.device) if scheduler else None,
+            priority=priority,
+        )
+        stacks[target.device] = (target, synchronizer, repository, factory)
+    engine = MultiRootSync(
+        {device: stack[1] for device, stack in stacks.items()}, metrics
+    )
 
-    synchronizer = Synchronizer(repo, factory, watch_dir)
+    metrics_server = (
+        PrometheusServer(metrics, int(metrics_port))
+        if metrics_port and not dry_run
+        else None
+    )
+    if metrics_server:
+        metrics_server.start()
 
     try:
-        synchronizer.sync()
+        if dry_run:
+            _dry_run(
+                {device: stack[1] for device, stack in stacks.items()}, cost, plan_file
+            )
+        elif saved_plans is not None:
+            for device in stacks.keys() - saved_plans.keys():
+                print(f"[PLAN] No plan for {device}; skipping it.")
+            if multi:
+                reports = engine.execute(saved_plans)
+            else:
+                reports = {
+                    device: stacks[device][1].execute(plan)
+                    for device, plan in saved_plans.items()
+                }
+            _print_failures(reports, multi)
+        elif watch_mode:
+            sources = []
+            watchers = {}
+            try:
+                for device, (
+                    target,
+                    synchronizer,
+                    repository,
+                    factory,
+                ) in stacks.items():
+                    source = create_event_source(
+                        target.watch_dir,
+                        factory.should_process,
+                        watch_backend,
+                        watch_poll_interval,
+                    )
+                    sources.append(source)
+                    watchers[device] = WatchSynchronizer(
+                        synchronizer,
+                        repository,
+                        factory,
+                        source,
+                        target.watch_dir,
+                        watch_debounce,
+                    )
+                if multi:
+                    engine.watch(watchers, threading.Event())
+                else:
+                    next(iter(watchers.values())).run()
+            finally:
+                for source in sources:
+                    source.close()
+        else:
+            if multi:
+                reports = engine.sync()
+            else:
+                reports = {device: stack[1].sync() for device, stack in stacks.items()}
+            _print_failures(reports, multi)
+    except KeyboardInterrupt:
+        print("Stopped.")
     except Exception as e:
         print(f"CRITICAL FAILURE: {e}")
         sys.exit(1)
+    finally:
+        if scheduler:
+            scheduler.close()
+        for repo in repos.values():
+            repo.close()
+        if metrics_server:
+            metrics_server.close()
+        for store in stores.values():
+            if store:
+                store.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,95 @@
+"""
+CRC Card:
+    Module: Opener Entry Point
+    Responsibilities:
+        - Runs the OpenerService on the desktop that holds the synced folders,
+          so the MagicLinks in Notion open the local files.
+        - Reads the roots (OPENER_WATCH_DIR / OPENER_TARGETS, falling back to
+          WATCH_DIR / SYNC_TARGETS: the sync may see the folder under another
+          path, e.g. inside Docker) and the sync state files to index.
+        - Reads OPENER_SECRET (the key the sync signs the links with) and
+          OPENER_ALLOW_EXECUTABLES.
+    Collaborators:
+        - OpenerService
+        - PathIndex
+        - SyncTarget
+
+Usage:
+    python opener.py
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from src.infrastructure.magic_link import OPENER_PORT
+from src.infrastructure.opener import (
+    CACHE_SIZE,
+    OpenerService,
+    PathIndex,
+    launch_with_os,
+)
+from src.infrastructure.targets import TargetConfigError, load_targets, state_path
+
+TRUTHY = {"1", "true", "yes", "on"}
+
+
+def main():
+    load_dotenv()
+
+    targets_file = os.getenv("OPENER_TARGETS") or os.getenv("SYNC_TARGETS")
+    watch_dir = os.getenv("OPENER_WATCH_DIR") or os.getenv("WATCH_DIR")
+    db_id = os.getenv("NOTION_DATABASE_ID")
+    state_db_path = os.getenv("STATE_DB_PATH", "sync_state.sqlite3")
+
+    if targets_file:
+        try:
+            targets = load_targets(Path(targets_file), db_id)
+        except TargetConfigError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        roots = [(t.namespace, t.watch_dir) for t in targets]
+        databases = list(dict.fromkeys(t.database_id for t in targets))
+    elif watch_dir:
+        roots = [(None, Path(watch_dir))]
+        databases = [(db_id or "").strip()]
+    else:
+        print("ERROR: Missing .env variables (WATCH_DIR or OPENER_WATCH_DIR)")
+        sys.exit(1)
+
+    # Sin archivo de estado se acepta cualquier ruta válida dentro de los roots
+    state_files = [
+        path
+        for path in (
+            state_path(state_db_path, database_id, len(databases))
+            for database_id in databases
+        )
+        if state_db_path and path.exists()
+    ]
+    for namespace, root in roots:
+        print(f"Root: {root}" + (f" ({namespace}/)" if namespace else ""))
+    if not state_files:
+        print("[WARN] No sync state found: links are checked on disk only.")
+
+    # OPENER_LAUNCH=false solo resuelve los enlaces (healthchecks, pruebas)
+    launch = os.getenv("OPENER_LAUNCH", "true").lower() in TRUTHY
+    service = OpenerService(
+        PathIndex(roots, state_files, int(os.getenv("OPENER_CACHE_SIZE", CACHE_SIZE))),
+        launcher=launch_with_os if launch else None,
+        host=os.getenv("OPENER_HOST", "127.0.0.1"),
+        port=int(os.getenv("OPENER_PORT", OPENER_PORT)),
+        # El mismo secreto que usa el sync para firmar los enlaces
+        secret=os.getenv("OPENER_SECRET"),
+        allow_executables=os.getenv("OPENER_ALLOW_EXECUTABLES", "").lower() in TRUTHY,
+    )
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+CRC Card:
+    Module: Deletions
+    Responsibilities:
+        - Groups the RelativeIDs missing locally under their top-most missing
+          ancestor, so a removed folder is reported (and guarded) as one
+          deletion instead of thousands.
+        - Orders the archives deepest-first, so an interrupted run never
+          leaves children pointing to an already archived folder.
+        - DeletionGuard: refuses a mass deletion (e.g. the volume is not
+          mounted and the scan came back empty).
+    Collaborators:
+        - Synchronizer
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Iterable
+
+from src.application.diff import parent_rel_id
+
+
+def collapse_to_roots(rel_ids: Iterable[str]) -> dict[str, list[str]]:
+    """Maps each top-most missing RelativeID to everything missing under it."""
+    missing = set(rel_ids)
+    groups: dict[str, list[str]] = defaultdict(list)
+    for rel_id in missing:
+        root = rel_id
+        ancestor = parent_rel_id(rel_id)
+        while ancestor is not None:
+            if ancestor in missing:
+                root = ancestor
+            ancestor = parent_rel_id(ancestor)
+        groups[root].append(rel_id)
+    return dict(groups)
+
+
+def archive_order(rel_ids: Iterable[str]) -> list[str]:
+    """Deepest items first: a folder is archived after its content."""
+    return sorted(rel_ids, key=lambda rel_id: rel_id.count("/"), reverse=True)
+
+
+@dataclass(frozen=True)
+class DeletionGuard:
+    # Fracción máxima del snapshot que un run puede archivar (1.0 la desactiva)
+    max_ratio: float = 0.5
+    # Por debajo de esta cantidad nunca se bloquea (bases pequeñas)
+    min_items: int = 50
+
+    def check(self, missing: int, total: int, local: int) -> str | None:
+        """Returns why the deletion must be skipped, or None if it may run."""
+        if self.max_ratio >= 1.0 or missing == 0:
+            return None
+        if local == 0:
+            return f"the scan found no local items but {missing} would be archived"
+        ratio = missing / total if total else 0.0
+        if missing >= self.min_items and ratio > self.max_ratio:
+            return (
+                f"{missing} of {total} items ({ratio:.0%}) would be archived, "
+                f"above the {self.max_ratio:.0%} limit"
+            )
+        return None
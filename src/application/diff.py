@@ -0,0 +1,103 @@
+"""
+CRC Card:
+    Module: Diff
+    Responsibilities:
+        - Compares a local FileMeta against the snapshot stored in Notion.
+        - Classifies each item as created, modified, moved or unchanged.
+    Collaborators:
+        - FileMeta
+        - RemotePage
+"""
+
+from enum import Enum
+
+from src.domain import FileMeta, RemotePage, normalize_mtime
+
+
+class ChangeKind(str, Enum):
+    CREATED = "created"
+    MODIFIED = "modified"
+    MOVED = "moved"
+    RENAMED = "renamed"  # Mismo archivo bajo otro RelativeID (ver moves.py)
+    UNCHANGED = "unchanged"
+
+
+def parent_rel_id(rel_id: str) -> str | None:
+    """Returns the RelativeID of the parent folder, or None for root items."""
+    head, sep, _ = rel_id.rpartition("/")
+    return head if sep else None
+
+
+def expected_parent_id(rel_id: str, snapshot: dict[str, RemotePage]) -> str | None:
+    """Page ID the item should be linked to, according to the snapshot."""
+    parent = parent_rel_id(rel_id)
+    if parent is None:
+        return None
+    remote = snapshot.get(parent)
+    return remote.page_id if remote else None
+
+
+def classify_change(
+    meta: FileMeta,
+    remote: RemotePage | None,
+    parent_id: str | None,
+    track_parent: bool = True,
+    link_key: str | None = None,
+) -> ChangeKind:
+    """Decides whether the item needs a write in Notion. Without
+    `track_parent` (no parent relation in the database) the parent is not
+    compared: the page could never store it. `link_key` is the key the
+    MagicLinks are signed with now; a file whose link was signed with another
+    is rewritten (None: unknown, not compared)."""
+    if remote is None:
+        return ChangeKind.CREATED
+
+    has_parent = "/" in meta.rel_id
+    if track_parent and (
+        remote.parent_id != parent_id or (has_parent and parent_id is None)
+    ):
+        # El padre cambió, o todavía no existe en Notion y hay que vincularlo.
+        return ChangeKind.MOVED
+
+    # El mtime de una carpeta cambia con cada hijo creado/borrado; los hijos ya
+    # se sincronizan por separado, así que para carpetas solo importa el padre.
+    if meta.is_directory:
+        return ChangeKind.UNCHANGED
+
+    if remote.size_bytes != meta.size_bytes:
+        return ChangeKind.MODIFIED
+    if remote.last_modified_epoch is None or normalize_mtime(
+        remote.last_modified_epoch
+    ) != normalize_mtime(meta.last_modified_epoch):
+        return ChangeKind.MODIFIED
+    # Contenido distinto con tamaño y mtime conservados (rsync -a, backups).
+    # Sin huella remota (o de otro algoritmo) se reescribe una vez para guardarla.
+    if meta.fingerprint and meta.fingerprint != remote.fingerprint:
+        return ChangeKind.MODIFIED
+    # Secreto nuevo (o quitado): el opener ya no acepta el enlace guardado.
+    # Las carpetas no tienen enlace que abrir, por eso va después de ellas.
+    if (
+        link_key is not None
+        and remote.link_key is not None
+        and remote.link_key != link_key
+    ):
+        return ChangeKind.MODIFIED
+
+    return ChangeKind.UNCHANGED
+
+
+def diff_against(
+    meta: FileMeta,
+    snapshot: dict[str, RemotePage],
+    track_parent: bool = True,
+    link_key: str | None = None,
+) -> ChangeKind:
+    """classify_change against the snapshot's page and parent for `meta`."""
+    rel_id = meta.rel_id
+    return classify_change(
+        meta,
+        snapshot.get(rel_id),
+        expected_parent_id(rel_id, snapshot),
+        track_parent,
+        link_key,
+    )
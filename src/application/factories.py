@@ -2,48 +2,101 @@
 CRC Card:
     Class: FileMetaFactory
     Responsibilities:
-        - Creates FileMeta instances from filesystem paths.
-        - Validates if a file should be processed (filtering hidden/temp files).
+        - Creates FileMeta instances from filesystem paths or os.scandir entries.
+        - Validates if a file should be processed (IgnoreRules: hidden/temp
+          files, ignore patterns, size/extension/age rules).
         - Calculates relative paths based on the root watch directory.
-    Collaborators: FileMeta
+    Collaborators: FileMeta, IgnoreRules
 """
 
+import os
+import stat
+import sys
 from pathlib import Path
 
+from src.application.ignore import IgnoreRules
 from src.domain import FileMeta
 
 
 class FileMetaFactory:
-    def __init__(self, root_path: Path, device_id: str):
+    def __init__(
+        self, root_path: Path, device_id: str, ignore: IgnoreRules | None = None
+    ):
         self._root = root_path.resolve()
-        self._device_id = device_id
+        self.ignore = ignore or IgnoreRules()
+        # Un único str compartido por todos los FileMeta
+        self._device_id = sys.intern(device_id)
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    @property
+    def device_id(self) -> str:
+        return self._device_id
 
     def should_process(self, path: Path) -> bool:
-        """Filters out hidden files and temporary files."""
-        if path.name.startswith(".") or path.name.startswith("~$"):
+        """Whether the ignore rules let `path` through (watch events)."""
+        rel_id = self._relative(path)
+        if rel_id is None:
             return False
-        return True
+        return not rel_id or not self.ignore.match_path(
+            self._root, rel_id, path.is_dir()
+        )
+
+    def _relative(self, path: Path) -> str | None:
+        """RelativeID of `path` ("" for the root), or None if outside it."""
+        for candidate in (path, path.resolve()):
+            try:
+                rel_id = candidate.relative_to(self._root).as_posix()
+            except ValueError:
+                continue
+            return "" if rel_id == "." else rel_id
+        return None
 
     def create_from_path(self, absolute_path: Path) -> FileMeta | None:
         """Creates a FileMeta object if the path is valid and within root."""
         try:
             path = absolute_path.resolve()
-            stat = path.stat()
+            st = path.stat()
 
             try:
-                rel_path = path.relative_to(self._root)
+                rel_id = path.relative_to(self._root).as_posix()
             except ValueError:
                 return None
 
-            return FileMeta(
-                absolute_path=path,
-                relative_path=rel_path,
-                filename=path.name,
-                extension=path.suffix if not path.is_dir() else "DIR",
-                size_bytes=stat.st_size,
-                last_modified_epoch=stat.st_mtime,
-                device_id=self._device_id,
-                is_directory=path.is_dir(),
-            )
+            meta = self._build(rel_id, st)
+            if self.ignore.match_path(
+                self._root, rel_id, meta.is_directory
+            ) or self.ignore.match_meta(meta):
+                return None
+            return meta
         except (FileNotFoundError, PermissionError):
             return None
+
+    def create_from_entry(self, entry: os.DirEntry, rel_id: str) -> FileMeta | None:
+        """Like create_from_path, reusing the stat data cached by os.scandir.
+
+        `rel_id` comes from the scanner, so no resolve() is needed.
+        """
+        if entry.is_symlink():
+            # Apunta fuera del root o es un alias de algo que ya se recorre
+            return None
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except (FileNotFoundError, PermissionError):
+            return None
+        return self._build(rel_id, st)
+
+    def _build(self, rel_id: str, st: os.stat_result) -> FileMeta:
+        return FileMeta(
+            rel_id=rel_id,
+            size_bytes=st.st_size,
+            last_modified_epoch=st.st_mtime,
+            device_id=self._device_id,
+            is_directory=stat.S_ISDIR(st.st_mode),
+            # En Windows, DirEntry.stat() no trae inode (st_ino == 0)
+            file_key=(st.st_dev, st.st_ino) if st.st_ino else None,
+            root=self._root,
+            status_change_epoch=st.st_ctime,
+        )
@@ -0,0 +1,132 @@
+"""
+CRC Card:
+    Class: Fingerprinter
+    Responsibilities:
+        - Optional scan stage that attaches a content fingerprint to every
+          file, so changes are caught even when the mtime was preserved
+          (rsync -a, restored backups).
+        - Reuses cached fingerprints keyed by (st_dev, st_ino, size, mtime,
+          ctime): an unchanged file is never read again, and ctime catches
+          in-place rewrites that preserve the mtime (cp -p).
+        - Hashes cache misses on a process pool as they stream in, with a
+          bounded number in flight, and saves new fingerprints in batches.
+    Collaborators:
+        - FileMeta
+        - IFingerprintCache
+        - IMetrics
+"""
+
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
+from dataclasses import replace
+from typing import Callable, Iterable, Iterator
+
+from src.domain import FileMeta, IFingerprintCache, IMetrics
+
+HashFunction = Callable[[str], str | None]
+
+# Hashes en vuelo por worker: el pool nunca se queda sin trabajo y la memoria
+# no crece con el tamaño del árbol
+IN_FLIGHT_PER_WORKER = 4
+# Huellas nuevas que se guardan de una vez: un corte pierde a lo sumo estas
+FLUSH_EVERY = 500
+
+
+class Fingerprinter:
+    def __init__(
+        self,
+        hash_file: HashFunction,
+        algorithm: str,
+        cache: IFingerprintCache | None = None,
+        workers: int = 0,
+        metrics: IMetrics | None = None,
+    ):
+        self._hash_file = hash_file
+        self._prefix = algorithm + ":"
+        self._cache = cache
+        # 0: hash en el propio proceso (árboles chicos / tests)
+        self._workers = max(0, workers)
+        self._metrics = metrics
+
+    def fingerprint_all(self, metas: Iterable[FileMeta]) -> Iterator[FileMeta]:
+        """Yields every item, files with their fingerprint when readable.
+
+        Cache hits come out immediately; hashed files follow as they finish.
+        """
+        fresh: list[FileMeta] = []
+        pool = ProcessPoolExecutor(self._workers) if self._workers else None
+        futures: dict[Future, FileMeta] = {}
+        try:
+            for meta in metas:
+                if meta.is_directory:
+                    yield meta
+                    continue
+                cached = self._cached(meta)
+                if cached:
+                    yield replace(meta, fingerprint=cached)
+                elif pool is None:
+                    yield self._hashed(
+                        meta, self._hash_file(str(meta.absolute_path)), fresh
+                    )
+                else:
+                    future = pool.submit(self._hash_file, str(meta.absolute_path))
+                    futures[future] = meta
+                    if len(futures) >= self._workers * IN_FLIGHT_PER_WORKER:
+                        # Lleno: se espera al primero que termine antes de
+                        # seguir leyendo el escaneo
+                        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield self._hashed(
+                                futures.pop(future), future.result(), fresh
+                            )
+            for future in as_completed(futures):
+                yield self._hashed(futures[future], future.result(), fresh)
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+            self._flush(fresh)
+
+    def fingerprint(self, meta: FileMeta) -> FileMeta:
+        """Single item, hashed in this process (watch mode)."""
+        if meta.is_directory:
+            return meta
+        cached = self._cached(meta)
+        if cached:
+            return replace(meta, fingerprint=cached)
+        fresh: list[FileMeta] = []
+        meta = self._hashed(meta, self._hash_file(str(meta.absolute_path)), fresh)
+        self._flush(fresh)
+        return meta
+
+    def _flush(self, fresh: list[FileMeta]):
+        if self._cache and fresh:
+            self._cache.put_fingerprints(fresh)
+        fresh.clear()
+
+    def _cached(self, meta: FileMeta) -> str | None:
+        if not self._cache or meta.file_key is None:
+            return None
+        cached = self._cache.get_fingerprint(meta)
+        # Otra librería de hash (p.ej. se desinstaló xxhash): se recalcula
+        if cached and not cached.startswith(self._prefix):
+            cached = None
+        if self._metrics:
+            self._metrics.increment(
+                "fingerprint_cache_total", result="hit" if cached else "miss"
+            )
+        return cached
+
+    def _hashed(self, meta: FileMeta, fingerprint: str | None, fresh: list[FileMeta]):
+        if fingerprint is None:
+            return meta  # Ilegible: se compara solo por tamaño y mtime
+        meta = replace(meta, fingerprint=fingerprint)
+        if meta.file_key is not None:
+            fresh.append(meta)
+            if len(fresh) >= FLUSH_EVERY:
+                self._flush(fresh)
+        return meta
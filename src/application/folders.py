@@ -0,0 +1,37 @@
+"""
+CRC Card:
+    Class: FolderPlan
+    Responsibilities:
+        - Collects the writes a run has to make (folders that need a page
+          and files), as the scan and diff produce them; the WriteQueue then
+          decides the order they are sent in.
+    Collaborators:
+        - FileMeta
+        - Synchronizer
+        - WriteQueue
+"""
+
+from collections import defaultdict
+from itertools import chain
+from typing import Iterator
+
+from src.application.diff import ChangeKind
+from src.domain import FileMeta
+
+PendingWrite = tuple[FileMeta, ChangeKind]
+
+
+class FolderPlan:
+    def __init__(self):
+        self._dirs: dict[int, list[PendingWrite]] = defaultdict(list)
+        self._files: list[PendingWrite] = []
+
+    def add(self, meta: FileMeta, change: ChangeKind):
+        if meta.is_directory:
+            self._dirs[meta.depth].append((meta, change))
+        else:
+            self._files.append((meta, change))
+
+    def pending(self) -> Iterator[PendingWrite]:
+        """Folders by depth, shallowest first, then files."""
+        return chain(*(self._dirs[depth] for depth in sorted(self._dirs)), self._files)
@@ -0,0 +1,314 @@
+"""
+CRC Card:
+    Class: IgnoreRules
+    Responsibilities:
+        - Decides which entries of a watch directory are never synced:
+          gitignore-style patterns (defaults, SYNC_IGNORE, and per-directory
+          .syncignore files, deeper files overriding shallower ones) plus
+          size / extension / age rules for files.
+        - Compiles each pattern list once into one regex per entry kind, so
+          an entry costs one match per pattern source, and caches every
+          .syncignore by mtime.
+        - Is consulted while the scanner descends: an ignored directory is
+          never listed.
+        - Counts what each rule excluded; in dry-run mode also measures the
+          pruned subtrees, to report the items and API writes each rule saves.
+    Collaborators:
+        - FileMetaFactory
+        - FileScanner
+        - FileMeta
+"""
+
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from src.domain import FileMeta
+
+IGNORE_FILE = ".syncignore"
+# El filtro histórico: ocultos (.git, .DS_Store) y temporales de Office (~$doc.docx)
+DEFAULT_PATTERNS = (".*", "~$*")
+SECONDS_PER_DAY = 86400
+
+
+@dataclass(frozen=True)
+class Rule:
+    text: str  # tal cual se escribió: "node_modules/", "size > 100 MB"
+    source: str  # "default", "SYNC_IGNORE", "config" o la ruta del .syncignore
+
+    def __str__(self) -> str:
+        return f"{self.source}: {self.text}"
+
+
+def _translate(glob: str) -> str:
+    """gitignore glob -> regex over a POSIX relative path."""
+    out, i, n = [], 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if glob.startswith("**/", i):
+            out.append("(?:.*/)?")  # cero o más directorios
+            i += 3
+            continue
+        if glob.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[" and (end := glob.find("]", i + 2)) != -1:
+            body = glob[i + 1 : end].replace("\\", "\\\\")
+            out.append("[^" + body[1:] + "]" if body[0] in "!^" else f"[{body}]")
+            i = end + 1
+            continue
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(glob[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class PatternSet:
+    """The gitignore-style lines of one source, relative to `base`."""
+
+    def __init__(self, lines: Iterable[str], source: str, base: str = ""):
+        self.base = base
+        parsed = []  # (índice, regex, anclado, negado, solo_dirs, regla)
+        for line in lines:
+            text = line.rstrip("\n").rstrip()
+            if not text or text.startswith("#"):
+                continue
+            pattern, negate = (
+                (text[1:], True) if text.startswith("!") else (text, False)
+            )
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            if not pattern:
+                continue
+            # Con "/" (salvo al final) se ancla a la carpeta del archivo de reglas;
+            # sin "/" basta con comparar el nombre, a cualquier profundidad
+            anchored = "/" in pattern
+            regex = _translate(pattern.lstrip("/"))
+            parsed.append(
+                (len(parsed), regex, anchored, negate, dir_only, Rule(text, source))
+            )
+        self._empty = not parsed
+        # (nombres, rutas) para directorios y para archivos
+        self._dirs = self._split(parsed)
+        self._files = self._split([p for p in parsed if not p[4]])
+
+    @classmethod
+    def _split(cls, parsed: list) -> tuple:
+        return (
+            cls._compile([p for p in parsed if not p[2]]),
+            cls._compile([p for p in parsed if p[2]]),
+        )
+
+    @staticmethod
+    def _compile(parsed: list) -> tuple[re.Pattern | None, list]:
+        if not parsed:
+            return None, []
+        # Orden inverso: la primera alternativa que encaja es la última regla
+        # del archivo, que en gitignore es la que decide
+        ordered = parsed[::-1]
+        regex = re.compile("|".join(f"({p[1]})" for p in ordered), re.DOTALL)
+        return regex, [
+            (index, negate, rule) for index, _, _, negate, _, rule in ordered
+        ]
+
+    def __bool__(self) -> bool:
+        return not self._empty
+
+    def match(self, rel: str, is_dir: bool) -> tuple[bool, Rule] | None:
+        """(negated, rule) of the deciding pattern, or None if none matches."""
+        (names, name_rules), (paths, path_rules) = self._dirs if is_dir else self._files
+        best = None
+        if names and (found := names.fullmatch(rel.rpartition("/")[2])):
+            best = name_rules[found.lastindex - 1]
+        if paths and (found := paths.fullmatch(rel)):
+            hit = path_rules[found.lastindex - 1]
+            if best is None or hit[0] > best[0]:
+                best = hit
+        return best[1:] if best else None
+
+
+# Reglas activas dentro de un directorio: de la más general a la más profunda
+Chain = tuple[PatternSet, ...]
+
+
+class IgnoreRules:
+    def __init__(
+        self,
+        patterns: Iterable[str] = (),
+        max_size: int | None = None,
+        extensions: Iterable[str] = (),
+        older_than_days: float | None = None,
+        defaults: Iterable[str] = DEFAULT_PATTERNS,
+        file_name: str = IGNORE_FILE,
+    ):
+        self.base: Chain = tuple(
+            p
+            for p in (PatternSet(defaults, "default"), PatternSet(patterns, "config"))
+            if p
+        )
+        self._file_name = file_name
+        self._max_size = max_size
+        self._size_rule = Rule(f"size > {(max_size or 0) / 1048576:g} MiB", "config")
+        self._extensions = frozenset(e.lower().lstrip(".") for e in extensions if e)
+        self._older_than = (
+            older_than_days * SECONDS_PER_DAY if older_than_days else None
+        )
+        self._age_rule = (
+            Rule(f"not modified in {older_than_days:g} days", "config")
+            if older_than_days
+            else None
+        )
+        self._files: dict[str, tuple[float, PatternSet]] = {}
+        self._lock = threading.Lock()
+        self.stats: Counter[Rule] = Counter()
+        # Dry run: cuenta también lo que hay dentro de cada carpeta podada
+        self.measure_subtrees = False
+        self.saved_items: Counter[Rule] = Counter()
+        self.saved_bytes: Counter[Rule] = Counter()
+
+    def __getstate__(self) -> dict:
+        # Copia para los procesos del scan por shards: el lock no viaja
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    # --- Reglas por directorio ---
+
+    def enter(
+        self, chain: Chain, directory: str, rel_dir: str, names: Iterable[str] = ()
+    ) -> Chain:
+        """Rules in effect inside `directory`: `chain` plus its .syncignore.
+
+        `names` (the listing, when the caller has it) spares a stat.
+        """
+        if names and self._file_name not in names:
+            return chain
+        patterns = self._load(os.path.join(directory, self._file_name), rel_dir)
+        return chain + (patterns,) if patterns else chain
+
+    def _load(self, path: str, rel_dir: str) -> PatternSet | None:
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._files.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        source = f"{rel_dir}/{self._file_name}" if rel_dir else self._file_name
+        try:
+            with open(path, encoding="utf-8") as f:
+                patterns = PatternSet(f.readlines(), source, rel_dir)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"[WARN] Cannot read {path}: {e}")
+            return None
+        with self._lock:
+            self._files[path] = (mtime, patterns)
+        return patterns
+
+    def match(self, chain: Chain, rel_id: str, is_dir: bool) -> Rule | None:
+        """The rule that ignores `rel_id`, or None if it is synced."""
+        for patterns in reversed(chain):
+            base = patterns.base
+            rel = rel_id[len(base) + 1 :] if base else rel_id
+            hit = patterns.match(rel, is_dir)
+            if hit:
+                negated, rule = hit
+                return None if negated else rule
+        return None
+
+    def match_meta(self, meta: FileMeta, now: float | None = None) -> Rule | None:
+        """Size / extension / age rules (files only; they need the stat data)."""
+        if meta.is_directory:
+            return None
+        if self._max_size is not None and meta.size_bytes > self._max_size:
+            return self._size_rule
+        if self._extensions:
+            extension = meta.extension.lower().lstrip(".")
+            if extension in self._extensions:
+                return Rule(f"extension .{extension}", "config")
+        if self._older_than is not None:
+            if meta.last_modified_epoch < (now or time.time()) - self._older_than:
+                return self._age_rule
+        return None
+
+    def match_path(self, root: Path, rel_id: str, is_dir: bool) -> Rule | None:
+        """Like the scanner would decide, for one path (watch events, resume)."""
+        chain = self.enter(self.base, str(root), "")
+        parts = rel_id.split("/")
+        for depth in range(1, len(parts)):
+            ancestor = "/".join(parts[:depth])
+            rule = self.match(chain, ancestor, True)
+            if rule:
+                return rule
+            chain = self.enter(chain, str(root / ancestor), ancestor)
+        return self.match(chain, rel_id, is_dir)
+
+    # --- Estadísticas ---
+
+    def record(self, rule: Rule, path: str, is_dir: bool, size: int = 0):
+        """Counts an exclusion (and, in dry-run mode, everything under it)."""
+        items, total = 1, size
+        if self.measure_subtrees and not is_dir and not size:
+            try:
+                total = os.lstat(path).st_size
+            except OSError:
+                pass
+        elif self.measure_subtrees and is_dir:
+            for current, dirs, files in os.walk(path):
+                items += len(dirs) + len(files)
+                for name in files:
+                    try:
+                        total += os.lstat(os.path.join(current, name)).st_size
+                    except OSError:
+                        pass
+        with self._lock:
+            self.stats[rule] += 1
+            self.saved_items[rule] += items
+            self.saved_bytes[rule] += total
+
+    def merge_stats(self, stats: Counter[Rule]):
+        """Adds exclusions counted elsewhere (another process's copy)."""
+        with self._lock:
+            self.stats.update(stats)
+
+    def take_stats(self) -> Counter[Rule]:
+        """Exclusions counted since the last call."""
+        with self._lock:
+            stats, self.stats = self.stats, Counter()
+            self.saved_items, self.saved_bytes = Counter(), Counter()
+        return stats
+
+    def report(self, kept: int) -> str:
+        """Dry-run table: what each rule kept out of Notion."""
+        with self._lock:
+            rows = self.saved_items.most_common()
+            saved_bytes = dict(self.saved_bytes)
+        lines = [f"{'items':>9} {'MB':>9} {'writes':>9}  rule"]
+        for rule, items in rows:
+            mb = saved_bytes.get(rule, 0) / 1e6
+            # Cada item ignorado es un pages.create menos en un sync en frío
+            # (y un update menos cada vez que cambia)
+            lines.append(f"{items:>9} {mb:>9.1f} {items:>9}  {rule}")
+        total = sum(items for _, items in rows)
+        lines.append(f"{total:>9} {'':>9} {total:>9}  total ignored")
+        lines.append(f"{kept:>9} {'':>9} {kept:>9}  synced")
+        return "\n".join(lines)
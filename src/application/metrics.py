@@ -0,0 +1,358 @@
+"""
+CRC Card:
+    Class: SyncMetrics
+    Responsibilities:
+        - Thread-safe counters, gauges and latency histograms shared by every
+          layer of a run (API calls, retries, throttling, lookups, hashing).
+        - Times the phases of each sync run.
+        - Closes each run with a summary (this run only, even when the process
+          keeps running in watch mode) and hands itself to the exporters.
+        - With several sync targets in one process, labels every series with
+          the target whose thread recorded it (`scope`) and tracks each
+          target's run separately.
+        - Renders everything in the Prometheus text exposition format.
+    Collaborators:
+        - Synchronizer
+        - NotionHttp
+        - NotionRepository
+        - Fingerprinter
+        - SyncReport
+"""
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator
+
+from src.application.report import SyncReport
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROMETHEUS_PREFIX = "notion_sync"
+
+# Descripciones para el formato de Prometheus
+METRIC_HELP = {
+    "api_requests_total": "Notion API attempts by endpoint and status.",
+    "api_request_duration_seconds": "Notion API latency by endpoint.",
+    "api_retries_total": "Retried Notion API attempts by reason.",
+    "retry_wait_seconds_total": "Time spent sleeping before retries.",
+    "throttle_wait_seconds_total": "Time spent waiting on the rate limiter.",
+    "lookups_total": "RelativeID -> page ID lookups by result.",
+    "fingerprint_cache_total": "Fingerprint cache hits and misses.",
+    "items_total": "Items processed by action.",
+    "ignored_total": "Entries skipped by ignore rules (a pruned folder counts once).",
+    "phase_duration_seconds": "Duration of each phase in the last run.",
+    "runs_total": "Completed sync runs (or watch-mode flushes).",
+    "opens_total": "MagicLink opens answered by the opener, by result.",
+    "open_duration_seconds": "Time to resolve (and launch) a MagicLink.",
+}
+
+Labels = tuple[tuple[str, str], ...]
+Exporter = Callable[["SyncMetrics"], None]
+
+# Target (root/dispositivo) al que se atribuye lo medido en este contexto
+_TARGET: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "sync_target", default=None
+)
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    target = _TARGET.get()
+    if target is not None:
+        labels = {**labels, "target": target}
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+@dataclass
+class Histogram:
+    buckets: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)  # el último es +Inf
+    total: float = 0.0
+
+    def __post_init__(self):
+        self.counts = self.counts or [0] * (len(self.buckets) + 1)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def minus(self, other: "Histogram | None") -> "Histogram":
+        if other is None:
+            return Histogram(self.buckets, list(self.counts), self.total)
+        counts = [a - b for a, b in zip(self.counts, other.counts)]
+        return Histogram(self.buckets, counts, self.total - other.total)
+
+    def plus(self, other: "Histogram") -> "Histogram":
+        counts = [a + b for a, b in zip(self.counts, other.counts)]
+        return Histogram(self.buckets, counts, self.total + other.total)
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the q-th observation (the
+        largest bound when it falls beyond every bucket)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+@dataclass
+class _Run:
+    """State of the run in progress (one per target)."""
+
+    started: float = field(default_factory=time.perf_counter)
+    phases: dict[str, float] = field(default_factory=dict)
+    # Estado al empezar el run: el resumen muestra solo lo de este run
+    counters: dict[str, dict[Labels, float]] = field(default_factory=dict)
+    histograms: dict[str, dict[Labels, Histogram]] = field(default_factory=dict)
+
+
+class SyncMetrics:
+    def __init__(
+        self,
+        exporters: Iterable[Exporter] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        self._counters: dict[str, dict[Labels, float]] = defaultdict(dict)
+        self._gauges: dict[str, dict[Labels, float]] = defaultdict(dict)
+        self._histograms: dict[str, dict[Labels, Histogram]] = defaultdict(dict)
+        self._exporters = list(exporters)
+        self._runs: dict[str | None, _Run] = {}
+        self.last_run: dict = {}
+
+    @staticmethod
+    @contextmanager
+    def scope(target: str) -> Iterator[None]:
+        """Attributes everything recorded in this context to `target`."""
+        token = _TARGET.set(target)
+        try:
+            yield
+        finally:
+            _TARGET.reset(token)
+
+    def _run(self) -> _Run:
+        # Llamar con el lock tomado
+        return self._runs.setdefault(_TARGET.get(), _Run())
+
+    # --- IMetrics ---
+
+    def increment(self, name: str, value: float = 1, **labels: str):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms[name]
+            if key not in series:
+                series[key] = Histogram(self._buckets)
+            series[key].observe(value)
+
+    def gauge(self, name: str, value: float, **labels: str):
+        with self._lock:
+            self._gauges[name][_labels(labels)] = value
+
+    # --- Fases ---
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(name, time.perf_counter() - started)
+
+    def record_phase(self, name: str, seconds: float):
+        """Adds `seconds` to the phase (phases may overlap, e.g. walk and snapshot)."""
+        with self._lock:
+            phases = self._run().phases
+            phases[name] = phases.get(name, 0.0) + seconds
+
+    def start_run(self):
+        with self._lock:
+            self._runs[_TARGET.get()] = _Run(
+                counters={
+                    name: dict(series) for name, series in self._counters.items()
+                },
+                histograms={
+                    name: {k: h.minus(None) for k, h in series.items()}
+                    for name, series in self._histograms.items()
+                },
+            )
+
+    def finish_run(self, report: SyncReport) -> dict:
+        """Closes the run: records its items and phases, prints the summary
+        and runs the exporters. Returns the run summary."""
+        with self._lock:
+            run = self._run()
+        self.record_phase("total", time.perf_counter() - run.started)
+        for action, n in report.counts.items():
+            self.increment("items_total", n, action=action)
+        self.increment("runs_total")
+        with self._lock:
+            for phase, seconds in run.phases.items():
+                self._gauges["phase_duration_seconds"][
+                    _labels({"phase": phase})
+                ] = seconds
+        self.last_run = summary = self._run_summary(run, report)
+        target = _TARGET.get()
+        prefix = f"{target}: " if target is not None else ""
+        print(f"[METRICS] {prefix}{self.describe(summary)}")
+        for exporter in self._exporters:
+            try:
+                exporter(self)
+            except Exception as e:
+                # Las métricas nunca deben tumbar un sync
+                print(f"[WARN] Metrics export failed: {e}")
+        return self.last_run
+
+    # --- Lectura ---
+
+    @staticmethod
+    def _owned(key: Labels) -> bool:
+        """Whether a series belongs to the current target's run."""
+        target = _TARGET.get()
+        return target is None or ("target", target) in key
+
+    def _delta(self, run: _Run, name: str) -> dict[Labels, float]:
+        with self._lock:
+            base = run.counters.get(name, {})
+            return {
+                key: value - base.get(key, 0)
+                for key, value in self._counters.get(name, {}).items()
+                if self._owned(key) and value - base.get(key, 0)
+            }
+
+    def _by(self, run: _Run, name: str, label: str) -> dict[str, float]:
+        totals: dict[str, float] = defaultdict(float)
+        for key, value in self._delta(run, name).items():
+            totals[dict(key).get(label, "")] += value
+        return dict(totals)
+
+    def _run_summary(self, run: _Run, report: SyncReport) -> dict:
+        with self._lock:
+            latency: dict[str, Histogram] = {}
+            base = run.histograms.get("api_request_duration_seconds", {})
+            for key, hist in self._histograms.get(
+                "api_request_duration_seconds", {}
+            ).items():
+                if not self._owned(key):
+                    continue
+                endpoint = dict(key)["endpoint"]
+                delta = hist.minus(base.get(key))
+                # Sin target en el contexto se suman los de todos los targets
+                latency[endpoint] = (
+                    latency[endpoint].plus(delta) if endpoint in latency else delta
+                )
+            phases = {name: round(s, 3) for name, s in run.phases.items()}
+        requests = self._by(run, "api_requests_total", "endpoint")
+        statuses = self._by(run, "api_requests_total", "status")
+        target = _TARGET.get()
+        return {
+            **({"target": target} if target is not None else {}),
+            "phases": phases,
+            "items": dict(sorted(report.counts.items())),
+            "api": {
+                "requests": int(sum(requests.values())),
+                "endpoints": {
+                    endpoint: {
+                        "requests": int(n),
+                        "p50_s": latency[endpoint].quantile(0.5),
+                        "p95_s": latency[endpoint].quantile(0.95),
+                    }
+                    for endpoint, n in sorted(requests.items())
+                    if endpoint in latency
+                },
+                "statuses": {k: int(v) for k, v in sorted(statuses.items())},
+                "retries": int(
+                    sum(self._by(run, "api_retries_total", "reason").values())
+                ),
+                "rate_limited": int(statuses.get("429", 0)),
+                "retry_wait_s": round(
+                    sum(self._delta(run, "retry_wait_seconds_total").values()), 3
+                ),
+                "throttle_wait_s": round(
+                    sum(self._delta(run, "throttle_wait_seconds_total").values()), 3
+                ),
+            },
+            "lookups": {
+                k: int(v) for k, v in self._by(run, "lookups_total", "result").items()
+            },
+            "fingerprint_cache": {
+                k: int(v)
+                for k, v in self._by(run, "fingerprint_cache_total", "result").items()
+            },
+        }
+
+    @staticmethod
+    def describe(run: dict) -> str:
+        """One-line human summary of a run summary."""
+        phases = " ".join(f"{k}={v:.2f}s" for k, v in run["phases"].items())
+        api = run["api"]
+        parts = [
+            phases,
+            f"api: {api['requests']} requests, {api['retries']} retries "
+            f"({api['rate_limited']} rate limited), "
+            f"throttled {api['throttle_wait_s']:.1f}s",
+        ]
+        # "query" / "miss": lo que no se resolvió localmente
+        for label, counts, miss in (
+            ("lookups", run["lookups"], "query"),
+            ("fingerprints", run["fingerprint_cache"], "miss"),
+        ):
+            if counts:
+                local = 1 - counts.get(miss, 0) / sum(counts.values())
+                parts.append(f"{label}: {local:.0%} local")
+        return " | ".join(parts)
+
+    def render_prometheus(self, prefix: str = PROMETHEUS_PREFIX) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        lines: list[str] = []
+
+        with self._lock:
+            families = [
+                *((n, s, "counter") for n, s in self._counters.items()),
+                *((n, s, "gauge") for n, s in self._gauges.items()),
+                *((n, s, "histogram") for n, s in self._histograms.items()),
+            ]
+            for name, series, kind in sorted(families, key=lambda f: f[0]):
+                full = f"{prefix}_{name}"
+                lines.append(f"# HELP {full} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {full} {kind}")
+                for labels, value in sorted(series.items()):
+                    if kind != "histogram":
+                        lines.append(f"{full}{_format_labels(labels)} {value:g}")
+                        continue
+                    cumulative = 0
+                    for bound, n in zip((*value.buckets, "+Inf"), value.counts):
+                        cumulative += n
+                        le = bound if isinstance(bound, str) else f"{bound:g}"
+                        bucket = _format_labels((*labels, ("le", le)))
+                        lines.append(f"{full}_bucket{bucket} {cumulative}")
+                    lines.append(f"{full}_sum{_format_labels(labels)} {value.total:g}")
+                    lines.append(f"{full}_count{_format_labels(labels)} {value.count}")
+        return "\n".join(lines) + "\n"
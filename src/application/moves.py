@@ -0,0 +1,150 @@
+"""
+CRC Card:
+    Module: Moves
+    Responsibilities:
+        - Pairs local items that are new to Notion with snapshot entries that
+          disappeared locally, so a rename/move updates the existing page
+          instead of creating a new one and archiving the old one.
+        - Matches by (st_dev, st_ino) from the local index first, then by a
+          content fingerprint, then by a (size, mtime) pair; both only for
+          files and only when unique on both sides. The filesystem reuses
+          the inode of a deleted item right away, so an inode match only
+          counts when the content agrees too.
+        - Infers a directory rename from where its matched children came
+          from (its inode decides once one child agrees), and expands every
+          moved directory over its whole subtree.
+    Collaborators:
+        - FileMeta
+        - RemotePage
+"""
+
+from collections import Counter, defaultdict
+from typing import Hashable, Iterable
+
+from src.application.diff import parent_rel_id
+from src.domain import FileMeta, RemotePage, normalize_mtime
+
+
+def _depth(rel_id: str) -> int:
+    return rel_id.count("/")
+
+
+def _unique(pairs: Iterable[tuple[Hashable, str]]) -> dict[Hashable, str]:
+    """Maps key -> RelativeID, dropping keys shared by several items."""
+    seen: dict[Hashable, str | None] = {}
+    for key, rel_id in pairs:
+        seen[key] = None if key in seen else rel_id
+    return {key: rel_id for key, rel_id in seen.items() if rel_id is not None}
+
+
+def _same_content(meta: FileMeta, page: RemotePage) -> bool:
+    """Whether `page` stored what `meta` holds now (a rename keeps both)."""
+    if meta.fingerprint and page.fingerprint:
+        return meta.fingerprint == page.fingerprint
+    return (
+        page.size_bytes == meta.size_bytes
+        and page.last_modified_epoch is not None
+        and normalize_mtime(page.last_modified_epoch)
+        == normalize_mtime(meta.last_modified_epoch)
+    )
+
+
+def detect_moves(
+    created: list[FileMeta], missing: dict[str, RemotePage]
+) -> dict[str, str]:
+    """Returns {new RelativeID: old RelativeID} for every detected move.
+
+    `created` are local items with no page under their RelativeID;
+    `missing` are snapshot entries with no local item.
+    """
+    local = {meta.rel_id: meta for meta in created}
+    moves: dict[str, str] = {}
+    taken: set[str] = set()
+
+    def pair(new_rel: str, old_rel: str):
+        if new_rel not in moves and old_rel not in taken:
+            moves[new_rel] = old_rel
+            taken.add(old_rel)
+
+    # 1. Identidad física: mismo (st_dev, st_ino) que cuando se subió. El
+    # inode de algo borrado se reusa enseguida: solo cuenta si además coincide
+    # el contenido (tamaño + mtime, o la huella). Las carpetas, en el paso 4
+    remote_dirs = {parent_rel_id(rel_id) for rel_id in missing}
+    by_key = _unique(
+        (page.file_key, rel_id)
+        for rel_id, page in missing.items()
+        if page.file_key is not None
+    )
+    for rel_id, meta in local.items():
+        old_rel = by_key.get(meta.file_key)
+        if old_rel and not meta.is_directory and _same_content(meta, missing[old_rel]):
+            pair(rel_id, old_rel)
+
+    # 2. Otro inode (p.ej. restaurado de un backup): misma huella de contenido
+    remote_hash = _unique(
+        (page.fingerprint, rel_id)
+        for rel_id, page in missing.items()
+        if rel_id not in taken and page.fingerprint
+    )
+    local_hash = _unique(
+        (meta.fingerprint, rel_id)
+        for rel_id, meta in local.items()
+        if rel_id not in moves and meta.fingerprint
+    )
+    for fingerprint, rel_id in local_hash.items():
+        if fingerprint in remote_hash:
+            pair(rel_id, remote_hash[fingerprint])
+
+    # 3. Sin huella (p.ej. sin state store ni hashing): tamaño + mtime únicos.
+    # Un renombre conserva ambos; las carpetas se resuelven en los pasos 4 y 5.
+    remote_fp = _unique(
+        ((page.size_bytes, normalize_mtime(page.last_modified_epoch)), rel_id)
+        for rel_id, page in missing.items()
+        if rel_id not in taken
+        and rel_id not in remote_dirs
+        and page.size_bytes is not None
+        and page.last_modified_epoch is not None
+    )
+    local_fp = _unique(
+        ((meta.size_bytes, normalize_mtime(meta.last_modified_epoch)), rel_id)
+        for rel_id, meta in local.items()
+        if rel_id not in moves and not meta.is_directory
+    )
+    for fingerprint, rel_id in local_fp.items():
+        if fingerprint in remote_fp:
+            pair(rel_id, remote_fp[fingerprint])
+
+    # 4. Carpetas: si la mayoría de sus hijos emparejados venían de la misma
+    # carpeta desaparecida, es esa carpeta renombrada (de la más profunda arriba).
+    # Su inode decide si al menos un hijo lo confirma; solo, no alcanza
+    children: dict[str, list[str]] = defaultdict(list)
+    for rel_id in local:
+        children[parent_rel_id(rel_id)].append(rel_id)
+    local_dirs = [rel_id for rel_id, meta in local.items() if meta.is_directory]
+    for rel_id in sorted(local_dirs, key=_depth, reverse=True):
+        origins = [parent_rel_id(moves[c]) for c in children[rel_id] if c in moves]
+        if not origins or rel_id in moves:
+            continue
+        votes = Counter(origins)
+        origin, count = votes.most_common(1)[0]
+        same_inode = by_key.get(local[rel_id].file_key)
+        if same_inode in remote_dirs and votes[same_inode]:
+            origin, count = same_inode, len(origins)
+        if origin in missing and count * 2 > len(origins):
+            pair(rel_id, origin)
+
+    # 5. Subárbol: lo que quedó sin pareja bajo una carpeta movida se
+    # empareja por su ruta relativa dentro de ella
+    for rel_id in sorted(local, key=_depth):
+        if rel_id in moves:
+            continue
+        ancestor = parent_rel_id(rel_id)
+        while ancestor is not None and ancestor not in moves:
+            ancestor = parent_rel_id(ancestor)
+        if ancestor is None:
+            continue
+        old_rel = moves[ancestor] + rel_id[len(ancestor) :]
+        if old_rel in missing:
+            pair(rel_id, old_rel)
+
+    return moves
@@ -0,0 +1,177 @@
+"""
+CRC Card:
+    Module: Multi Root
+    Responsibilities:
+        - FairScheduler: one pool of upload workers for every sync target in
+          the process. Each target submits through its own lane and the
+          workers take turns between the lanes with work (round-robin), so a
+          huge root cannot starve the others of workers or rate limit.
+        - MultiRootSync: runs the targets (or their saved plans) side by
+          side (each scan overlaps the others and the shared snapshot),
+          labels each target's metrics and keeps one target's failure from
+          stopping the rest.
+    Collaborators:
+        - Synchronizer
+        - WatchSynchronizer
+        - SyncMetrics
+        - SyncReport
+        - SyncPlan
+"""
+
+import contextvars
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future
+from functools import partial
+from typing import Callable
+
+from src.application.metrics import SyncMetrics
+from src.application.plan import SyncPlan
+from src.application.report import SyncReport
+from src.application.synchronizer import Synchronizer
+from src.application.watcher import WatchSynchronizer
+
+
+class FairScheduler:
+    def __init__(self, workers: int):
+        self._cond = threading.Condition()
+        self._queues: dict[str, deque] = {}
+        self._ready: deque[str] = deque()  # lanes con trabajo, en orden de turno
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"upload-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def lane(self, name: str) -> "Lane":
+        return Lane(self, name)
+
+    def submit(self, lane: str, fn: Callable, *args, **kwargs) -> Future:
+        future: Future = Future()
+        # El contexto viaja con la tarea (p.ej. el target de las métricas)
+        context = contextvars.copy_context()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("FairScheduler is closed")
+            queue = self._queues.setdefault(lane, deque())
+            queue.append((future, context, fn, args, kwargs))
+            if len(queue) == 1:
+                self._ready.append(lane)
+            self._cond.notify()
+        return future
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._closed:
+                    self._cond.wait()
+                if not self._ready:
+                    return
+                lane = self._ready.popleft()
+                queue = self._queues[lane]
+                future, context, fn, args, kwargs = queue.popleft()
+                if queue:
+                    self._ready.append(lane)  # al final de la fila
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(context.run(fn, *args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def close(self):
+        """Cancels what is still queued and waits for the running tasks."""
+        with self._cond:
+            self._closed = True
+            for queue in self._queues.values():
+                while queue:
+                    queue.popleft()[0].cancel()
+            self._ready.clear()
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+
+class Lane(Executor):
+    """A target's share of a FairScheduler, usable where an Executor is."""
+
+    def __init__(self, scheduler: FairScheduler, name: str):
+        self._scheduler = scheduler
+        self._name = name
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        return self._scheduler.submit(self._name, fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        pass  # El pool es compartido: lo cierra quien creó el FairScheduler
+
+
+class MultiRootSync:
+    def __init__(self, synchronizers: dict[str, Synchronizer], metrics: SyncMetrics):
+        self._synchronizers = synchronizers
+        self._metrics = metrics
+
+    def sync(self) -> dict[str, SyncReport]:
+        """One sync of every target, concurrently. Returns each report (a
+        target that crashed reports nothing)."""
+        reports: dict[str, SyncReport] = {}
+
+        def sync_one(name: str, synchronizer: Synchronizer):
+            reports[name] = synchronizer.sync()
+
+        self._run_all(
+            {
+                name: partial(sync_one, name, synchronizer)
+                for name, synchronizer in self._synchronizers.items()
+            }
+        )
+        return reports
+
+    def execute(self, plans: dict[str, SyncPlan]) -> dict[str, SyncReport]:
+        """Runs each target's saved plan, concurrently (like sync)."""
+        reports: dict[str, SyncReport] = {}
+
+        def execute_one(name: str, plan: SyncPlan):
+            reports[name] = self._synchronizers[name].execute(plan)
+
+        self._run_all(
+            {name: partial(execute_one, name, plan) for name, plan in plans.items()}
+        )
+        return reports
+
+    def watch(self, watchers: dict[str, WatchSynchronizer], stop: threading.Event):
+        """Watches every target until `stop` is set (or all of them fail)."""
+        self._run_all(
+            {name: partial(watcher.run, stop) for name, watcher in watchers.items()},
+            stop,
+        )
+
+    def _run_all(
+        self, jobs: dict[str, Callable[[], None]], stop: threading.Event | None = None
+    ):
+        def run(name: str):
+            with self._metrics.scope(name):
+                try:
+                    jobs[name]()
+                except Exception as e:
+                    print(f"[ERROR] Target {name} failed: {e}")
+
+        threads = [
+            threading.Thread(
+                target=run, args=(name,), name=f"target-{name}", daemon=True
+            )
+            for name in jobs
+        ]
+        for thread in threads:
+            thread.start()
+        # join con timeout: el hilo principal sigue recibiendo Ctrl+C
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            if stop:
+                stop.set()
+            raise
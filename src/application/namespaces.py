@@ -0,0 +1,151 @@
+"""
+CRC Card:
+    Module: Namespaces
+    Responsibilities:
+        - SharedSnapshot: fetches the Notion state of one database once and
+          serves it to every sync target writing into that database, each
+          target getting only its own slice.
+        - NamespacedRepository: lets several devices share one database by
+          prefixing every RelativeID with the device ("laptop/docs/a.txt").
+          Each device becomes a top-level folder page; the synchronizer and
+          the watcher keep working with plain local RelativeIDs.
+    Collaborators:
+        - INotionRepository
+        - Synchronizer
+        - WatchSynchronizer
+        - RemotePage
+"""
+
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from src.domain import (
+    FileMeta,
+    IncompleteSnapshotError,
+    INotionRepository,
+    RemotePage,
+)
+
+# Un snapshot más viejo que esto se vuelve a pedir aunque otro target no lo haya usado
+SNAPSHOT_MAX_AGE = 60.0
+
+
+class SharedSnapshot:
+    def __init__(
+        self, repository: INotionRepository, max_age: float = SNAPSHOT_MAX_AGE
+    ):
+        self.repository = repository
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._namespaces: set[str | None] = set()
+        self._pages: dict[str, RemotePage] | None = None
+        self._error: str | None = None
+        self._fetched_at = 0.0
+        # Targets que ya usaron el snapshot actual: su próximo sync pide otro
+        self._served: set[str | None] = set()
+
+    def register(self, namespace: str | None):
+        with self._lock:
+            if namespace in self._namespaces:
+                raise ValueError(f"Namespace {namespace!r} is used twice")
+            self._namespaces.add(namespace)
+
+    def get(self, namespace: str | None, full_resync: bool) -> dict[str, RemotePage]:
+        """`namespace`'s slice of the database, keyed by local RelativeID.
+
+        The first target to sync fetches; the others reuse that fetch as long
+        as it is recent and they have not synced against it already.
+        """
+        with self._lock:
+            stale = time.monotonic() - self._fetched_at > self._max_age
+            if self._pages is None or namespace in self._served or stale:
+                self._fetch(full_resync)
+            self._served.add(namespace)
+            pages, error = self._pages, self._error
+        view = self._slice(pages, namespace)
+        if error is not None:
+            raise IncompleteSnapshotError(view, error)
+        return view
+
+    def _fetch(self, full_resync: bool):
+        # Llamar con el lock tomado: los demás targets esperan este fetch
+        try:
+            self._pages = self.repository.get_all_active_files(full_resync=full_resync)
+            self._error = None
+        except IncompleteSnapshotError as e:
+            self._pages, self._error = e.partial, e.reason
+        self._fetched_at = time.monotonic()
+        self._served = set()
+
+    def _slice(
+        self, pages: dict[str, RemotePage], namespace: str | None
+    ) -> dict[str, RemotePage]:
+        if namespace is None:
+            # Sin prefijo: todo lo que no sea de otro dispositivo
+            others = self._namespaces - {None}
+            return {
+                rel: page
+                for rel, page in pages.items()
+                if rel.partition("/")[0] not in others
+            }
+        root = pages.get(namespace)
+        prefix = namespace + "/"
+        view = {}
+        for rel, page in pages.items():
+            if not rel.startswith(prefix):
+                continue
+            if root and page.parent_id == root.page_id:
+                # La carpeta del dispositivo es la raíz del árbol local
+                page = replace(page, parent_id=None)
+            view[rel[len(prefix) :]] = page
+        return view
+
+
+class NamespacedRepository(INotionRepository):
+    def __init__(self, snapshot: SharedSnapshot, namespace: str | None):
+        if namespace is not None and (not namespace or "/" in namespace):
+            raise ValueError(f"Invalid namespace {namespace!r}")
+        snapshot.register(namespace)
+        self._snapshot = snapshot
+        self._repo = snapshot.repository
+        self._namespace = namespace
+
+    def _full(self, rel_id: str) -> str:
+        return f"{self._namespace}/{rel_id}" if self._namespace else rel_id
+
+    def _meta(self, meta: FileMeta) -> FileMeta:
+        # Solo cambia la clave en Notion; el MagicLink lleva también el dispositivo
+        return (
+            replace(meta, rel_id=self._full(meta.rel_id)) if self._namespace else meta
+        )
+
+    def upsert_file(self, file_meta: FileMeta) -> None:
+        self._repo.upsert_file(self._meta(file_meta))
+
+    def mark_as_missing(self, relative_path: Path, page_id: str | None = None) -> None:
+        self._repo.mark_as_missing(Path(self._full(relative_path.as_posix())), page_id)
+
+    def move_file(self, old_relative_path: Path, new_file_meta: FileMeta) -> None:
+        self._repo.move_file(
+            Path(self._full(old_relative_path.as_posix())), self._meta(new_file_meta)
+        )
+
+    def find_page(self, rel_id: str) -> str | None:
+        return self._repo.find_page(self._full(rel_id))
+
+    def reset_budget(self) -> None:
+        # El cliente es de la base: cada target que arranca un run lo renueva
+        self._repo.reset_budget()
+
+    @property
+    def tracks_parent(self) -> bool:
+        return self._repo.tracks_parent
+
+    @property
+    def link_key(self) -> str | None:
+        return self._repo.link_key
+
+    def get_all_active_files(self, full_resync: bool = False) -> dict[str, RemotePage]:
+        return self._snapshot.get(self._namespace, full_resync)
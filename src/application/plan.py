@@ -0,0 +1,160 @@
+"""
+CRC Card:
+    Module: Plan
+    Responsibilities:
+        - SyncPlan: the operations a sync run would send to Notion, in the
+          order it sends them (the WriteQueue order: hot files and the folders
+          they need, then the backfill, then archive), with their counts and
+          an estimate of the requests and time they take under the rate limit.
+        - Converts to and from JSON, so a plan made in a dry run can be
+          reviewed and executed later (e.g. a large migration off-hours).
+        - Turns its operations into journal entries: a saved plan runs (and
+          resumes) through the same checkpoints as an interrupted run.
+        - CostModel: requests per operation, rate limit and workers.
+    Collaborators:
+        - Synchronizer
+        - JournalEntry
+"""
+
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from src.domain import JournalEntry
+
+PLAN_VERSION = 1
+OPERATION_KINDS = ("folder-create", "create", "update", "move", "archive")
+# Una escritura de Notion cada una (el índice ya está completo tras el snapshot)
+REQUESTS_PER_OPERATION = {kind: 1 for kind in OPERATION_KINDS}
+# Latencia típica de un pages.create / pages.update
+DEFAULT_LATENCY = 0.4
+
+# Operación del plan -> acción del journal
+_ACTIONS = {
+    "folder-create": "created",
+    "create": "created",
+    "update": "modified",
+    "move": "moved",
+    "archive": "archived",
+}
+
+
+class PlanError(ValueError):
+    """The plan file is unreadable, or was made for another target."""
+
+
+@dataclass(frozen=True)
+class Operation:
+    kind: str
+    rel_id: str
+    # Solo en move por renombre: RelativeID actual de la página
+    old_rel_id: str | None = None
+    page_id: str | None = None
+
+    def journal_entry(self) -> JournalEntry:
+        action = _ACTIONS[self.kind]
+        if self.kind == "move" and self.old_rel_id:
+            action = "renamed"
+        return JournalEntry(self.rel_id, action, self.old_rel_id, self.page_id)
+
+
+@dataclass(frozen=True)
+class CostModel:
+    requests_per_second: float | None = None  # None: sin rate limit
+    burst: int = 0
+    workers: int = 1
+    latency: float = DEFAULT_LATENCY
+
+    def seconds(self, requests: int) -> float:
+        """Wall time of `requests` writes: bound by the workers or by the
+        rate limit, whichever is slower (retries not included)."""
+        by_workers = requests * self.latency / max(1, self.workers)
+        if not self.requests_per_second:
+            return by_workers
+        throttled = max(0, requests - self.burst) / self.requests_per_second
+        return max(by_workers, throttled)
+
+
+@dataclass
+class SyncPlan:
+    device: str
+    root: str
+    operations: list[Operation] = field(default_factory=list)
+    unchanged: int = 0
+    # Lo que el plan decidió no hacer (p.ej. archivados frenados por el guard)
+    warnings: list[str] = field(default_factory=list)
+    created_at: str = field(
+        default_factory=lambda: datetime.now(timezone.utc).isoformat(timespec="seconds")
+    )
+
+    def counts(self) -> dict[str, int]:
+        counts = Counter(op.kind for op in self.operations)
+        return {kind: counts[kind] for kind in OPERATION_KINDS}
+
+    def requests(self) -> int:
+        return sum(REQUESTS_PER_OPERATION[op.kind] for op in self.operations)
+
+    def estimate(self, cost: CostModel) -> dict[str, float]:
+        requests = self.requests()
+        return {"requests": requests, "seconds": round(cost.seconds(requests), 1)}
+
+    def entries(self) -> list[JournalEntry]:
+        return [op.journal_entry() for op in self.operations]
+
+    def describe(self, cost: CostModel) -> str:
+        estimate = self.estimate(cost)
+        counts = ", ".join(f"{k}={n}" for k, n in self.counts().items() if n)
+        return (
+            f"{self.device}: {counts or 'nothing to do'} (unchanged={self.unchanged}) "
+            f"| ~{estimate['requests']} requests, ~{_duration(estimate['seconds'])}"
+        )
+
+    # --- JSON ---
+
+    def to_dict(self, cost: CostModel | None = None) -> dict[str, Any]:
+        data = {
+            "version": PLAN_VERSION,
+            "device": self.device,
+            "root": self.root,
+            "created_at": self.created_at,
+            "counts": self.counts(),
+            "unchanged": self.unchanged,
+            "warnings": self.warnings,
+        }
+        if cost is not None:
+            data["estimate"] = {**self.estimate(cost), "cost_model": asdict(cost)}
+        data["operations"] = [
+            {k: v for k, v in asdict(op).items() if v is not None}
+            for op in self.operations
+        ]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "SyncPlan":
+        if not isinstance(data, dict) or data.get("version") != PLAN_VERSION:
+            raise PlanError(f"Unsupported plan (version {PLAN_VERSION} expected)")
+        try:
+            operations = [Operation(**op) for op in data["operations"]]
+            plan = cls(
+                data["device"],
+                data["root"],
+                operations,
+                data.get("unchanged", 0),
+                list(data.get("warnings", [])),
+                data["created_at"],
+            )
+        except (KeyError, TypeError) as e:
+            raise PlanError(f"Malformed plan: {e}") from e
+        unknown = {op.kind for op in operations} - set(OPERATION_KINDS)
+        if unknown:
+            raise PlanError(f"Unknown operations in plan: {', '.join(sorted(unknown))}")
+        return plan
+
+
+def _duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
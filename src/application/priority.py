@@ -0,0 +1,160 @@
+"""
+CRC Card:
+    Class: WriteQueue
+    Responsibilities:
+        - Orders the planned writes of a run: files modified within the hot
+          window first, newest first, then the backfill (everything else,
+          newest first). Archives are not queued; they go after every write.
+        - Keeps parents before children: an item whose parent folder still
+          has a pending write waits for it, and the folder is pulled forward
+          with the priority of the most urgent item waiting on it, so a hot
+          file in a new folder does not wait for the whole backfill.
+        - Holds back everything under a folder whose write failed, instead
+          of letting each child try to create the folder again on its own.
+        - Once the run's time budget is spent, only hands out the hot set
+          (and the folders it needs); the rest is deferred to the next run.
+    Collaborators:
+        - FolderPlan
+        - Synchronizer
+        - PriorityPolicy
+"""
+
+import heapq
+import itertools
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Iterable
+
+from src.application.diff import ChangeKind, parent_rel_id
+from src.application.folders import PendingWrite
+from src.domain import FileMeta
+
+HOT = 0
+BACKFILL = 1
+SECONDS_PER_HOUR = 3600
+
+# (tier, -mtime, profundidad): menor = antes
+Priority = tuple[int, float, int]
+
+
+@dataclass(frozen=True)
+class PriorityPolicy:
+    # Archivos modificados en esta ventana son el "hot set"
+    hot_window: float = 24 * SECONDS_PER_HOUR
+    # Segundos por run (desde que empieza); None: sin límite
+    time_budget: float | None = None
+
+
+class WriteQueue:
+    def __init__(
+        self, writes: Iterable[PendingWrite], policy: PriorityPolicy, now: float
+    ):
+        self._policy = policy
+        self._now = now
+        self._pending: dict[str, PendingWrite] = {}
+        self._keys: dict[str, Priority] = {}
+        # Prioridad con la que cada item está hoy en el heap (las entradas
+        # viejas de un item promovido se descartan al salir)
+        self._queued: dict[str, Priority] = {}
+        self._heap: list[tuple[Priority, int, str]] = []
+        self._seq = itertools.count()
+        self._waiting: dict[str, list[str]] = defaultdict(list)  # carpeta -> hijos
+        self._in_flight: set[str] = set()
+        self._failed: set[str] = set()
+        for meta, change in writes:
+            self._pending[meta.rel_id] = (meta, change)
+            self._keys[meta.rel_id] = self._priority(meta)
+            self._push(meta.rel_id, self._keys[meta.rel_id])
+
+    def __len__(self) -> int:
+        """Writes not finished yet."""
+        return len(self._pending)
+
+    def _priority(self, meta: FileMeta) -> Priority:
+        age = self._now - meta.last_modified_epoch
+        hot = not meta.is_directory and age <= self._policy.hot_window
+        return (HOT if hot else BACKFILL, -meta.last_modified_epoch, meta.depth)
+
+    def _push(self, rel_id: str, key: Priority):
+        self._queued[rel_id] = key
+        heapq.heappush(self._heap, (key, next(self._seq), rel_id))
+
+    def _pending_parent(self, rel_id: str) -> str | None:
+        """Nearest folder above `rel_id` whose write has not finished."""
+        ancestor = parent_rel_id(rel_id)
+        while ancestor is not None:
+            if ancestor in self._pending:
+                return ancestor
+            ancestor = parent_rel_id(ancestor)
+        return None
+
+    def _failed_ancestor(self, rel_id: str) -> str | None:
+        if not self._failed:
+            return None
+        ancestor = parent_rel_id(rel_id)
+        while ancestor is not None:
+            if ancestor in self._failed:
+                return ancestor
+            ancestor = parent_rel_id(ancestor)
+        return None
+
+    def _promote(self, rel_id: str, key: Priority):
+        """Moves a folder (or, if it waits too, its pending parent) up to `key`."""
+        while rel_id is not None and rel_id not in self._in_flight:
+            # También si hoy espera a su padre: al liberarse sale con esta prioridad
+            self._keys[rel_id] = min(self._keys[rel_id], key)
+            current = self._queued.get(rel_id)
+            if current is not None:
+                if key < current:
+                    self._push(rel_id, key)
+                return
+            rel_id = self._pending_parent(rel_id)
+
+    def pop(
+        self, hot_only: bool = False
+    ) -> tuple[FileMeta, ChangeKind, str | None] | None:
+        """Next write whose parent is in place: (meta, change, failed
+        ancestor or None). None if nothing is ready (or, with `hot_only`,
+        nothing hot is)."""
+        while self._heap:
+            key, _, rel_id = self._heap[0]
+            if self._queued.get(rel_id) != key:
+                heapq.heappop(self._heap)  # entrada vieja de un item promovido
+                continue
+            if hot_only and key[0] != HOT:
+                return None
+            heapq.heappop(self._heap)
+            del self._queued[rel_id]
+            parent = self._pending_parent(rel_id)
+            if parent is not None:
+                self._waiting[parent].append(rel_id)
+                self._promote(parent, key)
+                continue
+            self._in_flight.add(rel_id)
+            meta, change = self._pending[rel_id]
+            return meta, change, self._failed_ancestor(rel_id)
+        return None
+
+    def done(self, rel_id: str, failed: bool = False):
+        """Marks a write finished; releases what was waiting on it."""
+        self._in_flight.discard(rel_id)
+        del self._pending[rel_id]
+        if failed:
+            self._failed.add(rel_id)
+        for child in self._waiting.pop(rel_id, ()):
+            self._push(child, self._keys[child])
+
+    def remaining(self) -> list[PendingWrite]:
+        """Writes never handed out (deferred)."""
+        return [
+            write for rel, write in self._pending.items() if rel not in self._in_flight
+        ]
+
+    def sequence(self) -> list[PendingWrite]:
+        """The whole queue in the order a one-worker run would send it."""
+        order = []
+        while (item := self.pop()) is not None:
+            meta, change, _ = item
+            order.append((meta, change))
+            self.done(meta.rel_id)
+        return order
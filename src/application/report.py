@@ -0,0 +1,54 @@
+"""
+CRC Card:
+    Class: SyncReport
+    Responsibilities:
+        - Collects the outcome of every item processed during a sync run.
+        - Keeps per-action counters and the list of failed items.
+        - Prints periodic progress and the final summary.
+    Collaborators:
+        - Synchronizer
+"""
+
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+
+PROGRESS_EVERY = 100
+
+
+@dataclass(frozen=True)
+class ItemResult:
+    rel_id: str
+    action: str
+    error: str | None = None
+
+
+@dataclass
+class SyncReport:
+    counts: Counter[str] = field(default_factory=Counter)
+    failures: list[ItemResult] = field(default_factory=list)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
+    _done: int = field(default=0, init=False, repr=False)
+
+    def record(self, rel_id: str, action: str, error: Exception | None = None):
+        with self._lock:
+            if error is None:
+                self.counts[action] += 1
+            else:
+                self.counts["failed"] += 1
+                self.failures.append(ItemResult(rel_id, action, str(error)))
+                print(f"[ERROR] {action} {rel_id}: {error}")
+            self._done += 1
+            if self._done % PROGRESS_EVERY == 0:
+                print(f"[SYNC] Progress: {self._done} items processed...")
+
+    def record_many(self, action: str, n: int):
+        """Counts `n` successful items at once (merged shard results)."""
+        with self._lock:
+            self.counts[action] += n
+            self._done += n
+
+    def summary(self) -> str:
+        return ", ".join(f"{action}={n}" for action, n in sorted(self.counts.items()))
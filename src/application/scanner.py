@@ -0,0 +1,163 @@
+"""
+CRC Card:
+    Class: FileScanner
+    Responsibilities:
+        - Walks the watch directory with os.scandir, reusing the DirEntry
+          stat data instead of resolving and stat-ing every path again.
+        - Applies the ignore rules at descent time (hidden/temp entries,
+          patterns, each directory's .syncignore), so an ignored directory
+          is never listed; symlinks are skipped (never followed).
+        - Optionally scans subdirectories in parallel on a thread pool.
+        - Streams FileMeta objects as they are found; a directory is always
+          yielded before its content. The walk can start in the background
+          while the caller is busy with something else.
+        - Splits the tree into subtrees that can be walked separately (the
+          sharded scan walks them in other processes).
+    Collaborators:
+        - FileMetaFactory
+        - IgnoreRules
+        - FileMeta
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterator
+
+from src.application.factories import FileMetaFactory
+from src.application.ignore import Chain
+from src.domain import FileMeta
+
+# (ruta absoluta, RelativeID, reglas heredadas) de un directorio pendiente de listar
+Subtree = tuple[str, str, Chain]
+_DONE = object()
+Stage = Callable[[Iterator[FileMeta]], Iterator[FileMeta]]
+
+
+class FileScanner:
+    def __init__(self, factory: FileMetaFactory, workers: int = 1):
+        self._factory = factory
+        self._workers = max(1, workers)
+        self._now = time.time()
+
+    def scan(self) -> Iterator[FileMeta]:
+        self._now = time.time()  # Referencia de las reglas de antigüedad
+        root: Subtree = (str(self._factory.root), "", self._factory.ignore.base)
+        if self._workers == 1:
+            return self._scan_serial(root)
+        return self._scan_parallel(root)
+
+    def split(self, count: int, max_depth: int) -> tuple[list[FileMeta], list[Subtree]]:
+        """Lists the tree level by level until at least `count` subtrees are
+        left to walk (or `max_depth` levels are listed): what it listed, and
+        those subtrees, all at the same depth."""
+        self._now = time.time()
+        listed: list[FileMeta] = []
+        frontier = [(str(self._factory.root), "", self._factory.ignore.base)]
+        for _ in range(max_depth):
+            if len(frontier) >= count:
+                break
+            below: list[Subtree] = []
+            for directory in frontier:
+                metas, subdirs = self._scan_dir(*directory)
+                listed.extend(metas)
+                below.extend(subdirs)
+            frontier = below
+        return listed, frontier
+
+    def walk(self, subtrees: list[Subtree]) -> Iterator[FileMeta]:
+        """Everything below each subtree (not the subtree folder itself)."""
+        self._now = time.time()
+        for subtree in subtrees:
+            yield from self._scan_serial(subtree)
+
+    def scan_in_background(self, stage: Stage | None = None) -> Iterator[FileMeta]:
+        """Starts the scan now on a daemon thread; iterating consumes its output.
+
+        Lets the caller wait on other I/O (the Notion snapshot) while the tree
+        is walked; whatever was found in the meantime is buffered. `stage`
+        (e.g. content hashing) runs on the same thread, over the stream.
+        """
+        found: queue.Queue = queue.Queue()
+
+        def run():
+            try:
+                metas = self.scan()
+                for meta in stage(metas) if stage else metas:
+                    found.put(meta)
+            except Exception as e:
+                found.put(e)
+            finally:
+                found.put(_DONE)
+
+        threading.Thread(target=run, name="scan", daemon=True).start()
+
+        def drain() -> Iterator[FileMeta]:
+            while (item := found.get()) is not _DONE:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+
+        return drain()
+
+    def _scan_serial(self, root: Subtree) -> Iterator[FileMeta]:
+        stack = [root]
+        while stack:
+            metas, subdirs = self._scan_dir(*stack.pop())
+            stack.extend(reversed(subdirs))
+            yield from metas
+
+    def _scan_parallel(self, root: Subtree) -> Iterator[FileMeta]:
+        done: queue.Queue[Future] = queue.Queue()
+        with ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="scan"
+        ) as pool:
+
+            def submit(directory: Subtree):
+                pool.submit(self._scan_dir, *directory).add_done_callback(done.put)
+
+            submit(root)
+            pending = 1
+            while pending:
+                metas, subdirs = done.get().result()
+                pending -= 1
+                # Primero se encolan los hijos, así los workers siguen mientras
+                # el consumidor procesa este directorio
+                for subdir in subdirs:
+                    submit(subdir)
+                pending += len(subdirs)
+                yield from metas
+
+    def _scan_dir(
+        self, directory: str, rel_dir: str, chain: Chain
+    ) -> tuple[list[FileMeta], list[Subtree]]:
+        metas: list[FileMeta] = []
+        subdirs: list[Subtree] = []
+        prefix = rel_dir + "/" if rel_dir else ""
+        ignore = self._factory.ignore
+        try:
+            with os.scandir(directory) as listing:
+                entries = list(listing)
+            chain = ignore.enter(chain, directory, rel_dir, [e.name for e in entries])
+            for entry in entries:
+                rel_id = prefix + entry.name
+                is_dir = entry.is_dir(follow_symlinks=False)
+                rule = ignore.match(chain, rel_id, is_dir)
+                if rule:
+                    ignore.record(rule, entry.path, is_dir)
+                    continue  # Poda: un directorio ignorado no se recorre
+                meta = self._factory.create_from_entry(entry, rel_id)
+                if meta is None:
+                    continue
+                rule = ignore.match_meta(meta, self._now)
+                if rule:
+                    ignore.record(rule, entry.path, False, meta.size_bytes)
+                    continue
+                metas.append(meta)
+                if meta.is_directory:
+                    subdirs.append((entry.path, rel_id, chain))
+        except OSError as e:
+            print(f"[ERROR] Scanning {directory}: {e}")
+        return metas, subdirs
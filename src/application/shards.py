@@ -0,0 +1,204 @@
+"""
+CRC Card:
+    Class: ShardedScan
+    Responsibilities:
+        - Splits the watch directory into shards: the top-level folders
+          (listed a level deeper while there are too few of them to keep
+          every process busy), grouped by a hash of their RelativeID.
+        - Scans and diffs each shard on a process pool against its own
+          slice of the Notion snapshot; this process only lists the top of
+          the tree and merges what the shards return into one result.
+        - Moves plain tuples between processes (slotted dataclasses are
+          slower to pickle than to scan) and, per shard, only the writes it
+          found and the RelativeIDs it saw.
+        - Sends nothing to Notion: the Synchronizer pushes the merged writes
+          through its one rate limiter, so each folder page is created once
+          and the request budget stays global.
+    Collaborators:
+        - FileScanner
+        - FileMetaFactory
+        - Synchronizer
+"""
+
+import time
+import zlib
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from src.application.diff import ChangeKind, diff_against
+from src.application.factories import FileMetaFactory
+from src.application.ignore import Rule
+from src.application.scanner import FileScanner, Subtree
+from src.domain import FileMeta, RemotePage
+
+# Varios shards por proceso: el pool reparte la carga de shards desparejos
+SHARDS_PER_PROCESS = 4
+# Niveles que este proceso lista como máximo buscando subárboles
+MAX_SPLIT_DEPTH = 3
+
+# FileMeta sin device_id, root ni fingerprint: (rel_id, size, mtime, is_dir,
+# file_key, ctime)
+PackedMeta = tuple
+# Campos de RemotePage, en orden
+PackedPage = tuple
+ShardOutput = tuple[list[tuple[PackedMeta, str]], list[str], Counter[Rule], float]
+
+# Factory de cada proceso del pool (lo fija _init_worker)
+_factory: FileMetaFactory | None = None
+
+
+@dataclass
+class ShardedResult:
+    writes: list[tuple[FileMeta, ChangeKind]] = field(default_factory=list)
+    local_ids: set[str] = field(default_factory=set)
+    unchanged: int = 0
+    shards: int = 0
+    # Suma de lo que tardó cada shard (la parte que se reparte entre procesos)
+    shard_seconds: float = 0.0
+
+
+class ShardedScan:
+    def __init__(self, factory: FileMetaFactory, processes: int):
+        self._factory = factory
+        self._processes = max(1, processes)
+
+    @property
+    def processes(self) -> int:
+        return self._processes
+
+    def scan(
+        self,
+        snapshot: dict[str, RemotePage],
+        track_parent: bool = True,
+        link_key: str | None = None,
+    ) -> ShardedResult:
+        """Scans and diffs the whole tree against `snapshot` (see
+        classify_change for `track_parent` and `link_key`)."""
+        top, subtrees = FileScanner(self._factory).split(
+            self._processes * SHARDS_PER_PROCESS, MAX_SPLIT_DEPTH
+        )
+        shards = _group(subtrees, self._processes * SHARDS_PER_PROCESS)
+        slices = _slice(snapshot, shards)
+        result = ShardedResult(shards=len(shards))
+        for meta in top:
+            _merge(result, meta, diff_against(meta, snapshot, track_parent, link_key))
+        if not shards:
+            return result
+
+        with ProcessPoolExecutor(
+            min(self._processes, len(shards)),
+            initializer=_init_worker,
+            initargs=(self._factory,),
+        ) as pool:
+            futures = [
+                pool.submit(_scan_shard, shard, pages, track_parent, link_key)
+                for shard, pages in zip(shards, slices)
+            ]
+            for future in as_completed(futures):
+                writes, seen, ignored, seconds = future.result()
+                self._factory.ignore.merge_stats(ignored)
+                for packed, change in writes:
+                    result.writes.append((self._unpack(packed), ChangeKind(change)))
+                result.local_ids.update(seen)
+                result.unchanged += len(seen) - len(writes)
+                result.shard_seconds += seconds
+        return result
+
+    def _unpack(self, packed: PackedMeta) -> FileMeta:
+        rel_id, size, mtime, is_dir, file_key, ctime = packed
+        return FileMeta(
+            rel_id,
+            size,
+            mtime,
+            self._factory.device_id,
+            is_dir,
+            file_key,
+            self._factory.root,
+            status_change_epoch=ctime,
+        )
+
+
+def _merge(result: ShardedResult, meta: FileMeta, change: ChangeKind):
+    result.local_ids.add(meta.rel_id)
+    if change is ChangeKind.UNCHANGED:
+        result.unchanged += 1
+    else:
+        result.writes.append((meta, change))
+
+
+def _group(subtrees: list[Subtree], count: int) -> list[list[Subtree]]:
+    """Subtrees by a stable hash of their RelativeID, at most `count` groups."""
+    groups: dict[int, list[Subtree]] = defaultdict(list)
+    for subtree in subtrees:
+        groups[zlib.crc32(subtree[1].encode()) % count].append(subtree)
+    return [groups[key] for key in sorted(groups)]
+
+
+def _slice(
+    snapshot: dict[str, RemotePage], shards: list[list[Subtree]]
+) -> list[dict[str, PackedPage]]:
+    """Each shard's part of the snapshot: its subtree folders (the parents
+    of their content) and everything below them."""
+    slices: list[dict[str, PackedPage]] = [{} for _ in shards]
+    owner = {subtree[1]: i for i, shard in enumerate(shards) for subtree in shard}
+    if not owner:
+        return slices
+    # split() deja todos los subárboles a la misma profundidad
+    depth = next(iter(owner)).count("/") + 1
+    for rel_id, page in snapshot.items():
+        parts = rel_id.split("/", depth)
+        if len(parts) < depth:
+            continue
+        shard = owner.get("/".join(parts[:depth]))
+        if shard is not None:
+            slices[shard][rel_id] = (
+                page.page_id,
+                page.size_bytes,
+                page.last_modified_epoch,
+                page.parent_id,
+                page.file_key,
+                page.fingerprint,
+                page.link_key,
+            )
+    return slices
+
+
+# --- Lado del proceso del pool ---
+
+
+def _init_worker(factory: FileMetaFactory):
+    global _factory
+    _factory = factory
+    # Con fork llegan también los contadores del padre
+    factory.ignore.take_stats()
+
+
+def _scan_shard(
+    subtrees: list[Subtree],
+    pages: dict[str, PackedPage],
+    track_parent: bool,
+    link_key: str | None,
+) -> ShardOutput:
+    started = time.perf_counter()
+    snapshot = {rel_id: RemotePage(*page) for rel_id, page in pages.items()}
+    writes: list[tuple[PackedMeta, str]] = []
+    seen: list[str] = []
+    for meta in FileScanner(_factory).walk(subtrees):
+        seen.append(meta.rel_id)
+        change = diff_against(meta, snapshot, track_parent, link_key)
+        if change is not ChangeKind.UNCHANGED:
+            writes.append(
+                (
+                    (
+                        meta.rel_id,
+                        meta.size_bytes,
+                        meta.last_modified_epoch,
+                        meta.is_directory,
+                        meta.file_key,
+                        meta.status_change_epoch,
+                    ),
+                    change.value,
+                )
+            )
+    return writes, seen, _factory.ignore.take_stats(), time.perf_counter() - started
@@ -1,62 +1,536 @@
-import os
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import nullcontext
+from functools import partial
 from pathlib import Path
+from typing import Callable
 
+from src.application.deletions import DeletionGuard, archive_order, collapse_to_roots
+from src.application.diff import ChangeKind, diff_against, expected_parent_id
 from src.application.factories import FileMetaFactory
-from src.domain import INotionRepository
+from src.application.fingerprints import Fingerprinter
+from src.application.folders import FolderPlan
+from src.application.metrics import SyncMetrics
+from src.application.moves import detect_moves
+from src.application.plan import Operation, PlanError, SyncPlan
+from src.application.priority import PriorityPolicy, WriteQueue
+from src.application.scanner import FileScanner
+from src.application.shards import ShardedScan
+from src.application.report import SyncReport
+from src.domain import (
+    FileMeta,
+    IncompleteSnapshotError,
+    INotionRepository,
+    ISyncJournal,
+    JournalEntry,
+    RemotePage,
+)
 
 
 class Synchronizer:
     def __init__(
-        self, repository: INotionRepository, factory: FileMetaFactory, watch_dir: Path
+        self,
+        repository: INotionRepository,
+        factory: FileMetaFactory,
+        watch_dir: Path,
+        full_resync: bool = False,
+        workers: int = 1,
+        scan_workers: int = 1,
+        deletion_guard: DeletionGuard | None = None,
+        fingerprinter: Fingerprinter | None = None,
+        metrics: SyncMetrics | None = None,
+        journal: ISyncJournal | None = None,
+        executor: Executor | None = None,
+        priority: PriorityPolicy | None = None,
+        shard_processes: int = 0,
     ):
         self._repo = repository
         self._factory = factory
         self._watch_dir = watch_dir
+        self._full_resync = full_resync
+        self._workers = max(1, workers)
+        self._scanner = FileScanner(factory, scan_workers)
+        # Árboles enormes: scan y diff repartidos en procesos (ver shards.py)
+        self._shards = (
+            ShardedScan(factory, shard_processes) if shard_processes > 1 else None
+        )
+        self._deletion_guard = deletion_guard or DeletionGuard()
+        self.fingerprinter = fingerprinter
+        self.metrics = metrics or SyncMetrics()
+        self._journal = journal
+        # Pool compartido con otros roots (FairScheduler); si no, uno propio por run
+        self._executor = executor
+        self._priority = priority or PriorityPolicy()
+        self._run_started = time.perf_counter()
+        self._now = time.time()
+        self._snapshot: dict[str, RemotePage] = {}
+        self._renames: dict[str, str] = {}  # RelativeID nuevo -> anterior
+        self._warnings: list[str] = []
+        self.report = SyncReport()
+        # RelativeIDs vistos localmente en el último sync (lo usa el modo watch)
+        self.local_ids: set[str] = set()
+        # True si el último sync solo retomó un run cortado (sin recorrer el árbol)
+        self.resumed = False
 
-    def sync(self):
+    def sync(self) -> SyncReport:
         print("--- STARTING SYNC ---")
+        self._start_run()
 
-        # 1. Get Notion State (and prime cache)
-        notion_files = self._repo.get_all_active_files()
-        print(f"[SYNC] Found {len(notion_files)} items in Notion.")
+        pending = self._journal.pending_run() if self._journal else []
+        self.resumed = bool(pending)
+        if pending:
+            return self._resume(pending)
+
+        folders, missing = self._scan_and_diff()
+        operations = self._operations(folders, missing)
+        if self._journal and operations:
+            self._journal.begin_run([op.journal_entry() for op in operations])
+        self._push(folders, missing)
+        return self._finish()
+
+    def plan(self) -> SyncPlan:
+        """Dry run: what sync() would send to Notion, without sending it."""
+        print("--- PLANNING SYNC ---")
+        self._start_run()
+        folders, missing = self._scan_and_diff()
+        plan = SyncPlan(
+            self._factory.device_id,
+            str(self._watch_dir),
+            self._operations(folders, missing),
+            self.report.counts[ChangeKind.UNCHANGED.value],
+            list(self._warnings),
+        )
+        print(f"[PLAN] {plan.counts()}")
+        return plan
+
+    def execute(self, plan: SyncPlan) -> SyncReport:
+        """Runs a saved plan. Each operation is re-checked against the disk
+        and a fresh snapshot first, so a stale plan never undoes newer
+        changes; what changed since then is left to the next sync."""
+        if plan.device != self._factory.device_id or Path(plan.root) != Path(
+            self._watch_dir
+        ):
+            raise PlanError(
+                f"Plan made for {plan.device} at {plan.root}, "
+                f"not {self._factory.device_id} at {self._watch_dir}"
+            )
+        print(f"--- EXECUTING PLAN ({plan.created_at}) ---")
+        self._start_run()
+        pending = self._journal.pending_run() if self._journal else []
+        self.resumed = bool(pending)
+        if pending:
+            # El journal solo guarda un run: primero se termina el cortado
+            print("[WARN] An interrupted run is pending; finishing it instead.")
+            return self._resume(pending)
+        entries = plan.entries()
+        if self._journal and entries:
+            self._journal.begin_run(entries)
+        return self._replay(entries, "[PLAN]")
+
+    def _start_run(self):
+        self.report = SyncReport()
+        self._warnings = []
+        # El time budget corre desde el inicio del run (scan incluido)
+        self._run_started = time.perf_counter()
+        self._now = time.time()
+        self._repo.reset_budget()
+        self.metrics.start_run()
 
-        # 2. Scan Local Files
-        local_files_processed = set()
-
-        # Walk directory
-        for root, dirs, files in os.walk(self._watch_dir):
-            # Process directories
-            for d in dirs:
-                dir_path = Path(root) / d
-                if self._factory.should_process(dir_path):
-                    rel_id = self._process_item(dir_path)
-                    if rel_id:
-                        local_files_processed.add(rel_id)
-
-            # Process files
-            for f in files:
-                file_path = Path(root) / f
-                if self._factory.should_process(file_path):
-                    rel_id = self._process_item(file_path)
-                    if rel_id:
-                        local_files_processed.add(rel_id)
+    def _scan_and_diff(self) -> tuple[FolderPlan, dict[str, RemotePage]]:
+        """Scans, fetches the snapshot and diffs them: the writes to make
+        (nothing is sent yet) and the pages to archive."""
+        # Con hashing, el fingerprinting ya corre en su propio pool de procesos
+        if self._shards and not self.fingerprinter:
+            plan, notion_files, allow_deletions = self._diff_sharded()
+        else:
+            plan, notion_files, allow_deletions = self._diff_streaming()
+        self._report_ignored()
 
         # 3. Detect Deletions (Items in Notion but not in Local)
         print("[SYNC] Checking for deleted files...")
-        for rel_path in notion_files.keys():
-            if rel_path not in local_files_processed:
-                print(f"[SYNC] Item missing locally: {rel_path}")
-                self._repo.mark_as_missing(Path(rel_path))
+        with self.metrics.phase("plan"):
+            missing = self._plan_deletions(
+                plan, notion_files, self.local_ids, allow_deletions
+            )
+        return plan, missing
+
+    def _diff_streaming(self) -> tuple[FolderPlan, dict[str, RemotePage], bool]:
+        metrics = self.metrics
+        # El scan local avanza mientras se pagina el snapshot de Notion:
+        # las fases "walk" y "snapshot" se solapan
+        walk_started = time.perf_counter()
+        scanned = self._scanner.scan_in_background(
+            self.fingerprinter.fingerprint_all if self.fingerprinter else None
+        )
+
+        # 1. Get Notion State (and prime cache)
+        notion_files, allow_deletions = self._fetch_snapshot()
+
+        # 2. Scan Local Files (only collect pending writes, nothing is sent yet)
+        local_files_processed: set[str] = set()
+        plan = FolderPlan()
+
+        # Los FileMeta llegan en streaming mientras el scanner sigue recorriendo
+        classify_time = 0.0
+        for meta in scanned:
+            started = time.perf_counter()
+            change = self._classify(meta)
+            local_files_processed.add(meta.rel_id)
+            if change is ChangeKind.UNCHANGED:
+                self.report.record(meta.rel_id, change.value)
+            else:
+                plan.add(meta, change)
+            classify_time += time.perf_counter() - started
+        metrics.record_phase("walk", time.perf_counter() - walk_started)
+        metrics.record_phase("classify", classify_time)
+        self.local_ids = local_files_processed
+        return plan, notion_files, allow_deletions
 
+    def _diff_sharded(self) -> tuple[FolderPlan, dict[str, RemotePage], bool]:
+        """Scan and diff split across processes. The shards diff as they
+        walk, so the snapshot comes first instead of overlapping the walk."""
+        notion_files, allow_deletions = self._fetch_snapshot()
+        started = time.perf_counter()
+        result = self._shards.scan(
+            notion_files, self._repo.tracks_parent, self._repo.link_key
+        )
+        # "walk" incluye el diff: ocurren juntos dentro de cada shard
+        self.metrics.record_phase("walk", time.perf_counter() - started)
+        if result.shards:
+            print(
+                f"[SYNC] Scanned {len(result.local_ids)} items in {result.shards} "
+                f"shards on {min(result.shards, self._shards.processes)} processes "
+                f"({result.shard_seconds:.1f}s of shard work)."
+            )
+        else:
+            print(
+                f"[SYNC] Scanned {len(result.local_ids)} items "
+                "(too few folders to shard)."
+            )
+        with self.metrics.phase("classify"):
+            plan = FolderPlan()
+            for meta, change in result.writes:
+                plan.add(meta, change)
+            self.report.record_many(ChangeKind.UNCHANGED.value, result.unchanged)
+        self.local_ids = result.local_ids
+        return plan, notion_files, allow_deletions
+
+    def _report_ignored(self):
+        ignored = self._factory.ignore.take_stats()
+        if not ignored:
+            return
+        for rule, n in ignored.items():
+            self.metrics.increment("ignored_total", n, rule=str(rule))
+        top = ", ".join(f"{rule} ({n})" for rule, n in ignored.most_common(3))
+        print(f"[SYNC] Ignored {sum(ignored.values())} entries: {top}")
+
+    def _fetch_snapshot(self) -> tuple[dict[str, RemotePage], bool]:
+        """Notion state, and whether it is complete enough to archive from."""
+        with self.metrics.phase("snapshot"):
+            try:
+                notion_files = self._repo.get_all_active_files(
+                    full_resync=self._full_resync
+                )
+                allow_deletions = True
+            except IncompleteSnapshotError as e:
+                # Un snapshot parcial sirve para crear/actualizar, nunca para archivar
+                print(f"[WARN] {e}. Deletion phase will be skipped.")
+                notion_files = e.partial
+                allow_deletions = False
+        self._snapshot = notion_files
+        print(f"[SYNC] Found {len(notion_files)} items in Notion.")
+        return notion_files, allow_deletions
+
+    def _push(self, plan: FolderPlan, missing: dict[str, RemotePage]):
+        # 4. Push changes: hot set first, each folder before its content
+        queue = WriteQueue(plan.pending(), self._priority, self._now)
+        pool_context = (
+            nullcontext(self._executor)
+            if self._executor
+            else ThreadPoolExecutor(max_workers=self._workers)
+        )
+        with pool_context as pool:
+            with self.metrics.phase("write"):
+                self._run_writes(pool, queue)
+            with self.metrics.phase("archive"):
+                archived = self._archive(pool, missing)
+        deferred = [meta.rel_id for meta, _ in queue.remaining()]
+        deferred += [rel for rel in missing if rel not in archived]
+        if deferred:
+            # _finish cierra el journal igual: el run terminó, solo se cortó
+            # antes. Lo diferido sigue distinto de Notion y el scan del
+            # próximo run lo vuelve a detectar (con los cambios nuevos)
+            print(
+                f"[SYNC] Time budget spent: {len(deferred)} operations "
+                "deferred to the next run."
+            )
+            for rel_id in deferred:
+                self.report.record(rel_id, "deferred")
+
+    def _over_budget(self) -> bool:
+        budget = self._priority.time_budget
+        return budget is not None and time.perf_counter() - self._run_started >= budget
+
+    def _finish(self) -> SyncReport:
+        # Solo un run que llegó al final cierra el journal
+        if self._journal:
+            self._journal.finish_run()
+        print(f"[SYNC] Summary: {self.report.summary()}")
+        self.metrics.finish_run(self.report)
         print("--- SYNC COMPLETE ---")
+        return self.report
+
+    # --- Checkpoints ---
+
+    def _operations(
+        self, folders: FolderPlan, missing: dict[str, RemotePage]
+    ) -> list[Operation]:
+        """The planned writes and archives, in the order a one-worker _push
+        sends them."""
+        operations = []
+        for meta, change in WriteQueue(
+            folders.pending(), self._priority, self._now
+        ).sequence():
+            old_rel = self._renames.get(meta.rel_id)
+            page = self._snapshot.get(old_rel or meta.rel_id)
+            if old_rel or change is ChangeKind.MOVED:
+                kind = "move"
+            elif change is ChangeKind.CREATED:
+                kind = "folder-create" if meta.is_directory else "create"
+            else:
+                kind = "update"
+            operations.append(
+                Operation(kind, meta.rel_id, old_rel, page.page_id if page else None)
+            )
+        operations.extend(
+            Operation("archive", rel, page_id=missing[rel].page_id)
+            for rel in archive_order(missing)
+        )
+        return operations
 
-    def _process_item(self, path: Path) -> str | None:
+    def _checkpointed(self, rel_id: str, action: Callable[[], None]):
+        """Runs one planned operation, checkpointing it before and after."""
+        if not self._journal:
+            action()
+            return
+        self._journal.mark(rel_id, "in_flight")
         try:
-            meta = self._factory.create_from_path(path)
-            if not meta:
-                return None
-            self._repo.upsert_file(meta)
-            return meta.relative_path.as_posix()
-        except Exception as e:
-            print(f"[ERROR] Processing {path}: {e}")
+            action()
+        except Exception:
+            self._journal.mark(rel_id, "failed")
+            raise
+        self._journal.mark(rel_id, "done")
+
+    def _resume(self, pending: list[JournalEntry]) -> SyncReport:
+        """Finishes an interrupted run: only its outstanding operations, each
+        re-checked against the filesystem, without walking the whole tree."""
+        print(
+            f"[RESUME] Previous run was interrupted; "
+            f"{len(pending)} operations outstanding."
+        )
+        return self._replay(pending, "[RESUME]")
+
+    def _replay(self, pending: list[JournalEntry], tag: str) -> SyncReport:
+        """Runs journaled operations, re-checking each one first."""
+        notion_files, allow_deletions = self._fetch_snapshot()
+
+        # Un create "in_flight" pudo llegar a Notion sin que se guardara su ID:
+        # se busca antes de reintentarlo (el retry pasa a ser un update)
+        with self.metrics.phase("reconcile"):
+            for entry in pending:
+                if (
+                    entry.action != ChangeKind.CREATED.value
+                    or entry.state == "planned"
+                    or entry.rel_id in notion_files
+                ):
+                    continue
+                page_id = self._repo.find_page(entry.rel_id)
+                if page_id is None:
+                    continue
+                print(f"{tag} {entry.rel_id} had been created already.")
+                if notion_files is self._snapshot:
+                    # El snapshot puede ser el mismo dict que ven otros targets
+                    notion_files = dict(notion_files)
+                # Sin tamaño ni mtime: se clasifica como modificado y el retry
+                # reescribe esa página en vez de contarla como creada
+                notion_files[entry.rel_id] = RemotePage(
+                    page_id, parent_id=expected_parent_id(entry.rel_id, notion_files)
+                )
+            self._snapshot = notion_files
+
+        plan = FolderPlan()
+        missing: dict[str, RemotePage] = {}
+        self._renames = {
+            e.rel_id: e.old_rel_id
+            for e in pending
+            if e.action == ChangeKind.RENAMED.value and e.old_rel_id
+        }
+        with self.metrics.phase("classify"):
+            for entry in pending:
+                path = self._watch_dir / entry.rel_id
+                if entry.action == "archived":
+                    page = notion_files.get(entry.rel_id)
+                    if allow_deletions and page and not path.exists():
+                        missing[entry.rel_id] = page
+                    else:
+                        # Ya archivada (el store la olvidó) o volvió a aparecer
+                        self._mark_done(entry.rel_id)
+                    continue
+                meta = self._factory.create_from_path(path)
+                if meta is not None and self.fingerprinter:
+                    meta = self.fingerprinter.fingerprint(meta)
+                change = self._classify(meta) if meta else ChangeKind.UNCHANGED
+                if change is ChangeKind.UNCHANGED:
+                    # Ya aplicado, o borrado desde entonces (lo archiva el próximo run)
+                    self._mark_done(entry.rel_id)
+                    if meta:
+                        self.report.record(entry.rel_id, change.value)
+                else:
+                    plan.add(meta, change)
+
+        self.local_ids = set()
+        self._push(plan, missing)
+        print(f"{tag} Done; the next run scans for changes made in the meantime.")
+        return self._finish()
+
+    def _mark_done(self, rel_id: str):
+        if self._journal:
+            self._journal.mark(rel_id, "done")
+
+    def _plan_deletions(
+        self,
+        plan: FolderPlan,
+        notion_files: dict[str, RemotePage],
+        local_ids: set[str],
+        allow_deletions: bool,
+    ) -> dict[str, RemotePage]:
+        """Pages to archive, once renames are matched and the guard agrees."""
+        missing = {
+            rel: page for rel, page in notion_files.items() if rel not in local_ids
+        }
+
+        # Lo "nuevo" que en realidad es algo desaparecido con otro nombre se mueve
+        created = [
+            meta for meta, change in plan.pending() if change is ChangeKind.CREATED
+        ]
+        self._renames = detect_moves(created, missing)
+        if self._renames:
+            print(f"[SYNC] Detected {len(self._renames)} renamed/moved items.")
+            for old_rel in self._renames.values():
+                del missing[old_rel]
+
+        if not allow_deletions:
+            self._warn("Notion snapshot incomplete: not archiving anything.")
+            return {}
+        blocked = self._deletion_guard.check(
+            len(missing), len(notion_files), len(local_ids)
+        )
+        if blocked:
+            self._warn(
+                f"Not archiving anything: {blocked}. "
+                "Check that the watch directory is mounted."
+            )
+            return {}
+        return missing
+
+    def _warn(self, message: str):
+        self._warnings.append(message)
+        print(f"[WARN] {message}")
+
+    def _classify(self, meta: FileMeta) -> ChangeKind:
+        return diff_against(
+            meta, self._snapshot, self._repo.tracks_parent, self._repo.link_key
+        )
+
+    def _run_writes(self, pool: Executor, queue: WriteQueue):
+        def take() -> tuple | None:
+            # Pasado el time budget solo sale el hot set (y sus carpetas)
+            while (item := queue.pop(hot_only=self._over_budget())) is not None:
+                meta, change, blocker = item
+                label = (
+                    ChangeKind.RENAMED.value
+                    if meta.rel_id in self._renames
+                    else change.value
+                )
+                if not blocker:
+                    return meta, meta.rel_id, label
+                # Sin la carpeta padre, cada hijo volvería a intentar crearla
+                error = RuntimeError(f"Parent folder {blocker} failed to sync")
+                self.report.record(meta.rel_id, label, error)
+                queue.done(meta.rel_id, failed=True)
             return None
+
+        self._run_window(pool, take, self._write, queue.done)
+
+    def _write(self, meta: FileMeta):
+        old_rel = self._renames.get(meta.rel_id)
+        if old_rel:
+            action = partial(self._repo.move_file, Path(old_rel), meta)
+        else:
+            action = partial(self._repo.upsert_file, meta)
+        self._checkpointed(meta.rel_id, action)
+
+    def _archive(self, pool: Executor, missing: dict[str, RemotePage]) -> set[str]:
+        """Deletion stage: every page is archived with the ID from the snapshot.
+
+        Archiving a folder page does not archive its sub-items in Notion, so
+        the collapse only groups the log; each descendant is still archived.
+        Returns the RelativeIDs sent (the rest waits for a run with budget).
+        """
+        for root, items in sorted(collapse_to_roots(missing).items()):
+            if len(items) > 1:
+                print(f"[SYNC] Archiving folder {root} ({len(items)} items)")
+        order = iter(archive_order(missing))
+        sent: set[str] = set()
+
+        def take() -> tuple | None:
+            if self._over_budget():
+                return None
+            rel = next(order, None)
+            if rel is None:
+                return None
+            sent.add(rel)
+            return rel, rel, "archived"
+
+        self._run_window(
+            pool,
+            take,
+            lambda rel: self._checkpointed(
+                rel,
+                partial(self._repo.mark_as_missing, Path(rel), missing[rel].page_id),
+            ),
+        )
+        return sent
+
+    def _run_window(
+        self,
+        pool: Executor,
+        take: Callable[[], tuple | None],
+        action: Callable,
+        settle: Callable[[str, bool], None] | None = None,
+    ):
+        """Runs `action` on what `take` hands out as (item, rel_id, label),
+        keeping a few operations per worker in flight, and records each
+        outcome. Stops when `take` has nothing and nothing is running; each
+        finished operation is passed to `settle(rel_id, failed)`."""
+        window = 2 * self._workers
+        running: dict[Future, tuple[str, str]] = {}
+        while True:
+            while len(running) < window and (next_item := take()) is not None:
+                item, rel_id, label = next_item
+                running[pool.submit(action, item)] = (rel_id, label)
+            if not running:
+                return
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                rel_id, label = running.pop(future)
+                error = future.exception()
+                self.report.record(rel_id, label, error)
+                if settle:
+                    settle(rel_id, error is not None)
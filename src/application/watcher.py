@@ -0,0 +1,220 @@
+"""
+CRC Card:
+    Module: Watcher
+    Responsibilities:
+        - EventCoalescer: folds bursts of filesystem events into the minimal
+          set of moves, upserts and deletions per path (create+modify = one
+          upsert, create+delete = nothing, A->B->C = one move A->C).
+        - WatchSynchronizer: runs an initial full sync, then debounces events
+          from an IFsEventSource and pushes only the affected items, routing
+          moves (including whole directories) through move_file.
+    Collaborators:
+        - Synchronizer
+        - INotionRepository
+        - FileMetaFactory
+        - IFsEventSource
+        - SyncReport
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from src.application.factories import FileMetaFactory
+from src.application.report import SyncReport
+from src.application.synchronizer import Synchronizer
+from src.domain import FileMeta, FsEvent, IFsEventSource, INotionRepository
+
+
+def _depth(path: Path) -> int:
+    return len(path.parts)
+
+
+def _rebase(path: Path, src: Path, dst: Path) -> Path:
+    return dst / path.relative_to(src) if src in path.parents else path
+
+
+@dataclass
+class PendingChanges:
+    moves: dict[Path, Path] = field(default_factory=dict)  # destino -> origen
+    upserts: set[Path] = field(default_factory=set)
+    deletes: set[Path] = field(default_factory=set)
+    rescan: bool = False
+
+    def __bool__(self) -> bool:
+        return bool(self.moves or self.upserts or self.deletes or self.rescan)
+
+
+class EventCoalescer:
+    def __init__(self):
+        self._pending = PendingChanges()
+
+    def add(self, event: FsEvent):
+        pending = self._pending
+        path = event.path
+        if event.kind == "rescan":
+            pending.rescan = True
+        elif event.kind in ("created", "modified"):
+            pending.deletes.discard(path)
+            if path not in pending.moves:
+                pending.upserts.add(path)
+        elif event.kind == "deleted":
+            pending.upserts.discard(path)
+            # Movido y luego borrado: lo que hay que archivar es el origen
+            pending.deletes.add(pending.moves.pop(path, path))
+        elif event.kind == "moved" and event.dest_path is not None:
+            self._add_move(path, event.dest_path)
+
+    def _add_move(self, src: Path, dst: Path):
+        pending = self._pending
+        origin = pending.moves.pop(src, src)
+        was_new = src in pending.upserts and origin == src
+        pending.upserts.discard(src)
+        pending.deletes.discard(dst)
+
+        # Lo pendiente dentro de una carpeta movida viaja con ella
+        pending.upserts = {_rebase(p, src, dst) for p in pending.upserts}
+        pending.moves = {_rebase(d, src, dst): o for d, o in pending.moves.items()}
+
+        if was_new:
+            pending.upserts.add(dst)
+        elif origin != dst:
+            pending.moves[dst] = origin
+
+    def drain(self) -> PendingChanges:
+        pending, self._pending = self._pending, PendingChanges()
+        return pending
+
+
+class WatchSynchronizer:
+    def __init__(
+        self,
+        synchronizer: Synchronizer,
+        repository: INotionRepository,
+        factory: FileMetaFactory,
+        source: IFsEventSource,
+        watch_dir: Path,
+        debounce: float = 2.0,
+        max_latency: float = 10.0,
+    ):
+        self._sync = synchronizer
+        self._repo = repository
+        self._factory = factory
+        self._source = source
+        self._root = watch_dir
+        self._debounce = debounce
+        self._max_latency = max_latency
+        self._known: set[str] = set()
+
+    def run(self, stop: threading.Event | None = None):
+        stop = stop or threading.Event()
+        self._full_sync()
+        print("[WATCH] Watching for changes...")
+
+        coalescer = EventCoalescer()
+        first_event = last_event = None
+        while not stop.is_set():
+            events = self._source.read_events(timeout=min(self._debounce, 1.0))
+            now = time.monotonic()
+            for event in events:
+                coalescer.add(event)
+            if events:
+                last_event = now
+                first_event = first_event or now
+            if first_event is None:
+                continue
+            quiet = now - last_event >= self._debounce
+            overdue = now - first_event >= self._max_latency
+            if quiet or overdue:
+                self._flush(coalescer.drain())
+                first_event = last_event = None
+
+    def _full_sync(self):
+        self._sync.sync()
+        if self._sync.resumed:
+            # Retomar un run cortado no recorre el árbol: falta el sync completo
+            self._sync.sync()
+        self._known = set(self._sync.local_ids)
+
+    def _rel(self, path: Path) -> str:
+        return path.relative_to(self._root).as_posix()
+
+    def _flush(self, changes: PendingChanges):
+        if not changes:
+            return
+        if changes.rescan:
+            print("[WATCH] Event queue overflowed; running a full sync.")
+            self._full_sync()
+            return
+
+        report = SyncReport()
+        # Cada flush es un run: el presupuesto de reintentos no se arrastra
+        self._repo.reset_budget()
+        self._sync.metrics.start_run()
+        for dst, src in sorted(changes.moves.items(), key=lambda m: _depth(m[0])):
+            self._apply(report, self._rel(dst), "moved", self._move, src, dst)
+        for path in sorted(changes.upserts, key=_depth):
+            self._apply(report, self._rel(path), "upserted", self._upsert, path)
+        for path in changes.deletes:
+            if self._descendants(self._rel(path)):
+                self._apply(report, self._rel(path), "archived", self._delete, path)
+        print(f"[WATCH] Pushed changes: {report.summary()}")
+        self._sync.metrics.finish_run(report)
+
+    @staticmethod
+    def _apply(report: SyncReport, rel_id: str, action: str, fn, *args):
+        try:
+            fn(*args)
+            report.record(rel_id, action)
+        except Exception as e:
+            report.record(rel_id, action, e)
+
+    def _meta(self, path: Path) -> FileMeta | None:
+        meta = self._factory.create_from_path(path)
+        fingerprinter = self._sync.fingerprinter
+        return fingerprinter.fingerprint(meta) if meta and fingerprinter else meta
+
+    def _upsert(self, path: Path):
+        meta = self._meta(path)
+        if meta is None:
+            return  # Desapareció antes del flush
+        self._repo.upsert_file(meta)
+        self._known.add(self._rel(path))
+
+    def _descendants(self, rel_id: str) -> list[str]:
+        """Known items at or under `rel_id` (a temp file never synced has none)."""
+        prefix = rel_id + "/"
+        return [k for k in self._known if k == rel_id or k.startswith(prefix)]
+
+    def _delete(self, path: Path):
+        for known in sorted(self._descendants(self._rel(path)), key=len, reverse=True):
+            self._repo.mark_as_missing(Path(known))
+            self._known.discard(known)
+
+    def _move(self, src: Path, dst: Path):
+        meta = self._meta(dst)
+        if meta is None:
+            self._delete(src)
+            return
+        old_rel, new_rel = self._rel(src), self._rel(dst)
+        self._repo.move_file(Path(old_rel), meta)
+        self._known.discard(old_rel)
+        self._known.add(new_rel)
+        if not meta.is_directory:
+            return
+
+        # El RelativeID de cada descendiente cambia con la carpeta
+        prefix = old_rel + "/"
+        children = sorted(
+            (k for k in self._known if k.startswith(prefix)), key=lambda k: k.count("/")
+        )
+        for old_child in children:
+            new_child = new_rel + old_child[len(old_rel) :]
+            child_meta = self._meta(self._root / new_child)
+            if child_meta is None:
+                self._repo.mark_as_missing(Path(old_child))
+            else:
+                self._repo.move_file(Path(old_child), child_meta)
+                self._known.add(new_child)
+            self._known.discard(old_child)
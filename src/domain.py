@@ -1,33 +1,178 @@
-import hashlib
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Protocol
 
+# Notion guarda los números como float; redondeamos para comparar sin ruido.
+MTIME_PRECISION = 3
 
-@dataclass(frozen=True)
+
+def normalize_mtime(epoch: float) -> float:
+    return round(epoch, MTIME_PRECISION)
+
+
+def _suffix(name: str) -> str:
+    """Igual que Path.suffix, sin construir un Path."""
+    dot = name.rfind(".")
+    return name[dot:] if 0 < dot < len(name) - 1 else ""
+
+
+@dataclass(frozen=True, slots=True)
 class FileMeta:
-    """Entidad inmutable que representa un archivo físico o directorio."""
+    """Entidad inmutable que representa un archivo físico o directorio.
 
-    absolute_path: Path
-    relative_path: Path
-    filename: str
-    extension: str
+    Compacta para árboles de millones de archivos: la ruta se guarda una sola
+    vez como RelativeID POSIX (`rel_id`, el mismo str que usan el índice y los
+    reportes), `device_id` y `root` son objetos compartidos, y los `Path` se
+    construyen solo cuando alguien los pide.
+    """
+
+    rel_id: str
     size_bytes: int
     last_modified_epoch: float
     device_id: str
     is_directory: bool = False
+    # (st_dev, st_ino): identidad física; sobrevive a renombres en el mismo volumen
+    file_key: tuple[int, int] | None = None
+    root: Path | None = None
+    # "<algoritmo>:<hex>" del contenido; solo con el hashing activado
+    fingerprint: str | None = None
+    # st_ctime: ninguna herramienta puede conservarlo al reescribir el contenido
+    status_change_epoch: float | None = None
+
+    @property
+    def filename(self) -> str:
+        return self.rel_id.rpartition("/")[2]
+
+    @property
+    def extension(self) -> str:
+        return "DIR" if self.is_directory else _suffix(self.filename)
+
+    @property
+    def depth(self) -> int:
+        return self.rel_id.count("/") + 1
+
+    @property
+    def relative_path(self) -> Path:
+        return Path(self.rel_id)
+
+    @property
+    def absolute_path(self) -> Path:
+        return (self.root or Path()) / self.rel_id
+
+
+@dataclass(frozen=True, slots=True)
+class RemotePage:
+    """Estado almacenado en Notion para un RelativeID (snapshot de la base de datos)."""
+
+    page_id: str
+    size_bytes: int | None = None
+    last_modified_epoch: float | None = None
+    parent_id: str | None = None
+    # Solo en el índice local (Notion no lo guarda): file_key con el que se subió
+    file_key: tuple[int, int] | None = None
+    fingerprint: str | None = None
+    # Solo en el índice local: key_id del secreto con que se firmó su MagicLink
+    # ("" sin firma; None si no hay índice local que lo sepa)
+    link_key: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class JournalEntry:
+    """Operación planificada de un run, persistida para poder retomarlo.
+
+    action: "created" | "modified" | "moved" | "renamed" | "archived".
+    state: "planned" -> "in_flight" (request enviado) -> "done" | "failed".
+    Un "in_flight" que sobrevive a un corte es ambiguo: Notion pudo haberlo
+    aplicado sin que llegara la respuesta.
+    """
+
+    rel_id: str
+    action: str
+    old_rel_id: str | None = None
+    page_id: str | None = None
+    state: str = "planned"
+
+
+class IncompleteSnapshotError(Exception):
+    """La lectura de Notion se cortó a mitad de paginación.
+
+    `partial` contiene lo que sí se pudo leer; sirve para actualizar, pero nunca
+    para decidir qué archivar.
+    """
+
+    def __init__(self, partial: dict[str, RemotePage], reason: str):
+        super().__init__(f"Snapshot incomplete after {len(partial)} items: {reason}")
+        self.partial = partial
+        self.reason = reason
+
+
+@dataclass(frozen=True)
+class FsEvent:
+    """Cambio observado en el filesystem (rutas absolutas).
+
+    kind: "created" | "modified" | "deleted" | "moved" | "rescan".
+    "moved" trae `dest_path`; "rescan" pide una sincronización completa
+    (p.ej. desbordó la cola de eventos del kernel).
+    """
+
+    kind: str
+    path: Path
+    is_directory: bool = False
+    dest_path: Path | None = None
+
+
+class IFsEventSource(Protocol):
+    """Observer: Fuente de eventos del filesystem (inotify, polling...)."""
+
+    def read_events(self, timeout: float) -> list[FsEvent]: ...
+    def close(self) -> None: ...
+
+
+class IFingerprintCache(Protocol):
+    """Caché persistente de huellas de contenido por identidad física del archivo."""
+
+    def get_fingerprint(self, meta: FileMeta) -> str | None: ...
+    def put_fingerprints(self, metas: list[FileMeta]) -> None: ...
+
+
+class ISyncJournal(Protocol):
+    """Memento: Checkpoints durables del plan de un run (para retomarlo)."""
+
+    def begin_run(self, entries: list[JournalEntry]) -> None: ...
+    def pending_run(self) -> list[JournalEntry]: ...
+    def mark(self, rel_id: str, state: str) -> None: ...
+    def finish_run(self) -> None: ...
+
+
+class IMetrics(Protocol):
+    """Observer: Contadores e histogramas del run (requests, caché, reintentos)."""
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None: ...
+    def observe(self, name: str, value: float, **labels: str) -> None: ...
 
 
 class IMagicLinkGenerator(Protocol):
     """Strategy: Define cómo se generan los links para abrir archivos."""
 
     def generate(self, relative_path: Path) -> str: ...
+    @property
+    def key_id(self) -> str: ...
 
 
 class INotionRepository(Protocol):
     """Repository: Abstracción para el almacenamiento de datos."""
 
     def upsert_file(self, file_meta: FileMeta) -> None: ...
-    def mark_as_missing(self, relative_path: Path) -> None: ...
+    def mark_as_missing(
+        self, relative_path: Path, page_id: str | None = None
+    ) -> None: ...
     def move_file(self, old_relative_path: Path, new_file_meta: FileMeta) -> None: ...
-    def get_all_active_files(self) -> dict[str, str]: ...
+    def find_page(self, rel_id: str) -> str | None: ...
+    def reset_budget(self) -> None: ...
+    @property
+    def tracks_parent(self) -> bool: ...
+    @property
+    def link_key(self) -> str | None: ...
+    def get_all_active_files(
+        self, full_resync: bool = False
+    ) -> dict[str, RemotePage]: ...
@@ -0,0 +1,62 @@
+"""
+CRC Card:
+    Module: ContentHash
+    Responsibilities:
+        - Picks the fastest available content hash: xxhash (XXH3-128), then
+          BLAKE3, then hashlib's BLAKE2b as the always-available fallback.
+        - Hashes a file into an "<algorithm>:<hex>" fingerprint, reading
+          large files through mmap instead of copying them chunk by chunk.
+        - hash_file is a module-level function so a process pool can run it.
+    Collaborators:
+        - Fingerprinter
+"""
+
+import hashlib
+import mmap
+
+try:
+    import xxhash
+
+    ALGORITHM = "xxh3_128"
+
+    def _new_hasher():
+        return xxhash.xxh3_128()
+
+except ImportError:
+    try:
+        import blake3
+
+        ALGORITHM = "blake3"
+
+        def _new_hasher():
+            return blake3.blake3()
+
+    except ImportError:
+        ALGORITHM = "blake2b"
+
+        def _new_hasher():
+            return hashlib.blake2b(digest_size=16)
+
+
+# Por encima de este tamaño se mapea el archivo en memoria
+MMAP_THRESHOLD = 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str) -> str | None:
+    """Huella del contenido del archivo, o None si no se puede leer."""
+    hasher = _new_hasher()
+    try:
+        with open(path, "rb") as f:
+            size = f.seek(0, 2)
+            f.seek(0)
+            if size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    hasher.update(mapped)
+            else:
+                while chunk := f.read(CHUNK_SIZE):
+                    hasher.update(chunk)
+    except (OSError, ValueError):
+        # Borrado, sin permisos o truncado mientras se leía
+        return None
+    return f"{ALGORITHM}:{hasher.hexdigest()}"
@@ -0,0 +1,322 @@
+"""
+CRC Card:
+    Module: FsEvents
+    Responsibilities:
+        - InotifySource: subscribes to inotify on every (non-ignored) directory
+          under the root through libc, pairs IN_MOVED_FROM/IN_MOVED_TO by cookie
+          into "moved" events and keeps watches in sync with renamed,
+          created and removed directories.
+        - PollingSource: portable fallback that rescans the tree periodically
+          and pairs deleted + created entries by inode into "moved" events.
+        - create_event_source: picks inotify on Linux, polling elsewhere.
+    Collaborators:
+        - FsEvent
+        - IFsEventSource
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+from src.domain import FsEvent, IFsEventSource
+
+PathFilter = Callable[[Path], bool]
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_ONLYDIR
+    | IN_DONT_FOLLOW
+    | IN_EXCL_UNLINK
+)
+EVENT_HEADER_SIZE = 16  # struct inotify_event: int wd; uint32 mask, cookie, len
+# Un IN_MOVED_FROM sin su IN_MOVED_TO tras este tiempo salió del árbol: es un borrado
+MOVE_PAIR_WINDOW = 0.5
+
+
+def _accept_all(_: Path) -> bool:
+    return True
+
+
+class InotifySource(IFsEventSource):
+    def __init__(self, root: Path, should_process: PathFilter = _accept_all):
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or not libc_name:
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        self._root = root
+        self._filter = should_process
+        self._paths: dict[int, Path] = {}
+        self._wds: dict[Path, int] = {}
+        self._pending_moves: dict[int, tuple[Path, bool, float]] = {}
+        self._watch_tree(root, emit=False)
+
+    def close(self):
+        os.close(self._fd)
+
+    def _watch(self, path: Path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                print(
+                    "[WATCH] inotify watch limit reached; raise "
+                    "fs.inotify.max_user_watches"
+                )
+            elif err not in (errno.ENOENT, errno.ENOTDIR):
+                print(f"[WATCH] Cannot watch {path}: {os.strerror(err)}")
+            return
+        self._paths[wd] = path
+        self._wds[path] = wd
+
+    def _watch_tree(self, top: Path, emit: bool) -> list[FsEvent]:
+        """Agrega watches bajo `top`; con `emit`, reporta su contenido como creado."""
+        events: list[FsEvent] = []
+        self._watch(top)
+        for root, dirs, files in os.walk(top):
+            base = Path(root)
+            dirs[:] = [d for d in dirs if self._filter(base / d)]
+            for d in dirs:
+                self._watch(base / d)
+                if emit:
+                    events.append(FsEvent("created", base / d, is_directory=True))
+            if emit:
+                events.extend(
+                    FsEvent("created", base / f)
+                    for f in files
+                    if self._filter(base / f)
+                )
+        return events
+
+    def _unwatch_tree(self, top: Path):
+        for path in [p for p in self._wds if p == top or top in p.parents]:
+            wd = self._wds.pop(path)
+            self._paths.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def _rename_tree(self, src: Path, dst: Path):
+        for path in [p for p in self._wds if p == src or src in p.parents]:
+            wd = self._wds.pop(path)
+            new_path = dst / path.relative_to(src)
+            self._wds[new_path] = wd
+            self._paths[wd] = new_path
+
+    def read_events(self, timeout: float) -> list[FsEvent]:
+        events: list[FsEvent] = []
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if ready:
+            while True:
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    break
+                events.extend(self._parse(data))
+        events.extend(self._expire_moves())
+        return events
+
+    def _parse(self, data: bytes) -> list[FsEvent]:
+        events: list[FsEvent] = []
+        offset = 0
+        while offset + EVENT_HEADER_SIZE <= len(data):
+            wd, mask, cookie, length = (
+                int.from_bytes(data[offset : offset + 4], sys.byteorder, signed=True),
+                int.from_bytes(data[offset + 4 : offset + 8], sys.byteorder),
+                int.from_bytes(data[offset + 8 : offset + 12], sys.byteorder),
+                int.from_bytes(data[offset + 12 : offset + 16], sys.byteorder),
+            )
+            raw_name = data[offset + 16 : offset + 16 + length].rstrip(b"\0")
+            offset += EVENT_HEADER_SIZE + length
+
+            if mask & IN_Q_OVERFLOW:
+                events.append(FsEvent("rescan", self._root, is_directory=True))
+                continue
+            base = self._paths.get(wd)
+            if mask & IN_IGNORED:
+                if base is not None:
+                    self._paths.pop(wd, None)
+                    self._wds.pop(base, None)
+                continue
+            if base is None or not raw_name:
+                continue
+
+            path = base / os.fsdecode(raw_name)
+            if not self._filter(path):
+                continue
+            events.extend(self._translate(path, mask, cookie))
+        return events
+
+    def _translate(self, path: Path, mask: int, cookie: int) -> list[FsEvent]:
+        is_dir = bool(mask & IN_ISDIR)
+        if mask & IN_MOVED_FROM:
+            self._pending_moves[cookie] = (path, is_dir, time.monotonic())
+            return []
+        if mask & IN_MOVED_TO:
+            pending = self._pending_moves.pop(cookie, None)
+            if pending:
+                src, _, _ = pending
+                if is_dir:
+                    self._rename_tree(src, path)
+                return [FsEvent("moved", src, is_dir, dest_path=path)]
+            # Llegó desde fuera del árbol observado
+            mask = IN_CREATE | (mask & IN_ISDIR)
+        if mask & IN_CREATE:
+            if is_dir:
+                return [FsEvent("created", path, True), *self._watch_tree(path, True)]
+            return [FsEvent("created", path)]
+        if mask & IN_DELETE:
+            return [FsEvent("deleted", path, is_dir)]
+        if not is_dir and mask & (IN_MODIFY | IN_CLOSE_WRITE | IN_ATTRIB):
+            return [FsEvent("modified", path)]
+        return []
+
+    def _expire_moves(self) -> list[FsEvent]:
+        now = time.monotonic()
+        events: list[FsEvent] = []
+        for cookie, (path, is_dir, seen) in list(self._pending_moves.items()):
+            if now - seen >= MOVE_PAIR_WINDOW:
+                del self._pending_moves[cookie]
+                if is_dir:
+                    self._unwatch_tree(path)
+                events.append(FsEvent("deleted", path, is_dir))
+        return events
+
+
+class PollingSource(IFsEventSource):
+    """Reescanea el árbol cada `interval` segundos y compara los snapshots de stat."""
+
+    def __init__(
+        self,
+        root: Path,
+        should_process: PathFilter = _accept_all,
+        interval: float = 5.0,
+    ):
+        self._root = root
+        self._filter = should_process
+        self._interval = interval
+        self._state = self._scan()
+        self._next_poll = time.monotonic() + interval
+
+    def close(self):
+        pass
+
+    def _scan(self) -> dict[Path, tuple[int, int, float, bool]]:
+        state: dict[Path, tuple[int, int, float, bool]] = {}
+        stack = [self._root]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        path = Path(entry.path)
+                        if not self._filter(path):
+                            continue
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        state[path] = (st.st_ino, st.st_size, st.st_mtime, is_dir)
+                        if is_dir:
+                            stack.append(path)
+            except OSError:
+                continue
+        return state
+
+    def read_events(self, timeout: float) -> list[FsEvent]:
+        remaining = self._next_poll - time.monotonic()
+        if remaining > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(0.0, remaining))
+        self._next_poll = time.monotonic() + self._interval
+
+        old, new = self._state, self._scan()
+        self._state = new
+        removed = {p: old[p] for p in old.keys() - new.keys()}
+        added = {p: new[p] for p in new.keys() - old.keys()}
+
+        events: list[FsEvent] = []
+        # Borrado + creación con el mismo inode = movimiento
+        by_inode = {(v[0], v[3]): p for p, v in added.items()}
+        moved_dirs: list[tuple[Path, Path]] = []
+        for src in sorted(removed, key=lambda p: len(p.parts)):
+            ino, _, _, is_dir = removed[src]
+            dst = by_inode.get((ino, is_dir))
+            if dst is None:
+                continue
+            del added[dst]
+            if any(
+                s in src.parents and dst == d / src.relative_to(s)
+                for s, d in moved_dirs
+            ):
+                continue  # Cubierto por el movimiento de su carpeta
+            if is_dir:
+                moved_dirs.append((src, dst))
+            events.append(FsEvent("moved", src, is_dir, dest_path=dst))
+        moved_sources = {e.path for e in events}
+        events.extend(
+            FsEvent("deleted", p, removed[p][3])
+            for p in removed
+            if p not in moved_sources and not any(s in p.parents for s, _ in moved_dirs)
+        )
+        events.extend(
+            FsEvent("created", p, v[3])
+            for p, v in added.items()
+            if not any(d in p.parents for _, d in moved_dirs)
+        )
+        events.extend(
+            FsEvent("modified", p)
+            for p, v in new.items()
+            if p in old and not v[3] and old[p][1:3] != v[1:3]
+        )
+        return events
+
+
+def create_event_source(
+    root: Path,
+    should_process: PathFilter = _accept_all,
+    backend: str = "auto",
+    poll_interval: float = 5.0,
+) -> IFsEventSource:
+    if backend in ("auto", "inotify"):
+        try:
+            source = InotifySource(root, should_process)
+            print("[WATCH] Using inotify backend.")
+            return source
+        except OSError as e:
+            if backend == "inotify":
+                raise
+            print(f"[WATCH] inotify unavailable ({e}); falling back to polling.")
+    print(f"[WATCH] Using polling backend (every {poll_interval}s).")
+    return PollingSource(root, should_process, poll_interval)
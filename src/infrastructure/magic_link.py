@@ -1,15 +1,66 @@
 import base64
+import binascii
+import hashlib
+import hmac
 from pathlib import Path
 
 from src.domain import IMagicLinkGenerator
 
+OPENER_HOST = "localhost"
+OPENER_PORT = 12345
+OPENER_URL = f"http://{OPENER_HOST}:{OPENER_PORT}"
+# Bytes del HMAC que viajan en el enlace (128 bits bastan y el enlace es corto)
+SIGNATURE_BYTES = 16
+
 
 class SantiFSMagicLinkGenerator(IMagicLinkGenerator):
-    """Implementación concreta usando Servidor Local (http://localhost)"""
+    """Implementación concreta usando Servidor Local (http://localhost)
+
+    Con un `secret` (OPENER_SECRET) cada enlace lleva un HMAC de su ruta: el
+    opener solo abre los enlaces que escribió esta instalación.
+    """
+
+    def __init__(self, base_url: str = OPENER_URL, secret: str | None = None):
+        self._base_url = base_url.rstrip("/")
+        self._secret = secret or None
+
+    @property
+    def key_id(self) -> str:
+        """Identifica el secreto con que se firman los enlaces ("" sin firma)."""
+        if not self._secret:
+            return ""
+        return hashlib.sha256(self._secret.encode()).hexdigest()[:16]
 
     def generate(self, relative_path: Path) -> str:
         # Forzamos formato UNIX (/) para consistencia
         path_str = relative_path.as_posix()
         path_b64 = base64.urlsafe_b64encode(path_str.encode()).decode()
         # Usamos localhost en lugar de santifs://
-        return f"http://localhost:12345/open?f={path_b64}"
+        link = f"{self._base_url}/open?f={path_b64}"
+        if self._secret:
+            link += f"&s={sign_path(path_str, self._secret)}"
+        return link
+
+
+def sign_path(rel_id: str, secret: str) -> str:
+    """Firma (parámetro `s`) del MagicLink de `rel_id`."""
+    digest = hmac.new(secret.encode(), rel_id.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:SIGNATURE_BYTES]).decode().rstrip("=")
+
+
+def verify_path(rel_id: str, signature: str, secret: str) -> bool:
+    """True si `signature` se hizo para `rel_id` con `secret`."""
+    return hmac.compare_digest(sign_path(rel_id, secret), signature)
+
+
+def decode_path(token: str) -> str:
+    """RelativeID que lleva el parámetro `f` de un MagicLink.
+
+    Lanza ValueError si el token no es el base64 de un texto UTF-8.
+    """
+    # Algunos clientes pierden el relleno "=" al copiar el enlace
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        return base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+    except (binascii.Error, UnicodeError) as e:
+        raise ValueError(f"Malformed link token: {e}") from e
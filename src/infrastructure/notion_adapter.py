@@ -1,18 +1,56 @@
+import threading
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
+from urllib.parse import unquote
 
 import httpx
-from notion_client import Client
 
-from src.domain import FileMeta, IMagicLinkGenerator, INotionRepository
+from src.domain import (
+    FileMeta,
+    IMagicLinkGenerator,
+    IMetrics,
+    INotionRepository,
+    IncompleteSnapshotError,
+    RemotePage,
+    normalize_mtime,
+)
+from src.infrastructure.notion_http import (
+    NotionAPIError,
+    NotionHttp,
+    RetryPolicy,
+    build_http_client,
+)
+from src.infrastructure.notion_schema import NotionSchema
+from src.infrastructure.rate_limiter import TokenBucket
+from src.infrastructure.state_store import SyncStateStore
+
+FOLDER_ICON = {"type": "emoji", "emoji": "📁"}
+FILE_ICON = {"type": "emoji", "emoji": "📄"}
+
+# last_edited_time en Notion tiene precisión de minutos: dejamos margen.
+WATERMARK_SAFETY = timedelta(minutes=2)
+# Un query nunca devuelve páginas archivadas: el fetch incremental no ve lo
+# archivado a mano. Cada tanto se baja la base completa para olvidarlo.
+FULL_RECONCILE_EVERY = timedelta(hours=24)
+FETCH_PROGRESS_EVERY = 1000
 
 
 class NotionRepository(INotionRepository):
     def __init__(
-        self, api_token: str, database_id: str, link_generator: IMagicLinkGenerator
+        self,
+        api_token: str,
+        database_id: str,
+        link_generator: IMagicLinkGenerator,
+        state_store: SyncStateStore | None = None,
+        rate_limiter: TokenBucket | None = None,
+        retry_policy: RetryPolicy | None = None,
+        http_client: httpx.Client | None = None,
+        fingerprints: bool = False,
+        metrics: IMetrics | None = None,
+        devices: bool = False,
+        full_reconcile_every: timedelta | None = FULL_RECONCILE_EVERY,
     ):
-        self._client = Client(auth=api_token)
-        self._api_token = api_token
         # Limpieza y formateo de ID
         clean_id = database_id.strip()
         if len(clean_id) == 32:
@@ -23,303 +61,443 @@ class NotionRepository(INotionRepository):
         print(f"[DEBUG] Notion DB ID: {self._db_id}")
         self._link_gen = link_generator
         self._id_cache: dict[str, str] = {}
-        self._ensure_hierarchy_property()
+        # True cuando _id_cache refleja la base completa: un miss significa
+        # "no existe" y no se consulta a Notion.
+        self._index_complete = False
+        # La caché la comparten los targets de una misma base (SharedSnapshot):
+        # lo escrito mientras corre un fetch se anota aparte (page_id, o None si
+        # se olvidó) para que el fetch, que no lo vio, no lo borre del índice
+        self._cache_lock = threading.Lock()
+        self._since_fetch: list[dict[str, str | None]] = []
+        self._store = state_store
+        self._full_reconcile_every = full_reconcile_every
+        # Con hashing activado se crea (si falta) la propiedad Fingerprint
+        self._fingerprints = fingerprints
+        # Con varios dispositivos en la base se crea (si falta) la propiedad Device
+        self._devices = devices
+        # Un único bucket compartido por todos los workers del sincronizador
+        # y un único pool de conexiones keep-alive para todas las llamadas
+        self._api = NotionHttp(
+            http_client or build_http_client(api_token),
+            rate_limiter or TokenBucket(),
+            retry_policy,
+            metrics,
+        )
+        self._metrics = metrics
+        self._folder_lock = threading.RLock()
+        self._schema = self._ensure_hierarchy_property()
+
+    def close(self):
+        """Cierra el pool HTTP compartido."""
+        self._api.close()
+
+    def reset_budget(self):
+        """Nuevo run: vuelve a llenar el presupuesto de reintentos."""
+        self._api.reset_budget()
+
+    @property
+    def tracks_parent(self) -> bool:
+        """False si la base no tiene relación padre a la que vincular las páginas."""
+        return self._schema.parent is not None
+
+    @property
+    def link_key(self) -> str | None:
+        """
+        key_id del secreto con que se firman hoy los MagicLinks. Sin índice
+        local no se sabe con qué se firmó cada página: None, no se reescribe.
+        """
+        return self._link_gen.key_id if self._store else None
 
-    def _ensure_hierarchy_property(self):
-        """Verifica y crea la propiedad de relación para sub-items si no existe."""
+    # Toda llamada a la API pasa por NotionHttp (rate limit + reintentos)
+    def _create_page(self, rel_id: str, **body: Any) -> dict[str, Any]:
+        # Si el POST quedó en duda (timeout, 5xx), se busca antes de reenviarlo
+        return self._api.request(
+            "POST", "pages", body, reconcile=lambda: self._query_relative_id(rel_id)
+        )
+
+    def _update_page(self, page_id: str, **body: Any) -> dict[str, Any]:
+        return self._api.request("PATCH", f"pages/{page_id}", body)
+
+    def _update_database(self, **body: Any) -> dict[str, Any]:
+        return self._api.request("PATCH", f"databases/{self._db_id}", body)
+
+    def _query_database(
+        self, body: dict[str, Any], property_ids: list[str] | None = None
+    ) -> dict[str, Any]:
+        # Los IDs de propiedad ya vienen URL-encoded; httpx los vuelve a codificar
+        params = [("filter_properties", unquote(pid)) for pid in property_ids or ()]
+        return self._api.request(
+            "POST", f"databases/{self._db_id}/query", body, params or None
+        )
+
+    def _ensure_hierarchy_property(self) -> NotionSchema:
+        """
+        Lee el esquema de la base una sola vez: crea lo que falte (relación de
+        jerarquía, Size, Modified) y resuelve los IDs reales de cada propiedad
+        para que cada escritura sea un único request.
+        """
+        db = self._api.request("GET", f"databases/{self._db_id}")
+        missing = NotionSchema.missing_properties(
+            db["properties"], self._db_id, self._fingerprints, self._devices
+        )
+        if missing:
+            print(f"[INIT] Creando propiedades: {', '.join(missing)}")
+            try:
+                db = self._update_database(properties=missing)
+                print("[INIT] Propiedades creadas exitosamente.")
+            except NotionAPIError as e:
+                print(f"[WARN] No se pudieron crear las propiedades: {e}")
+                if "Parent item" in missing:
+                    print(
+                        "Asegúrate de activar 'Sub-items' en la configuración de la base de datos en Notion."
+                    )
+
+        schema = NotionSchema.from_properties(db["properties"])
+        if schema.parent:
+            print(f"[INIT] Detectada propiedad de jerarquía: '{schema.parent.name}'")
+        return schema
+
+    def get_all_active_files(self, full_resync: bool = False) -> dict[str, RemotePage]:
+        """
+        Recupera todos los archivos activos (no archivados) de la base de datos.
+        Retorna un diccionario {relative_path: RemotePage} con el tamaño, mtime
+        y padre almacenados, para que el sincronizador pueda omitir lo que no cambió.
+
+        Con un state store y una reconciliación previa, solo se piden a Notion las
+        páginas editadas desde entonces; full_resync fuerza la descarga completa.
+        """
+        started = datetime.now(timezone.utc)
+        watermark = self._store.watermark if self._store else None
+
+        written: dict[str, str | None] = {}
+        with self._cache_lock:
+            self._since_fetch.append(written)
         try:
-            db = self._client.databases.retrieve(self._db_id)
-            # Verificamos si existe "ítem principal" (Español) o "Parent item" (Inglés)
-            if "ítem principal" in db["properties"]:
-                print("[INIT] Detectada propiedad de jerarquía: 'ítem principal'")
-                return
-            if "Parent item" in db["properties"]:
-                print("[INIT] Detectada propiedad de jerarquía: 'Parent item'")
-                return
+            mapping = self._fetch_snapshot(watermark, full_resync)
+        except IncompleteSnapshotError as e:
+            # Sin watermark nuevo ni reemplazo del store: el próximo run reintenta
+            self._replace_cache(e.partial, written, complete=False)
+            raise
+        except BaseException:
+            with self._cache_lock:
+                self._since_fetch.remove(written)
+            raise
+
+        if self._store:
+            self._store.watermark = (started - WATERMARK_SAFETY).isoformat()
+            if full_resync or self._full_reconcile_due():
+                self._store.last_full_reconcile = started.isoformat()
+
+        self._replace_cache(mapping, written, complete=True)
+        return mapping
 
-            print(
-                "[INIT] Creando propiedad 'Parent item' para jerarquía de carpetas..."
-            )
-            # Creamos una relación dual (bidireccional) con la misma base de datos
-            self._client.databases.update(
-                database_id=self._db_id,
-                properties={
-                    "Parent item": {
-                        "relation": {
-                            "database_id": self._db_id,
-                            "type": "dual_property",
-                            "dual_property": {},
-                        }
+    def _replace_cache(
+        self,
+        mapping: dict[str, RemotePage],
+        written: dict[str, str | None],
+        complete: bool,
+    ):
+        """
+        Reemplaza el índice por lo que trajo el fetch, más lo que otros workers
+        escribieron u olvidaron mientras corría (el fetch no pudo verlo).
+        """
+        cache = {rel_id: page.page_id for rel_id, page in mapping.items()}
+        with self._cache_lock:
+            self._since_fetch.remove(written)
+            for rel_id, page_id in written.items():
+                if page_id is None:
+                    cache.pop(rel_id, None)
+                else:
+                    cache[rel_id] = page_id
+            self._id_cache = cache
+            self._index_complete = complete
+
+    def _cache_put(self, rel_id: str, page_id: str | None):
+        """Anota (o con None olvida) la página de rel_id en el índice."""
+        with self._cache_lock:
+            if page_id is None:
+                self._id_cache.pop(rel_id, None)
+            else:
+                self._id_cache[rel_id] = page_id
+            for written in self._since_fetch:
+                written[rel_id] = page_id
+
+    def _full_reconcile_due(self) -> bool:
+        """Si el índice lleva demasiado sin un fetch completo (lo archivado o
+        borrado a mano en Notion solo desaparece con uno)."""
+        if self._full_reconcile_every is None:
+            return False
+        last = self._store.last_full_reconcile
+        if last is None:
+            return True
+        elapsed = datetime.now(timezone.utc) - datetime.fromisoformat(last)
+        return elapsed >= self._full_reconcile_every
+
+    def _fetch_snapshot(
+        self, watermark: str | None, full_resync: bool
+    ) -> dict[str, RemotePage]:
+        if watermark and not full_resync and not self._full_reconcile_due():
+            print(f"[SYNC] Fetching pages edited since {watermark}...")
+            try:
+                changed = self._query_pages(
+                    {
+                        "timestamp": "last_edited_time",
+                        "last_edited_time": {"on_or_after": watermark},
                     }
-                },
-            )
-            print("[INIT] Propiedad creada exitosamente.")
-        except Exception as e:
-            print(f"[WARN] No se pudo configurar la jerarquía automática: {e}")
+                )
+            except IncompleteSnapshotError as e:
+                raise IncompleteSnapshotError(
+                    {**self._store.load(), **e.partial}, e.reason
+                ) from e
+            self._store.put_many(changed)
+            mapping = self._store.load()
             print(
-                "Asegúrate de activar 'Sub-items' en la configuración de la base de datos en Notion."
+                f"[SYNC] Reconciled {len(changed)} changed items; "
+                f"{len(mapping)} items in local state."
             )
+        else:
+            print("[SYNC] Fetching all pages from Notion...")
+            mapping = self._query_pages()
+            if self._store:
+                self._store.replace_all(mapping)
+                # Releído: el índice conserva file_key y link_key de cada página
+                mapping = self._store.load()
+        return mapping
 
-    def get_all_active_files(self) -> dict[str, str]:
+    def iter_active_files(
+        self, filter_: dict[str, Any] | None = None
+    ) -> Iterator[tuple[str, RemotePage]]:
         """
-        Recupera todos los archivos activos (no archivados) de la base de datos.
-        Retorna un diccionario {relative_path: page_id}.
+        Recorre la base y entrega (RelativeID, RemotePage) a medida que llega
+        cada página de resultados, sin acumular las respuestas. Solo pide a
+        Notion las propiedades que usa el snapshot (filter_properties).
+        Los errores (tras los reintentos) se propagan como NotionAPIError.
         """
-        print("[SYNC] Fetching all pages from Notion...")
-        url = f"https://api.notion.com/v1/databases/{self._db_id}/query"
-        headers = {
-            "Authorization": f"Bearer {self._api_token}",
-            "Notion-Version": "2022-06-28",
-            "Content-Type": "application/json",
-        }
-
-        mapping = {}
-        has_more = True
         next_cursor = None
-
-        while has_more:
-            body = {"page_size": 100}
+        while True:
+            body: dict[str, Any] = {"page_size": 100}
+            if filter_:
+                body["filter"] = filter_
             if next_cursor:
                 body["start_cursor"] = next_cursor
 
-            try:
-                response = httpx.post(url, headers=headers, json=body, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-
-                for page in data["results"]:
-                    page_id = page["id"]
-                    props = page["properties"]
-                    # Extraer RelativeID
-                    rel_id_list = props.get("RelativeID", {}).get("rich_text", [])
-                    if rel_id_list:
-                        rel_id = rel_id_list[0]["text"]["content"]
-                        mapping[rel_id] = page_id
-
-                has_more = data.get("has_more", False)
-                next_cursor = data.get("next_cursor")
-                print(f"[SYNC] Fetched {len(mapping)} items so far...")
-
-            except Exception as e:
-                print(f"[ERROR] Fetching pages: {e}")
-                break
-
-        self._id_cache = mapping.copy()
-        return mapping
+            data = self._query_database(body, self._schema.snapshot_property_ids())
+            for page in data["results"]:
+                rel_id, remote = self._schema.read(page)
+                if rel_id:
+                    yield rel_id, remote
 
-    def _find_page_by_relative_id(self, rel_path: str) -> str | None:
-        if rel_path in self._id_cache:
-            return self._id_cache[rel_path]
-
-        # Usamos httpx directo porque la librería notion-client está dando problemas
-        url = f"https://api.notion.com/v1/databases/{self._db_id}/query"
-        headers = {
-            "Authorization": f"Bearer {self._api_token}",
-            "Notion-Version": "2022-06-28",
-            "Content-Type": "application/json",
-        }
-        body = {"filter": {"property": "RelativeID", "rich_text": {"equals": rel_path}}}
+            if not data.get("has_more"):
+                return
+            next_cursor = data.get("next_cursor")
 
+    def _query_pages(
+        self, filter_: dict[str, Any] | None = None
+    ) -> dict[str, RemotePage]:
+        """
+        Arma {RelativeID: RemotePage} con iter_active_files.
+        Si una página falla (tras los reintentos) lanza IncompleteSnapshotError:
+        un snapshot truncado nunca debe usarse para archivar.
+        """
+        mapping: dict[str, RemotePage] = {}
         try:
-            response = httpx.post(url, headers=headers, json=body, timeout=10.0)
-            # Si da 404 o 400, lanzará error aquí
-            response.raise_for_status()
-            data = response.json()
-            results = data.get("results")
-            return results[0]["id"] if results else None
-        except Exception as e:
-            # print(f"[DEBUG ERROR HTTPX] {e}")
+            for rel_id, remote in self.iter_active_files(filter_):
+                mapping[rel_id] = remote
+                if len(mapping) % FETCH_PROGRESS_EVERY == 0:
+                    print(f"[SYNC] Fetched {len(mapping)} items so far...")
+        except NotionAPIError as e:
+            raise IncompleteSnapshotError(mapping, str(e)) from e
+        return mapping
+
+    def _remember(self, rel_id: str, page: RemotePage):
+        """Registra una escritura exitosa en la caché y en el state store."""
+        self._cache_put(rel_id, page.page_id)
+        if self._store:
+            self._store.put(rel_id, page)
+
+    def _forget(self, rel_id: str):
+        self._cache_put(rel_id, None)
+        if self._store:
+            self._store.delete(rel_id)
+
+    def _find_page_by_relative_id(self, rel_path: str) -> str | None:
+        page_id = self._id_cache.get(rel_path)
+        if page_id or self._index_complete:
+            self._count_lookup("hit" if page_id else "absent")
+            return page_id
+        self._count_lookup("query")
+        return self.find_page(rel_path)
+
+    def find_page(self, rel_id: str) -> str | None:
+        """Le pregunta a Notion (nunca a la caché) por la página de `rel_id`.
+
+        Índice parcial (o sin snapshot, p.ej. modo watch), o un create que quedó
+        en duda tras un corte. Los errores se propagan: devolver None aquí
+        duplicaría la página.
+        """
+        page = self._query_relative_id(rel_id)
+        if page is None:
             return None
+        self._cache_put(rel_id, page["id"])
+        return page["id"]
+
+    def _query_relative_id(self, rel_id: str) -> dict[str, Any] | None:
+        body = {"filter": {"property": "RelativeID", "rich_text": {"equals": rel_id}}}
+        results = self._query_database(body, [self._schema.relative_id.id]).get(
+            "results"
+        )
+        return results[0] if results else None
 
-    def _ensure_parent_folder(self, relative_path: Path) -> str | None:
+    def _count_lookup(self, result: str):
+        if self._metrics:
+            self._metrics.increment("lookups_total", result=result)
+
+    def _ensure_parent_folder(self, rel_id: str) -> str | None:
         """
         Asegura que la carpeta padre exista en Notion.
         Retorna el ID de la página de la carpeta padre, o None si es raíz.
         """
-        if len(relative_path.parts) <= 1:
+        parent_rel_id, sep, _ = rel_id.rpartition("/")
+        if not sep:
             return None
 
-        parent_path = relative_path.parent
-        parent_rel_id = parent_path.as_posix()
-
         # Buscamos si ya existe la carpeta padre
         parent_id = self._find_page_by_relative_id(parent_rel_id)
 
         if parent_id:
             return parent_id
 
-        # Si no existe, la creamos recursivamente
-        print(f"[AUTO-CREATE FOLDER] {parent_path.name}")
-
-        # Recursión para el abuelo
-        grandparent_id = self._ensure_parent_folder(parent_path)
-
-        # Creamos la carpeta padre
-        properties: dict[str, Any] = {
-            "Name": {"title": [{"text": {"content": parent_path.name}}]},
-            "RelativeID": {"rich_text": [{"text": {"content": parent_rel_id}}]},
-            "Extension": {"rich_text": [{"text": {"content": "FOLDER"}}]},
-            "MagicLink": {"url": "https://notion.so"},  # Placeholder para carpetas
-        }
+        # Dos workers pueden pedir la misma carpeta nueva: solo uno la crea.
+        with self._folder_lock:
+            parent_id = self._id_cache.get(parent_rel_id)
+            if parent_id:
+                return parent_id
+            return self._create_folder(parent_rel_id)
 
-        # Intentamos vincular con el abuelo si existe (Sub-items)
-        if grandparent_id:
-            # Intentamos con "ítem principal" primero (Español), luego "Parent item"
-            properties["ítem principal"] = {"relation": [{"id": grandparent_id}]}
+    def _create_folder(self, rel_id: str) -> str:
+        name = rel_id.rpartition("/")[2]
+        print(f"[AUTO-CREATE FOLDER] {name}")
 
-        try:
-            print(f"[AUTO-CREATE FOLDER] {parent_path.name}")
-            new_page = self._client.pages.create(
-                parent={"database_id": self._db_id},
-                properties=properties,
-                icon={"type": "emoji", "emoji": "📁"},
-            )
-            return new_page["id"]
-        except Exception as e:
-            # Si falla, probamos con "Parent item" (Inglés)
-            if "ítem principal" in properties:
-                del properties["ítem principal"]
-                properties["Parent item"] = {"relation": [{"id": grandparent_id}]}
-                try:
-                    new_page = self._client.pages.create(
-                        parent={"database_id": self._db_id},
-                        properties=properties,
-                        icon={"type": "emoji", "emoji": "📁"},
-                    )
-                    return new_page["id"]
-                except Exception:
-                    pass  # Falló con ambos, seguimos sin padre
+        # Recursión para el abuelo
+        grandparent_id = self._ensure_parent_folder(rel_id)
+        properties = self._schema.page_properties(
+            name=name,
+            rel_id=rel_id,
+            extension="FOLDER",
+            link="https://notion.so",  # Placeholder para carpetas
+            parent_id=grandparent_id,
+        )
+        new_page = self._create_page(
+            rel_id,
+            parent={"database_id": self._db_id},
+            properties=properties,
+            icon=FOLDER_ICON,
+        )
+        self._remember(
+            rel_id,
+            RemotePage(
+                new_page["id"], parent_id=self._schema.linked_parent(grandparent_id)
+            ),
+        )
+        return new_page["id"]
 
-            print(f"[ERROR] Creating folder {parent_path.name}: {e}")
-            # Intentamos crear sin relación por si falla todo
-            if "Parent item" in properties:
-                del properties["Parent item"]
-            if "ítem principal" in properties:
-                del properties["ítem principal"]
+    def _file_properties(self, meta: FileMeta, parent_id: str | None) -> dict[str, Any]:
+        # Delegamos la generación del link a la estrategia inyectada
+        return self._schema.page_properties(
+            name=meta.filename,
+            rel_id=meta.rel_id,
+            extension=(
+                "FOLDER"
+                if meta.is_directory
+                else meta.extension.lower().replace(".", "") or "None"
+            ),
+            link=self._link_gen.generate(meta.relative_path),
+            size=meta.size_bytes,
+            mtime=normalize_mtime(meta.last_modified_epoch),
+            parent_id=parent_id,
+            fingerprint=meta.fingerprint,
+            device=meta.device_id,
+        )
 
-            try:
-                new_page = self._client.pages.create(
-                    parent={"database_id": self._db_id},
-                    properties=properties,
-                    icon={"type": "emoji", "emoji": "📁"},
-                )
-                return new_page["id"]
-            except Exception:
-                return None
-            return None
+    def _synced_state(self, page_id: str, meta: FileMeta, parent_id: str | None):
+        return RemotePage(
+            page_id=page_id,
+            size_bytes=meta.size_bytes,
+            last_modified_epoch=normalize_mtime(meta.last_modified_epoch),
+            parent_id=self._schema.linked_parent(parent_id),
+            file_key=meta.file_key,
+            fingerprint=meta.fingerprint if self._schema.fingerprint else None,
+            link_key=self._link_gen.key_id,
+        )
 
     def upsert_file(self, meta: FileMeta) -> None:
-        rel_id = meta.relative_path.as_posix()
+        rel_id = meta.rel_id
 
         try:
+            # Si la búsqueda falla, el error sube: crear a ciegas duplicaría la página
             existing_page_id = self._find_page_by_relative_id(rel_id)
-        except Exception:
-            existing_page_id = None
-
-        # Delegamos la generación del link a la estrategia inyectada
-        magic_link = self._link_gen.generate(meta.relative_path)
-
-        properties: dict[str, Any] = {
-            "Name": {"title": [{"text": {"content": meta.filename}}]},
-            "RelativeID": {"rich_text": [{"text": {"content": rel_id}}]},
-            "Extension": {
-                "rich_text": [
-                    {
-                        "text": {
-                            "content": (
-                                "FOLDER"
-                                if meta.is_directory
-                                else meta.extension.lower().replace(".", "") or "None"
-                            )
-                        }
-                    }
-                ]
-            },
-            "MagicLink": {"url": magic_link},
-        }
-
-        # Icono según tipo
-        icon = (
-            {"type": "emoji", "emoji": "📁"}
-            if meta.is_directory
-            else {"type": "emoji", "emoji": "📄"}
-        )
-
-        # Intentamos buscar y vincular con el padre
-        parent_id = self._ensure_parent_folder(meta.relative_path)
-        if parent_id:
-            # Usamos el ID de la propiedad directamente: 'zK%3E%3A' (ítem principal)
-            properties["zK%3E%3A"] = {"relation": [{"id": parent_id}]}
+            parent_id = self._ensure_parent_folder(rel_id)
+            properties = self._file_properties(meta, parent_id)
+            icon = FOLDER_ICON if meta.is_directory else FILE_ICON
 
-        try:
+            page_id = None
             if existing_page_id:
                 print(f"[UPDATE] {meta.filename}")
-                try:
-                    self._client.pages.update(
-                        page_id=existing_page_id, properties=properties, icon=icon
-                    )
-                except Exception as e:
-                    # Fallback por nombre
-                    if "zK%3E%3A" in properties:
-                        del properties["zK%3E%3A"]
-                        properties["ítem principal"] = {"relation": [{"id": parent_id}]}
-                        try:
-                            self._client.pages.update(
-                                page_id=existing_page_id,
-                                properties=properties,
-                                icon=icon,
-                            )
-                        except Exception:
-                            # Si falla todo, sin padre
-                            if "ítem principal" in properties:
-                                del properties["ítem principal"]
-                            self._client.pages.update(
-                                page_id=existing_page_id,
-                                properties=properties,
-                                icon=icon,
-                            )
-
-            else:
+                page_id = self._update_live(
+                    existing_page_id, rel_id, properties=properties, icon=icon
+                )
+            if page_id is None:
                 print(f"[CREATE] {meta.filename}")
-                try:
-                    self._client.pages.create(
-                        parent={"database_id": self._db_id},
-                        properties=properties,
-                        icon=icon,
-                    )
-                except Exception as e:
-                    # Fallback por nombre
-                    if "zK%3E%3A" in properties:
-                        del properties["zK%3E%3A"]
-                        properties["ítem principal"] = {"relation": [{"id": parent_id}]}
-                        try:
-                            self._client.pages.create(
-                                parent={"database_id": self._db_id},
-                                properties=properties,
-                                icon=icon,
-                            )
-                        except Exception:
-                            # Si falla todo, sin padre
-                            if "ítem principal" in properties:
-                                del properties["ítem principal"]
-                            self._client.pages.create(
-                                parent={"database_id": self._db_id},
-                                properties=properties,
-                                icon=icon,
-                            )
+                new_page = self._create_page(
+                    rel_id,
+                    parent={"database_id": self._db_id},
+                    properties=properties,
+                    icon=icon,
+                )
+                page_id = new_page["id"]
+
+            self._remember(rel_id, self._synced_state(page_id, meta, parent_id))
         except Exception as e:
-            print(f"[ERROR] Syncing {meta.filename}: {e}")
+            raise RuntimeError(f"Syncing {meta.filename}: {e}") from e
 
-    def mark_as_missing(self, relative_path: Path) -> None:
+    def mark_as_missing(self, relative_path: Path, page_id: str | None = None) -> None:
         rel_id = relative_path.as_posix()
-        page_id = self._find_page_by_relative_id(rel_id)
-        if page_id:
-            print(f"[DELETE] {relative_path}")
-            self._client.pages.update(page_id=page_id, archived=True)
+        # Con el page_id del snapshot no hace falta volver a resolverlo
+        page_id = page_id or self._find_page_by_relative_id(rel_id)
+        if not page_id:
+            return
+        print(f"[DELETE] {relative_path}")
+        try:
+            self._update_page(page_id=page_id, archived=True)
+        except NotionAPIError as e:
+            # Ya borrada o archivada (a mano, o por un run cortado tras el
+            # PATCH): solo queda olvidarla
+            if not _page_gone(e):
+                raise
+        self._forget(rel_id)
+
+    def _update_live(self, page_id: str, rel_id: str, **body: Any) -> str | None:
+        """Actualiza `page_id` y retorna la página escrita. Si en Notion estaba
+        archivada o borrada (el índice todavía la tenía), la olvida y actualiza
+        en su lugar la página viva con el mismo RelativeID, si hay; None: no
+        hay ninguna y el item se tiene que volver a crear."""
+        try:
+            self._update_page(page_id=page_id, **body)
+            return page_id
+        except NotionAPIError as e:
+            if not _page_gone(e):
+                raise
+        print(f"[WARN] The page of {rel_id} was archived in Notion; syncing it again.")
+        self._forget(rel_id)
+        live = self._query_relative_id(rel_id)
+        if live is None or live["id"] == page_id:
+            return None
+        self._update_page(page_id=live["id"], **body)
+        return live["id"]
 
     def move_file(self, old_relative_path: Path, meta: FileMeta) -> None:
         old_rel_id = old_relative_path.as_posix()
-        new_rel_id = meta.relative_path.as_posix()
+        new_rel_id = meta.rel_id
 
         print(f"[MOVE] {old_rel_id} -> {new_rel_id}")
 
@@ -335,53 +513,25 @@ class NotionRepository(INotionRepository):
                 self.upsert_file(meta)
                 return
 
-            # 2. Preparar propiedades actualizadas
-            magic_link = self._link_gen.generate(meta.relative_path)
-
-            properties: dict[str, Any] = {
-                "Name": {"title": [{"text": {"content": meta.filename}}]},
-                "RelativeID": {"rich_text": [{"text": {"content": new_rel_id}}]},
-                "Extension": {
-                    "rich_text": [
-                        {
-                            "text": {
-                                "content": (
-                                    "FOLDER"
-                                    if meta.is_directory
-                                    else meta.extension.lower().replace(".", "")
-                                    or "None"
-                                )
-                            }
-                        }
-                    ]
-                },
-                "MagicLink": {"url": magic_link},
-            }
-
-            # 3. Actualizar Padre (si cambió de carpeta)
-            parent_id = self._ensure_parent_folder(meta.relative_path)
-            if parent_id:
-                # Usamos el ID de la propiedad directamente: 'zK%3E%3A' (ítem principal)
-                properties["zK%3E%3A"] = {"relation": [{"id": parent_id}]}
+            # 2. Propiedades actualizadas, incluido el padre (si cambió de carpeta)
+            parent_id = self._ensure_parent_folder(new_rel_id)
+            properties = self._file_properties(meta, parent_id)
 
-            # 4. Ejecutar actualización
-            try:
-                self._client.pages.update(page_id=page_id, properties=properties)
-            except Exception as e:
-                # Fallback por nombre si falla ID de propiedad
-                if "zK%3E%3A" in properties:
-                    del properties["zK%3E%3A"]
-                    properties["ítem principal"] = {"relation": [{"id": parent_id}]}
-                    try:
-                        self._client.pages.update(
-                            page_id=page_id, properties=properties
-                        )
-                    except Exception:
-                        if "ítem principal" in properties:
-                            del properties["ítem principal"]
-                        self._client.pages.update(
-                            page_id=page_id, properties=properties
-                        )
+            # 3. Ejecutar actualización
+            page_id = self._update_live(page_id, old_rel_id, properties=properties)
+            if page_id is None:
+                # Archivada en Notion: se crea en la ruta nueva
+                self.upsert_file(meta)
+                return
+
+            # 4. Reflejar el movimiento en la caché / state store
+            self._forget(old_rel_id)
+            self._remember(new_rel_id, self._synced_state(page_id, meta, parent_id))
 
         except Exception as e:
-            print(f"[ERROR] Moving {old_relative_path}: {e}")
+            raise RuntimeError(f"Moving {old_relative_path}: {e}") from e
+
+
+def _page_gone(error: NotionAPIError) -> bool:
+    """La página ya no existe o está archivada (no se puede editar)."""
+    return error.status == 404 or (error.status == 400 and "archived" in str(error))
@@ -0,0 +1,247 @@
+"""
+CRC Card:
+    Class: NotionHttp
+    Responsibilities:
+        - Single entry point for every Notion API request made by the repository.
+        - Takes a token from the shared rate limiter before each attempt.
+        - Classifies failures as retryable (429, 409, 5xx, timeouts, network
+          errors) or fatal (any other 4xx).
+        - Honours Retry-After, otherwise backs off exponentially with jitter.
+        - Spends retries from a per-run budget shared by all workers.
+        - Before retrying a non-idempotent request whose outcome is unknown
+          (timeout, 5xx), asks the caller to reconcile: a create that did land
+          is returned instead of being sent twice.
+        - Reports every attempt (endpoint, status, latency), retry and
+          rate-limiter wait to the run metrics.
+        - Owns one long-lived, pooled keep-alive httpx.Client (HTTP/2 when the
+          optional `h2` package is installed).
+    Collaborators:
+        - TokenBucket
+        - NotionRepository
+        - IMetrics
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import httpx
+
+from src.domain import IMetrics
+from src.infrastructure.rate_limiter import TokenBucket
+
+try:
+    import h2  # noqa: F401  (habilita HTTP/2 en httpx)
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+RETRYABLE_STATUS = {409, 429, 500, 502, 503, 504}
+
+
+def endpoint_name(method: str, path: str) -> str:
+    """Etiqueta estable del request para las métricas (sin IDs): "pages.update"."""
+    parts = path.strip("/").split("/")
+    if parts[0] == "databases":
+        if parts[-1] == "query":
+            return "databases.query"
+        return "databases.update" if method == "PATCH" else "databases.retrieve"
+    if parts[0] == "pages":
+        return "pages.create" if method == "POST" else "pages.update"
+    return f"{parts[0]}.{method.lower()}"
+
+
+def _retry_reason(error: "NotionAPIError") -> str:
+    if error.status is None:
+        return "transport"
+    return "5xx" if error.status >= 500 else str(error.status)
+
+
+class NotionAPIError(Exception):
+    """Request a Notion que falló del todo (status fatal o reintentos agotados)."""
+
+    def __init__(self, message: str, status: int | None = None, code: str = ""):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+class RetryBudgetExhausted(NotionAPIError):
+    """El run ya gastó todos sus reintentos: falla rápido en vez de insistir."""
+
+
+@dataclass(frozen=True)
+class HttpSettings:
+    max_connections: int = 10
+    max_keepalive: int = 10
+    keepalive_expiry: float = 60.0
+    timeout: float = 30.0
+    http2: bool = True
+
+
+def build_http_client(
+    api_token: str, settings: HttpSettings | None = None
+) -> httpx.Client:
+    """Cliente con pool de conexiones, la URL base y los headers de Notion."""
+    settings = settings or HttpSettings()
+    http2 = settings.http2 and HTTP2_AVAILABLE
+    return httpx.Client(
+        base_url=f"{NOTION_API_URL}/",
+        headers={
+            "Authorization": f"Bearer {api_token}",
+            "Notion-Version": NOTION_VERSION,
+            "Content-Type": "application/json",
+        },
+        limits=httpx.Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive,
+            keepalive_expiry=settings.keepalive_expiry,
+        ),
+        timeout=settings.timeout,
+        http2=http2,
+    )
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 6
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+    # Reintentos totales permitidos por run, compartidos entre todos los workers
+    run_budget: int = 500
+
+    def backoff(self, attempt: int) -> float:
+        """Backoff exponencial con full jitter para el reintento dado (desde 0)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+class NotionHttp:
+    def __init__(
+        self,
+        client: httpx.Client,
+        limiter: TokenBucket,
+        policy: RetryPolicy | None = None,
+        metrics: IMetrics | None = None,
+    ):
+        self._client = client
+        self._limiter = limiter
+        self._policy = policy or RetryPolicy()
+        self._metrics = metrics
+        self._budget_lock = threading.Lock()
+        self._retries_left = self._policy.run_budget
+
+    @property
+    def retries_left(self) -> int:
+        return self._retries_left
+
+    def reset_budget(self):
+        """Nuevo run: presupuesto de reintentos lleno (el cliente sobrevive al run)."""
+        with self._budget_lock:
+            self._retries_left = self._policy.run_budget
+
+    def close(self):
+        self._client.close()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: dict[str, Any] | None = None,
+        params: list[tuple[str, str]] | None = None,
+        reconcile: Callable[[], dict[str, Any] | None] | None = None,
+    ) -> dict[str, Any]:
+        """Envía un request a la API y reintenta las fallas transitorias.
+
+        `reconcile` (para los creates) corre antes de reintentar un intento que
+        pudo haberse aplicado igual; si encuentra el resultado, se devuelve ese.
+        """
+        endpoint = endpoint_name(method, path)
+        attempt = 0
+        while True:
+            waited = time.perf_counter()
+            self._limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = self._client.request(method, path, json=body, params=params)
+            except httpx.TransportError as e:
+                # Timeouts y errores de red: siempre reintentables
+                self._record(endpoint, "error", waited, started)
+                error = NotionAPIError(f"{method} {path}: {e!r}")
+                delay = self._policy.backoff(attempt)
+            else:
+                self._record(endpoint, str(response.status_code), waited, started)
+                if response.is_success:
+                    return response.json()
+                error = self._to_error(method, path, response)
+                if response.status_code not in RETRYABLE_STATUS:
+                    raise error
+                delay = self._retry_after(response)
+                if delay is None:
+                    delay = self._policy.backoff(attempt)
+                if response.status_code == 429:
+                    # Frenamos a todos los workers, no solo a este
+                    self._limiter.pause(delay)
+
+            attempt += 1
+            if attempt >= self._policy.max_attempts:
+                raise error
+            if reconcile and (error.status is None or error.status >= 500):
+                landed = reconcile()
+                if landed is not None:
+                    print(f"[RETRY] {method} {path} had succeeded; not resending.")
+                    return landed
+            self._spend_retry(error)
+            if self._metrics:
+                self._metrics.increment(
+                    "api_retries_total", endpoint=endpoint, reason=_retry_reason(error)
+                )
+                self._metrics.increment("retry_wait_seconds_total", delay)
+            print(f"[RETRY] {method} {path} in {delay:.1f}s ({error})")
+            time.sleep(delay)
+
+    def _record(self, endpoint: str, status: str, waited: float, started: float):
+        if not self._metrics:
+            return
+        now = time.perf_counter()
+        self._metrics.increment("api_requests_total", endpoint=endpoint, status=status)
+        self._metrics.observe(
+            "api_request_duration_seconds", now - started, endpoint=endpoint
+        )
+        self._metrics.increment("throttle_wait_seconds_total", started - waited)
+
+    def _spend_retry(self, error: NotionAPIError):
+        with self._budget_lock:
+            if self._retries_left <= 0:
+                raise RetryBudgetExhausted(
+                    f"Retry budget exhausted; last error: {error}",
+                    error.status,
+                    error.code,
+                )
+            self._retries_left -= 1
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> float | None:
+        value = response.headers.get("Retry-After")
+        try:
+            return max(0.0, float(value)) if value is not None else None
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _to_error(method: str, path: str, response: httpx.Response) -> NotionAPIError:
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        code = data.get("code", "")
+        message = data.get("message") or response.text[:200]
+        return NotionAPIError(
+            f"{method} {path} -> {response.status_code} {code}: {message}",
+            response.status_code,
+            code,
+        )
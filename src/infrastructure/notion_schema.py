@@ -0,0 +1,198 @@
+"""
+CRC Card:
+    Class: NotionSchema
+    Responsibilities:
+        - Resolves, once per run, the real property IDs and names of the
+          database (title, RelativeID, Extension, MagicLink, Size, Modified,
+          Fingerprint, Device and the parent relation) from the
+          databases.retrieve response.
+        - Lists the properties the sync needs that the database lacks.
+        - Builds page payloads keyed by property ID, so every write is a
+          single request, and parses query results back into RemotePage.
+    Collaborators:
+        - NotionRepository
+        - RemotePage
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+from src.domain import RemotePage
+
+SIZE_PROPERTY = "Size"
+MODIFIED_PROPERTY = "Modified"
+FINGERPRINT_PROPERTY = "Fingerprint"
+DEVICE_PROPERTY = "Device"
+# Nombres aceptados para la relación de jerarquía (Español / Inglés)
+PARENT_PROPERTIES = ("ítem principal", "Parent item")
+REQUIRED_PROPERTIES = {
+    "RelativeID": "rich_text",
+    "Extension": "rich_text",
+    "MagicLink": "url",
+}
+
+
+class SchemaError(ValueError):
+    """A la base le falta una propiedad que el sync no puede crear solo."""
+
+
+@dataclass(frozen=True)
+class PropertyRef:
+    id: str
+    name: str
+
+
+@dataclass(frozen=True)
+class NotionSchema:
+    title: PropertyRef
+    relative_id: PropertyRef
+    extension: PropertyRef
+    magic_link: PropertyRef
+    size: PropertyRef | None = None
+    modified: PropertyRef | None = None
+    parent: PropertyRef | None = None
+    fingerprint: PropertyRef | None = None
+    device: PropertyRef | None = None
+
+    @staticmethod
+    def missing_properties(
+        properties: dict[str, Any],
+        database_id: str,
+        fingerprint: bool = False,
+        device: bool = False,
+    ) -> dict[str, Any]:
+        """Propiedades a agregar, todas en un solo databases.update."""
+        missing: dict[str, Any] = {
+            name: {"number": {}}
+            for name in (SIZE_PROPERTY, MODIFIED_PROPERTY)
+            if name not in properties
+        }
+        if fingerprint and FINGERPRINT_PROPERTY not in properties:
+            missing[FINGERPRINT_PROPERTY] = {"rich_text": {}}
+        if device and DEVICE_PROPERTY not in properties:
+            missing[DEVICE_PROPERTY] = {"rich_text": {}}
+        if _find_parent(properties) is None:
+            # Relación dual (bidireccional) con la misma base de datos
+            missing["Parent item"] = {
+                "relation": {
+                    "database_id": database_id,
+                    "type": "dual_property",
+                    "dual_property": {},
+                }
+            }
+        return missing
+
+    @classmethod
+    def from_properties(cls, properties: dict[str, Any]) -> "NotionSchema":
+        def ref(name: str) -> PropertyRef:
+            return PropertyRef(properties[name]["id"], name)
+
+        for name, type_ in REQUIRED_PROPERTIES.items():
+            if properties.get(name, {}).get("type") != type_:
+                raise SchemaError(f"Property '{name}' ({type_}) missing in database")
+
+        title = next(
+            (name for name, prop in properties.items() if prop["type"] == "title"),
+            None,
+        )
+        if title is None:
+            raise SchemaError("Database has no title property")
+
+        def optional(name: str, type_: str) -> PropertyRef | None:
+            prop = properties.get(name)
+            return ref(name) if prop and prop["type"] == type_ else None
+
+        parent = _find_parent(properties)
+        return cls(
+            title=ref(title),
+            relative_id=ref("RelativeID"),
+            extension=ref("Extension"),
+            magic_link=ref("MagicLink"),
+            size=optional(SIZE_PROPERTY, "number"),
+            modified=optional(MODIFIED_PROPERTY, "number"),
+            parent=ref(parent) if parent else None,
+            fingerprint=optional(FINGERPRINT_PROPERTY, "rich_text"),
+            device=optional(DEVICE_PROPERTY, "rich_text"),
+        )
+
+    def page_properties(
+        self,
+        *,
+        name: str,
+        rel_id: str,
+        extension: str,
+        link: str,
+        size: int | None = None,
+        mtime: float | None = None,
+        parent_id: str | None = None,
+        fingerprint: str | None = None,
+        device: str | None = None,
+    ) -> dict[str, Any]:
+        """Payload por ID de propiedad; se omiten las opcionales que no existen."""
+        props: dict[str, Any] = {
+            self.title.id: {"title": [{"text": {"content": name}}]},
+            self.relative_id.id: {"rich_text": [{"text": {"content": rel_id}}]},
+            self.extension.id: {"rich_text": [{"text": {"content": extension}}]},
+            self.magic_link.id: {"url": link},
+        }
+        if self.size and size is not None:
+            props[self.size.id] = {"number": size}
+        if self.modified and mtime is not None:
+            props[self.modified.id] = {"number": mtime}
+        if self.parent and parent_id:
+            props[self.parent.id] = {"relation": [{"id": parent_id}]}
+        if self.fingerprint and fingerprint:
+            props[self.fingerprint.id] = {
+                "rich_text": [{"text": {"content": fingerprint}}]
+            }
+        if self.device and device:
+            props[self.device.id] = {"rich_text": [{"text": {"content": device}}]}
+        return props
+
+    def linked_parent(self, parent_id: str | None) -> str | None:
+        """Padre que queda guardado de verdad en un payload armado con `parent_id`."""
+        return parent_id if self.parent else None
+
+    def snapshot_property_ids(self) -> list[str]:
+        """Propiedades que usa `read`: el query no le pide nada más a Notion."""
+        refs = (
+            self.relative_id,
+            self.size,
+            self.modified,
+            self.parent,
+            self.fingerprint,
+        )
+        return [ref.id for ref in refs if ref]
+
+    def read(self, page: dict[str, Any]) -> tuple[str | None, RemotePage]:
+        """Extrae (RelativeID, RemotePage) de un resultado del query."""
+        props = page["properties"]
+
+        def text(ref: PropertyRef | None) -> str | None:
+            rich_text = props.get(ref.name, {}).get("rich_text") if ref else None
+            return rich_text[0]["text"]["content"] if rich_text else None
+
+        rel_id = text(self.relative_id)
+
+        def number(ref: PropertyRef | None) -> float | None:
+            return props.get(ref.name, {}).get("number") if ref else None
+
+        relation = (
+            props.get(self.parent.name, {}).get("relation") if self.parent else None
+        )
+        size = number(self.size)
+        return rel_id, RemotePage(
+            page_id=page["id"],
+            size_bytes=int(size) if size is not None else None,
+            last_modified_epoch=number(self.modified),
+            parent_id=relation[0]["id"] if relation else None,
+            fingerprint=text(self.fingerprint),
+        )
+
+
+def _find_parent(properties: dict[str, Any]) -> str | None:
+    """Nombre de la relación de la base consigo misma que arma la jerarquía."""
+    for name in PARENT_PROPERTIES:
+        if properties.get(name, {}).get("type") == "relation":
+            return name
+    return None
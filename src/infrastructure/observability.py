@@ -0,0 +1,151 @@
+"""
+CRC Card:
+    Module: Observability
+    Responsibilities:
+        - JsonLogStream: turns the tool's tagged print() lines ("[SYNC] ...")
+          into one JSON object per line (timestamp, level, tag, message), and
+          writes structured events such as the per-run summary.
+        - PrometheusTextFile: rewrites a Prometheus text file after each run
+          (node_exporter textfile collector style), atomically.
+        - PrometheusServer: serves the live metrics on /metrics (watch mode).
+    Collaborators:
+        - SyncMetrics
+"""
+
+import io
+import json
+import os
+import re
+import sys
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TextIO
+
+if TYPE_CHECKING:
+    from src.application.metrics import SyncMetrics
+
+_TAGGED = re.compile(r"^\[([A-Z][A-Z0-9 _-]*)\]\s*(.*)$")
+LEVELS = {
+    "ERROR": "error",
+    "FAILED": "error",
+    "CRITICAL": "error",
+    "WARN": "warning",
+    "MOVE WARN": "warning",
+    "RETRY": "warning",
+    "DEBUG": "debug",
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+class JsonLogStream(io.TextIOBase):
+    """Reemplazo de stdout: cada línea completa sale como un registro JSON."""
+
+    def __init__(self, stream: TextIO):
+        self._stream = stream
+        self._buffer = ""
+        self._lock = threading.Lock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            self._buffer += text
+            *lines, self._buffer = self._buffer.split("\n")
+            for line in lines:
+                if line.strip():
+                    self._emit(self._record(line))
+        return len(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def event(self, name: str, **fields: Any):
+        """Escribe un evento estructurado (p.ej. el resumen del run) aparte."""
+        with self._lock:
+            self._emit({"ts": _now(), "level": "info", "event": name, **fields})
+
+    @staticmethod
+    def _record(line: str) -> dict[str, Any]:
+        match = _TAGGED.match(line)
+        tag, message = match.groups() if match else (None, line.strip(" -"))
+        level = LEVELS.get(tag or "", "info")
+        if tag is None and message.startswith(("CRITICAL", "ERROR")):
+            level = "error"
+        elif tag is None and message.startswith("WARNING"):
+            level = "warning"
+        return {"ts": _now(), "level": level, "tag": tag, "msg": message}
+
+    def _emit(self, record: dict[str, Any]):
+        self._stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._stream.flush()
+
+
+def install_json_logging() -> JsonLogStream:
+    """Hace pasar cada print() por un JsonLogStream."""
+    stream = JsonLogStream(sys.stdout)
+    sys.stdout = stream
+    return stream
+
+
+class JsonRunSummary:
+    """Exporter: escribe el resumen de cada run como evento "run_summary"."""
+
+    def __init__(self, stream: JsonLogStream):
+        self._stream = stream
+
+    def __call__(self, metrics: "SyncMetrics"):
+        self._stream.event("run_summary", **metrics.last_run)
+
+
+class PrometheusTextFile:
+    """Exporter: reescribe `path` con todas las métricas al terminar cada run."""
+
+    def __init__(self, path: Path):
+        self._path = path
+
+    def __call__(self, metrics: "SyncMetrics"):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._path.with_name(self._path.name + ".tmp")
+        tmp.write_text(metrics.render_prometheus(), encoding="utf-8")
+        # Un scraper nunca debe leer el archivo a medio escribir
+        os.replace(tmp, self._path)
+
+
+class PrometheusServer:
+    """Sirve las métricas en vivo en http://<host>:<port>/metrics."""
+
+    def __init__(self, metrics: "SyncMetrics", port: int, host: str = "0.0.0.0"):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Sin una línea por scrape en el log
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-server", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+        host, port = self._server.server_address[:2]
+        print(f"[METRICS] Serving Prometheus metrics on http://{host}:{port}/metrics")
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
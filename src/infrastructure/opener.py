@@ -0,0 +1,520 @@
+"""
+CRC Card:
+    Module: Opener
+    Responsibilities:
+        - OpenerService: asyncio HTTP server that answers the MagicLinks
+          (GET /open?f=<base64 RelativeID>) on the desktop that holds the
+          files: resolves the RelativeID to a file under its watch directory
+          and opens it with the OS default application.
+        - Rejects anything that could leave the watch directory: absolute
+          paths, "..", backslashes, NUL, and symlinks resolving outside it.
+        - Only opens links this install wrote (HMAC of the path keyed with
+          OPENER_SECRET), followed by a click: requests a web page makes on
+          its own (fetch, images, iframes, other origins) are refused, and
+          executables are never launched unless explicitly allowed.
+        - PathIndex: the RelativeIDs synced so far, loaded from the sync state
+          files and reloaded in the background whenever they change, plus an
+          LRU of resolved paths. A link for an unknown RelativeID is refused
+          without touching the disk, and a recent one costs no syscall.
+        - Serves /health (liveness, index size), /stats (counters, cache hit
+          rate, latency percentiles) and /metrics (Prometheus).
+    Collaborators:
+        - SantiFSMagicLinkGenerator
+        - SyncStateStore (read-only)
+        - SyncMetrics
+"""
+
+import asyncio
+import html
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import suppress
+from pathlib import Path
+from typing import Awaitable, Callable
+from urllib.parse import parse_qs, urlsplit
+
+from src.application.metrics import SyncMetrics
+from src.infrastructure.magic_link import OPENER_PORT, decode_path, verify_path
+from src.infrastructure.state_store import read_synced_ids
+
+CACHE_SIZE = 4096
+REFRESH_INTERVAL = 2.0
+# Conexiones keep-alive inactivas se cierran pasado este tiempo
+IDLE_TIMEOUT = 30.0
+# Latencias recientes para /stats (percentiles exactos, no por bucket)
+LATENCY_WINDOW = 10000
+OPEN_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+PROMETHEUS_PREFIX = "santifs_opener"
+# Extensiones que el sistema ejecuta en lugar de abrir con una aplicación
+EXECUTABLE_EXTENSIONS = frozenset(
+    ".app .appimage .bat .cmd .com .command .cpl .desktop .exe .hta .jar .js "
+    ".jse .lnk .msc .msi .msp .pif .ps1 .reg .scr .sh .url .vb .vbe .vbs .ws "
+    ".wsf .wsh".split()
+)
+
+Launcher = Callable[[Path], Awaitable[None]]
+# Procesos lanzados que aún no terminaron (referencia para que no los recolecte el GC)
+_CHILDREN: set[asyncio.Task] = set()
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+class LinkRejected(ValueError):
+    """El request no debe abrir nada."""
+
+    def __init__(self, message: str, status: int = 403):
+        super().__init__(message)
+        self.status = status
+
+
+class PathRejected(LinkRejected):
+    """El enlace no nombra un archivo dentro de una carpeta observada."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message, status)
+
+
+def check_navigation(headers: dict[str, str]):
+    """LinkRejected salvo que el request sea una navegación de primer nivel,
+    lo que manda un click en un enlace. A los navegadores sin Fetch Metadata
+    solo les queda el chequeo de Origin; a ellos los cubre la firma."""
+    mode = headers.get("sec-fetch-mode")
+    if mode is not None and mode != "navigate":
+        raise LinkRejected(f"Not a link click (Sec-Fetch-Mode: {mode})")
+    dest = headers.get("sec-fetch-dest")
+    if dest is not None and dest != "document":
+        raise LinkRejected(f"Not a link click (Sec-Fetch-Dest: {dest})")
+    # Una navegación GET no manda Origin: si viene, lo pidió un script
+    origin = headers.get("origin")
+    if origin is not None:
+        raise LinkRejected(f"Cross-origin request from {origin}")
+
+
+def check_launchable(path: Path, allow_executables: bool = False):
+    """LinkRejected si abrir `path` lo ejecutaría."""
+    if not allow_executables and path.suffix.lower() in EXECUTABLE_EXTENSIONS:
+        raise LinkRejected(f"{path.name} is an executable; not opening it")
+
+
+def check_relative_id(rel_id: str) -> str:
+    """`rel_id` si es una ruta POSIX relativa común; si no, PathRejected."""
+    if not rel_id or "\x00" in rel_id or "\\" in rel_id:
+        raise PathRejected(f"Invalid path {rel_id!r}")
+    if rel_id.startswith("/") or rel_id[1:2] == ":" and rel_id[0].isalpha():
+        raise PathRejected(f"Absolute path {rel_id!r}")
+    if any(part in ("", ".", "..") for part in rel_id.split("/")):
+        raise PathRejected(f"Path {rel_id!r} must not contain '.', '..' or '//'")
+    return rel_id
+
+
+class _LRU:
+    def __init__(self, size: int):
+        self._size = size
+        self._items: OrderedDict[str, Path] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str) -> Path | None:
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Path):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self._size:
+            self._items.popitem(last=False)
+
+    def retain(self, keys: set[str]):
+        for key in [k for k in self._items if k not in keys]:
+            del self._items[key]
+
+
+class PathIndex:
+    """RelativeID -> archivo, para los enlaces que publicó el sync.
+
+    `roots` empareja cada carpeta observada con el namespace que prefija sus
+    RelativeID (None: sin prefijo de dispositivo); raíces de bases distintas
+    pueden compartir uno, y gana la primera que tenga el archivo. Sin archivos
+    de estado se acepta toda ruta bien formada bajo una raíz (se mira el disco).
+    """
+
+    def __init__(
+        self,
+        roots: list[tuple[str | None, Path]],
+        state_files: list[Path] = (),
+        cache_size: int = CACHE_SIZE,
+    ):
+        self._roots = [(ns, root.resolve()) for ns, root in roots]
+        self._state_files = list(state_files)
+        self._ids: set[str] | None = None
+        self._versions: tuple = ()
+        self._cache = _LRU(cache_size)
+        self.loaded_at: float | None = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self) -> int | None:
+        return None if self._ids is None else len(self._ids)
+
+    @property
+    def cached(self) -> int:
+        return len(self._cache)
+
+    def _version(self) -> tuple:
+        # El WAL cambia con cada escritura del sync, el archivo principal no siempre
+        version = []
+        for path in self._state_files:
+            for candidate in (path, path.with_name(path.name + "-wal")):
+                with suppress(OSError):
+                    stat = candidate.stat()
+                    version.append((str(candidate), stat.st_mtime_ns, stat.st_size))
+        return tuple(version)
+
+    def refresh(self) -> bool:
+        """Recarga los RelativeID sincronizados si cambió un archivo de estado
+        (bloqueante)."""
+        version = self._version()
+        if not self._state_files or version == self._versions:
+            return False
+        ids: set[str] = set()
+        for path in self._state_files:
+            try:
+                ids |= read_synced_ids(path)
+            except Exception as e:
+                # Un archivo a medio crear o bloqueado: se reintenta en la próxima vuelta
+                print(f"[WARN] Cannot read sync state {path}: {e}")
+                return False
+        self._ids, self._versions = ids, version
+        self.loaded_at = time.time()
+        return True
+
+    async def keep_fresh(self, interval: float = REFRESH_INTERVAL):
+        while True:
+            if await asyncio.to_thread(self.refresh):
+                # El LRU solo se toca desde el event loop
+                self._cache.retain(self._ids)
+                print(f"[OPENER] Index reloaded: {len(self._ids or ())} paths")
+            await asyncio.sleep(interval)
+
+    async def resolve(self, rel_id: str) -> Path | None:
+        """Ruta absoluta de `rel_id`, None si no se conoce o ya no está.
+
+        Lanza PathRejected si la ruta está mal formada o se sale de su raíz.
+        """
+        path = self._cache.get(rel_id)
+        if path is not None:
+            self.hits += 1
+            return path
+        self.misses += 1
+        check_relative_id(rel_id)
+        if self._ids is not None and rel_id not in self._ids:
+            return None
+        # En disco (resolve sigue symlinks) fuera del event loop
+        path = await asyncio.to_thread(self._locate, rel_id)
+        if path is not None:
+            self._cache.put(rel_id, path)
+        return path
+
+    def _locate(self, rel_id: str) -> Path | None:
+        prefix, _, rest = rel_id.partition("/")
+        for namespace, root in self._roots:
+            if namespace is None:
+                local = rel_id
+            elif namespace == prefix and rest:
+                local = rest
+            else:
+                continue
+            try:
+                path = root.joinpath(*local.split("/")).resolve(strict=True)
+            except (OSError, RuntimeError):
+                continue
+            if not path.is_relative_to(root):
+                raise PathRejected(f"{rel_id} resolves outside {root}", 403)
+            return path
+        return None
+
+
+async def launch_with_os(path: Path):
+    """Abre `path` con la aplicación predeterminada del escritorio."""
+    if sys.platform == "win32":
+        await asyncio.to_thread(os.startfile, path)
+        return
+    command = "open" if sys.platform == "darwin" else "xdg-open"
+    process = await asyncio.create_subprocess_exec(
+        command,
+        str(path),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    # Se espera en segundo plano: la respuesta no depende de la aplicación
+    task = asyncio.get_running_loop().create_task(process.wait())
+    _CHILDREN.add(task)
+    task.add_done_callback(_CHILDREN.discard)
+
+
+class OpenerService:
+    def __init__(
+        self,
+        index: PathIndex,
+        launcher: Launcher | None = launch_with_os,
+        metrics: SyncMetrics | None = None,
+        host: str = "127.0.0.1",
+        port: int = OPENER_PORT,
+        refresh_interval: float = REFRESH_INTERVAL,
+        secret: str | None = None,
+        allow_executables: bool = False,
+    ):
+        self.index = index
+        # None: solo resuelve (pruebas de carga, healthchecks)
+        self._launcher = launcher
+        # None: enlaces sin firma (solo el control de navegación los protege)
+        self._secret = secret or None
+        self._allow_executables = allow_executables
+        self.metrics = metrics or SyncMetrics(buckets=OPEN_BUCKETS)
+        self._host = host
+        self.port = port
+        self._refresh_interval = refresh_interval
+        self._server: asyncio.Server | None = None
+        self._refresher: asyncio.Task | None = None
+        self._started = time.monotonic()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._results: Counter[str] = Counter()
+        # Conexiones abiertas: close() las termina antes de cerrar el loop
+        self._connections: dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def start(self):
+        await asyncio.to_thread(self.index.refresh)
+        self._server = await asyncio.start_server(
+            self._handle, self._host, self.port, reuse_address=True
+        )
+        # port=0: el sistema elige uno libre
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._refresher = asyncio.create_task(
+            self.index.keep_fresh(self._refresh_interval)
+        )
+        size = self.index.size
+        print(
+            f"[OPENER] Listening on http://{self._host}:{self.port} "
+            f"({'no index' if size is None else f'{size} paths indexed'})"
+        )
+        if not self._secret:
+            print(
+                "[WARN] OPENER_SECRET is not set: any web page you visit can "
+                "open your synced files through this service."
+            )
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self._refresher:
+            self._refresher.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._refresher
+        if self._server:
+            self._server.close()
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+
+    # --- HTTP ---
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT
+                    )
+                except (
+                    asyncio.IncompleteReadError,
+                    asyncio.LimitOverrunError,
+                    asyncio.TimeoutError,
+                    ConnectionError,
+                ):
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    if value:
+                        headers[name.strip().lower()] = value.strip()
+                parts = request_line.split(" ")
+                if len(parts) != 3:
+                    await self._respond(writer, 400, "text/plain", b"Bad request\n")
+                    break
+                method, target, version = parts
+                # Sin cuerpo útil: si lo hay, se descarta para no romper keep-alive
+                length = headers.get("content-length", "0")
+                if length.isdigit() and int(length):
+                    await reader.readexactly(int(length))
+                status, content_type, body = await self._dispatch(
+                    method, target, headers
+                )
+                keep_alive = (
+                    version == "HTTP/1.1"
+                    and headers.get("connection", "").lower() != "close"
+                )
+                await self._respond(
+                    writer,
+                    status,
+                    content_type,
+                    b"" if method == "HEAD" else body,
+                    keep_alive,
+                )
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self._connections[task]
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    @staticmethod
+    async def _respond(
+        writer: asyncio.StreamWriter,
+        status: int,
+        content_type: str,
+        body: bytes,
+        keep_alive: bool = False,
+    ):
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Cache-Control: no-store\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(
+        self, method: str, target: str, headers: dict[str, str] | None = None
+    ) -> tuple[int, str, bytes]:
+        if method not in ("GET", "HEAD"):
+            return 405, "text/plain", b"Method not allowed\n"
+        url = urlsplit(target)
+        if url.path == "/open":
+            query = parse_qs(url.query)
+            return await self._open(
+                query.get("f", [""])[0], query.get("s", [""])[0], headers or {}
+            )
+        if url.path == "/health":
+            return 200, "application/json", self._json(self.health())
+        if url.path == "/stats":
+            return 200, "application/json", self._json(self.stats())
+        if url.path == "/metrics":
+            text = self.metrics.render_prometheus(PROMETHEUS_PREFIX)
+            return 200, "text/plain; version=0.0.4", text.encode()
+        return 404, "text/plain", b"Not found\n"
+
+    @staticmethod
+    def _json(payload: dict) -> bytes:
+        return json.dumps(payload).encode()
+
+    # --- /open ---
+
+    async def _open(
+        self, token: str, signature: str = "", headers: dict[str, str] | None = None
+    ) -> tuple[int, str, bytes]:
+        started = time.perf_counter()
+        try:
+            check_navigation(headers or {})
+            rel_id = decode_path(token)
+            if self._secret and not verify_path(rel_id, signature, self._secret):
+                raise LinkRejected(f"Link for {rel_id} is not signed by this install")
+            path = await self.index.resolve(rel_id)
+            if path is None:
+                status, result, message = 404, "not_found", f"{rel_id} is not synced"
+            else:
+                check_launchable(path, self._allow_executables)
+                if self._launcher:
+                    await self._launcher(path)
+                status, result, message = 200, "opened", f"Opening {path.name}"
+        except LinkRejected as e:
+            status, result, message = e.status, "rejected", str(e)
+        except ValueError as e:
+            status, result, message = 400, "rejected", str(e)
+        except OSError as e:
+            # El archivo existe pero el sistema no pudo abrirlo
+            status, result, message = 500, "launch_failed", str(e)
+        elapsed = time.perf_counter() - started
+        self._latencies.append(elapsed)
+        self._results[result] += 1
+        self.metrics.increment("opens_total", result=result)
+        self.metrics.observe("open_duration_seconds", elapsed)
+        if status >= 400:
+            print(f"[OPENER] {status} {message}")
+        return status, "text/html; charset=utf-8", self._page(message)
+
+    @staticmethod
+    def _page(message: str) -> bytes:
+        # La pestaña que abrió el navegador se cierra sola si puede
+        return (
+            "<!doctype html><title>SantiFS</title>"
+            f"<p>{html.escape(message)}</p><script>setTimeout(() => window.close(), 1500)</script>"
+        ).encode()
+
+    # --- /health, /stats ---
+
+    def health(self) -> dict:
+        loaded_at = self.index.loaded_at
+        return {
+            "status": "ok",
+            "uptime_s": round(time.monotonic() - self._started, 1),
+            "indexed": self.index.size,
+            "index_age_s": round(time.time() - loaded_at, 1) if loaded_at else None,
+        }
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+
+        def percentile(q: float) -> float | None:
+            if not latencies:
+                return None
+            return round(
+                latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 3
+            )
+
+        lookups = self.index.hits + self.index.misses
+        return {
+            **self.health(),
+            "opens": dict(self._results),
+            "cache": {
+                "size": self.index.cached,
+                "hits": self.index.hits,
+                "misses": self.index.misses,
+                "hit_rate": round(self.index.hits / lookups, 3) if lookups else None,
+            },
+            "latency_ms": {
+                "window": len(latencies),
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(latencies[-1] * 1000, 3) if latencies else None,
+            },
+        }
@@ -0,0 +1,52 @@
+"""
+CRC Card:
+    Class: TokenBucket
+    Responsibilities:
+        - Shares one request budget between every worker thread.
+        - Refills at a steady rate (Notion allows ~3 req/s per integration)
+          while allowing short bursts up to a fixed capacity.
+        - Lets the request layer pause every worker after a 429.
+    Collaborators:
+        - NotionRepository
+"""
+
+import threading
+import time
+
+NOTION_REQUESTS_PER_SECOND = 3.0
+NOTION_BURST = 6
+
+
+class TokenBucket:
+    def __init__(
+        self, rate: float = NOTION_REQUESTS_PER_SECOND, burst: int = NOTION_BURST
+    ):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be > 0 and burst >= 1")
+        self._rate = rate
+        self._capacity = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0):
+        """Bloquea hasta que haya `tokens` disponibles y los consume."""
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self._rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Retiene los tokens `seconds` segundos (p.ej. tras un 429) para todos."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, -seconds * self._rate)
@@ -0,0 +1,394 @@
+"""
+CRC Card:
+    Class: SyncStateStore
+    Responsibilities:
+        - Persists the last known Notion state per RelativeID (page_id, size,
+          mtime, parent page_id, last-synced time) in a local SQLite file,
+          plus the local (st_dev, st_ino) the item was uploaded from, which
+          Notion does not store and move detection needs.
+        - Caches content fingerprints by (st_dev, st_ino, size, mtime, ctime),
+          so an unchanged file is never hashed twice (kept across database
+          resets).
+        - Remembers the reconciliation watermark so warm runs only fetch pages
+          edited since the previous run.
+        - Journals the planned operations of the current run and checkpoints
+          each one (planned / in_flight / done / failed), so an interrupted
+          run can be resumed. Each sync target sharing the file journals in
+          its own scope (`journal(scope)`).
+        - Is safe to share between threads (single connection behind a lock).
+        - Lets other processes (the opener service) read the synced
+          RelativeIDs without opening the store (`read_synced_ids`).
+    Collaborators:
+        - RemotePage
+        - JournalEntry
+        - NotionRepository
+        - Synchronizer
+"""
+
+import sqlite3
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.domain import FileMeta, ISyncJournal, JournalEntry, RemotePage
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    rel_id TEXT PRIMARY KEY,
+    page_id TEXT NOT NULL,
+    size INTEGER,
+    mtime REAL,
+    parent_id TEXT,
+    synced_at REAL NOT NULL,
+    dev INTEGER,
+    ino INTEGER,
+    fingerprint TEXT,
+    link_key TEXT
+);
+CREATE INDEX IF NOT EXISTS items_page_id ON items (page_id);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    ctime REAL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (dev, ino)
+);
+CREATE TABLE IF NOT EXISTS journal (
+    scope TEXT NOT NULL DEFAULT '',
+    rel_id TEXT NOT NULL,
+    action TEXT NOT NULL,
+    old_rel_id TEXT,
+    page_id TEXT,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (scope, rel_id)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SyncStateStore:
+    def __init__(self, path: Path, database_id: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate_journal()
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._bind_database(database_id)
+
+    def _migrate(self):
+        """Agrega las columnas que aparecieron después de crear el archivo."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(items)")}
+        added = {
+            "dev": "INTEGER",
+            "ino": "INTEGER",
+            "fingerprint": "TEXT",
+            "link_key": "TEXT",
+        }
+        with self._conn:
+            for column, type_ in added.items():
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE items ADD COLUMN {column} {type_}")
+
+    def _migrate_journal(self):
+        """El journal sumó el scope a su clave; como guarda un solo run, la tabla
+        de antes se recrea (y ese run se vuelve a planear)."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(journal)")}
+        if columns and "scope" not in columns:
+            with self._conn:
+                self._conn.execute("DROP TABLE journal")
+                self._conn.execute("DELETE FROM meta WHERE key = 'journal_started'")
+
+    def _bind_database(self, database_id: str):
+        """Descarta el estado guardado si es de otra base."""
+        stored = self._get_meta("database_id")
+        if stored == database_id:
+            return
+        if stored is not None:
+            print(f"[STATE] State at {self._path} belongs to {stored}; resetting.")
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM items")
+            self._conn.execute("DELETE FROM journal")
+            self._conn.execute("DELETE FROM meta")
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('database_id', ?)",
+                (database_id,),
+            )
+
+    def _get_meta(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    @property
+    def watermark(self) -> str | None:
+        """Timestamp ISO de la última reconciliación exitosa con Notion."""
+        return self._get_meta("last_reconciled")
+
+    @watermark.setter
+    def watermark(self, value: str):
+        self._set_meta("last_reconciled", value)
+
+    @property
+    def last_full_reconcile(self) -> str | None:
+        """Timestamp ISO del último fetch completo de la base."""
+        return self._get_meta("last_full_reconcile")
+
+    @last_full_reconcile.setter
+    def last_full_reconcile(self, value: str):
+        self._set_meta("last_full_reconcile", value)
+
+    def load(self) -> dict[str, RemotePage]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rel_id, page_id, size, mtime, parent_id, dev, ino, "
+                "fingerprint, link_key FROM items"
+            ).fetchall()
+        # Sin link_key: escrito antes de que se firmaran los enlaces, o traído
+        # de Notion sin que este índice lo escribiera; en ambos casos sin firma
+        return {
+            rel_id: RemotePage(
+                page_id,
+                size,
+                mtime,
+                parent_id,
+                (dev, ino) if ino is not None else None,
+                fingerprint,
+                link_key or "",
+            )
+            for (
+                rel_id,
+                page_id,
+                size,
+                mtime,
+                parent_id,
+                dev,
+                ino,
+                fingerprint,
+                link_key,
+            ) in rows
+        }
+
+    def put(self, rel_id: str, page: RemotePage):
+        with self._lock, self._conn:
+            self._upsert(rel_id, page, time.time())
+
+    def put_many(self, pages: dict[str, RemotePage]):
+        now = time.time()
+        with self._lock, self._conn:
+            for rel_id, page in pages.items():
+                self._upsert(rel_id, page, now)
+
+    def _upsert(self, rel_id: str, page: RemotePage, synced_at: float):
+        # Una página que cambió de RelativeID no debe quedar bajo la ruta vieja.
+        self._conn.execute(
+            "DELETE FROM items WHERE page_id = ? AND rel_id != ?",
+            (page.page_id, rel_id),
+        )
+        dev, ino = page.file_key or (None, None)
+        # Lo leído de Notion no trae file_key ni link_key: se conservan los de
+        # la misma página
+        self._conn.execute(
+            "INSERT INTO items "
+            "(rel_id, page_id, size, mtime, parent_id, synced_at, dev, ino, "
+            "fingerprint, link_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (rel_id) DO UPDATE SET "
+            "page_id = excluded.page_id, size = excluded.size, "
+            "mtime = excluded.mtime, parent_id = excluded.parent_id, "
+            "synced_at = excluded.synced_at, fingerprint = excluded.fingerprint, "
+            "dev = CASE WHEN excluded.ino IS NOT NULL THEN excluded.dev "
+            "WHEN items.page_id = excluded.page_id THEN items.dev END, "
+            "ino = CASE WHEN excluded.ino IS NOT NULL THEN excluded.ino "
+            "WHEN items.page_id = excluded.page_id THEN items.ino END, "
+            "link_key = CASE WHEN excluded.link_key IS NOT NULL "
+            "THEN excluded.link_key "
+            "WHEN items.page_id = excluded.page_id THEN items.link_key END",
+            (
+                rel_id,
+                page.page_id,
+                page.size_bytes,
+                page.last_modified_epoch,
+                page.parent_id,
+                synced_at,
+                dev,
+                ino,
+                page.fingerprint,
+                page.link_key,
+            ),
+        )
+
+    def delete(self, rel_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM items WHERE rel_id = ?", (rel_id,))
+
+    def replace_all(self, pages: dict[str, RemotePage]):
+        """Pisa todo el índice tras un fetch completo (se conservan los file_key
+        y link_key)."""
+        now = time.time()
+        with self._lock, self._conn:
+            keys = {
+                page_id: ((dev, ino) if ino is not None else None, link_key)
+                for page_id, dev, ino, link_key in self._conn.execute(
+                    "SELECT page_id, dev, ino, link_key FROM items "
+                    "WHERE ino IS NOT NULL OR link_key IS NOT NULL"
+                )
+            }
+            self._conn.execute("DELETE FROM items")
+            for rel_id, page in pages.items():
+                if page.page_id in keys:
+                    file_key, link_key = keys[page.page_id]
+                    page = replace(
+                        page,
+                        file_key=page.file_key or file_key,
+                        link_key=(
+                            page.link_key if page.link_key is not None else link_key
+                        ),
+                    )
+                self._upsert(rel_id, page, now)
+
+    def get_fingerprint(self, meta: FileMeta) -> str | None:
+        if meta.file_key is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest FROM fingerprints WHERE dev = ? AND ino = ? "
+                "AND size = ? AND mtime = ? AND ctime IS ?",
+                (
+                    *meta.file_key,
+                    meta.size_bytes,
+                    meta.last_modified_epoch,
+                    meta.status_change_epoch,
+                ),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_fingerprints(self, metas: list[FileMeta]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO fingerprints "
+                "(dev, ino, size, mtime, ctime, digest) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        *m.file_key,
+                        m.size_bytes,
+                        m.last_modified_epoch,
+                        m.status_change_epoch,
+                        m.fingerprint,
+                    )
+                    for m in metas
+                    if m.file_key is not None and m.fingerprint
+                ],
+            )
+
+    # --- Journal del run en curso ---
+
+    def journal(self, scope: str) -> ISyncJournal:
+        """El journal de un target (varios pueden compartir este archivo)."""
+        return ScopedJournal(self, scope)
+
+    @staticmethod
+    def _journal_key(scope: str) -> str:
+        return f"journal_started:{scope}" if scope else "journal_started"
+
+    def run_started(self, scope: str = "") -> str | None:
+        """Timestamp ISO del run cuyo journal sigue abierto, si hay uno."""
+        return self._get_meta(self._journal_key(scope))
+
+    def begin_run(self, entries: list[JournalEntry], scope: str = ""):
+        """Reemplaza el journal por el plan de un run nuevo."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM journal WHERE scope = ?", (scope,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO journal "
+                "(scope, rel_id, action, old_rel_id, page_id, state, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (scope, e.rel_id, e.action, e.old_rel_id, e.page_id, e.state, now)
+                    for e in entries
+                ],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (self._journal_key(scope), datetime.now(timezone.utc).isoformat()),
+            )
+
+    def pending_run(self, scope: str = "") -> list[JournalEntry]:
+        """Entradas sin terminar de un run cortado ([] si no hay ninguno abierto)."""
+        if self.run_started(scope) is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rel_id, action, old_rel_id, page_id, state FROM journal "
+                "WHERE scope = ? AND state != 'done'",
+                (scope,),
+            ).fetchall()
+        return [JournalEntry(*row) for row in rows]
+
+    def mark(self, rel_id: str, state: str, scope: str = ""):
+        # Un commit por checkpoint: tiene que sobrevivir a un corte del proceso
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE journal SET state = ?, updated_at = ? "
+                "WHERE scope = ? AND rel_id = ?",
+                (state, time.time(), scope, rel_id),
+            )
+
+    def finish_run(self, scope: str = ""):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM journal WHERE scope = ?", (scope,))
+            self._conn.execute(
+                "DELETE FROM meta WHERE key = ?", (self._journal_key(scope),)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ScopedJournal(ISyncJournal):
+    """Vista ISyncJournal de un scope de un SyncStateStore."""
+
+    def __init__(self, store: SyncStateStore, scope: str):
+        self._store = store
+        self._scope = scope
+
+    def begin_run(self, entries: list[JournalEntry]):
+        self._store.begin_run(entries, self._scope)
+
+    def pending_run(self) -> list[JournalEntry]:
+        return self._store.pending_run(self._scope)
+
+    def mark(self, rel_id: str, state: str):
+        self._store.mark(rel_id, state, self._scope)
+
+    def finish_run(self):
+        self._store.finish_run(self._scope)
+
+
+def read_synced_ids(path: Path) -> set[str]:
+    """RelativeID de un archivo de estado, solo lectura (nunca lo migra ni resetea)."""
+    conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        return {rel_id for (rel_id,) in conn.execute("SELECT rel_id FROM items")}
+    finally:
+        conn.close()
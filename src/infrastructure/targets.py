@@ -0,0 +1,108 @@
+"""
+CRC Card:
+    Module: Sync Targets
+    Responsibilities:
+        - Describes each (root, device, database) served by the process.
+        - Names the state file of each database (`state_path`).
+        - Loads the list from a JSON file (SYNC_TARGETS) and validates it:
+          unique devices, and one namespace per device sharing a database
+          (the device name unless the file says otherwise).
+    Collaborators:
+        - Main
+        - Opener
+        - NamespacedRepository
+
+File format:
+    [
+        {"watch_dir": "/data/laptop", "device": "laptop"},
+        {"watch_dir": "/data/nas", "device": "nas", "database_id": "..."}
+    ]
+    "database_id" defaults to NOTION_DATABASE_ID. "ignore" adds gitignore-style
+    patterns for that root only. "namespace" overrides the
+    RelativeID prefix; null keeps plain RelativeIDs (e.g. for the device
+    that already populated the database before it was shared).
+"""
+
+import json
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+_DEFAULT = object()
+
+
+class TargetConfigError(ValueError):
+    """El archivo de targets no se puede leer o es inconsistente."""
+
+
+@dataclass(frozen=True)
+class SyncTarget:
+    device: str
+    watch_dir: Path
+    database_id: str
+    # Prefijo de los RelativeID en Notion (None: sin prefijo)
+    namespace: str | None = None
+    ignore: tuple[str, ...] = ()
+
+
+def load_targets(path: Path, default_database_id: str | None) -> list[SyncTarget]:
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        raise TargetConfigError(f"Cannot read targets file {path}: {e}") from e
+    if not isinstance(raw, list) or not raw:
+        raise TargetConfigError(f"{path} must hold a non-empty JSON list")
+
+    entries = [_entry(item, default_database_id) for item in raw]
+    devices = Counter(device for device, *_ in entries)
+    repeated = [device for device, n in devices.items() if n > 1]
+    if repeated:
+        raise TargetConfigError(f"Devices listed twice: {', '.join(repeated)}")
+
+    per_database = Counter(database_id for _, _, database_id, *_ in entries)
+    targets = []
+    for device, watch_dir, database_id, namespace, ignore in entries:
+        if namespace is _DEFAULT:
+            # Solo hace falta prefijo si la base la comparten varios roots
+            namespace = device if per_database[database_id] > 1 else None
+        targets.append(SyncTarget(device, watch_dir, database_id, namespace, ignore))
+
+    spaces = Counter((t.database_id, t.namespace) for t in targets)
+    clashes = [f"{ns or '(none)'} in {db}" for (db, ns), n in spaces.items() if n > 1]
+    if clashes:
+        raise TargetConfigError(f"Namespaces used twice: {', '.join(clashes)}")
+    return targets
+
+
+def _entry(item: Any, default_database_id: str | None) -> tuple:
+    if not isinstance(item, dict):
+        raise TargetConfigError(f"Target must be an object: {item!r}")
+    device = item.get("device")
+    watch_dir = item.get("watch_dir")
+    # Sin guiones: el mismo ID escrito de dos formas es la misma base
+    database_id = item.get("database_id") or default_database_id or ""
+    database_id = database_id.strip().replace("-", "")
+    if not device or not watch_dir or not database_id:
+        raise TargetConfigError(
+            f"Target needs device, watch_dir and database_id: {item!r}"
+        )
+    namespace = item.get("namespace", _DEFAULT)
+    if namespace not in (None, _DEFAULT) and (
+        not isinstance(namespace, str) or not namespace or "/" in namespace
+    ):
+        raise TargetConfigError(f"Invalid namespace for {device}: {namespace!r}")
+    if namespace is _DEFAULT and "/" in device:
+        raise TargetConfigError(f"Device names cannot contain '/': {device}")
+    ignore = item.get("ignore", [])
+    if not isinstance(ignore, list) or not all(isinstance(p, str) for p in ignore):
+        raise TargetConfigError(f"'ignore' of {device} must be a list of patterns")
+    return device, Path(watch_dir), database_id, namespace, tuple(ignore)
+
+
+def state_path(base: str, database_id: str, databases: int) -> Path:
+    """Un archivo de estado por base: cada store queda atado a una sola base."""
+    path = Path(base)
+    if databases == 1:
+        return path
+    return path.with_name(f"{path.stem}-{database_id[:8]}{path.suffix}")
@@ -0,0 +1,80 @@
+"""Shared fixtures: a Notion simulator, the real repository wired to it and
+a Synchronizer over a tmp_path tree."""
+
+from pathlib import Path
+
+import pytest
+
+from benchmarks.notion_simulator import NotionSimulator
+from src.application.factories import FileMetaFactory
+from src.application.synchronizer import Synchronizer
+from src.infrastructure.magic_link import SantiFSMagicLinkGenerator
+from src.infrastructure.notion_adapter import NotionRepository
+from src.infrastructure.notion_http import RetryPolicy
+from src.infrastructure.rate_limiter import TokenBucket
+from src.infrastructure.state_store import SyncStateStore
+
+
+@pytest.fixture
+def simulator() -> NotionSimulator:
+    return NotionSimulator(seed=1)
+
+
+@pytest.fixture
+def root(tmp_path: Path) -> Path:
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    return tree
+
+
+@pytest.fixture
+def store(tmp_path: Path, simulator: NotionSimulator):
+    state = SyncStateStore(tmp_path / "state.sqlite3", simulator.database_id)
+    yield state
+    state.close()
+
+
+@pytest.fixture
+def make_repo(simulator: NotionSimulator):
+    repos = []
+
+    def make(
+        store=None, simulator=simulator, link_generator=None, **kwargs
+    ) -> NotionRepository:
+        kwargs.setdefault("retry_policy", RetryPolicy(base_delay=0.001))
+        repo = NotionRepository(
+            "test-token",
+            simulator.database_id,
+            link_generator or SantiFSMagicLinkGenerator(),
+            store,
+            TokenBucket(rate=1e9, burst=10**9),
+            http_client=simulator.client(),
+            **kwargs,
+        )
+        repos.append(repo)
+        return repo
+
+    yield make
+    for repo in repos:
+        repo.close()
+
+
+@pytest.fixture
+def make_sync(root: Path):
+    def make(repo, **kwargs) -> Synchronizer:
+        return Synchronizer(repo, FileMetaFactory(root, "test"), root, **kwargs)
+
+    return make
+
+
+@pytest.fixture
+def write(root: Path):
+    """write(rel_id, content="x"): creates a file (and its folders) in the tree."""
+
+    def write(rel_id: str, content: str = "x") -> Path:
+        path = root / rel_id
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        return path
+
+    return write
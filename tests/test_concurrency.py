@@ -0,0 +1,73 @@
+"""Concurrent uploads: many workers, one rate limiter, folders first."""
+
+import threading
+
+import httpx
+
+
+def _record_creates(simulator) -> list[str]:
+    """RelativeIDs in the order Notion created them."""
+    handle = simulator.handle
+    created: list[str] = []
+    lock = threading.Lock()
+
+    def recording(request: httpx.Request) -> httpx.Response:
+        response = handle(request)
+        if request.method == "POST" and request.url.path.endswith("/pages"):
+            if response.status_code == 200:
+                rel_id = response.json()["properties"]["RelativeID"]["rich_text"]
+                with lock:
+                    created.append(rel_id[0]["plain_text"])
+        return response
+
+    simulator.handle = recording
+    return created
+
+
+def test_folders_are_created_before_their_content(
+    simulator, store, make_repo, make_sync, write
+):
+    for top in ("a", "b"):
+        for i in range(6):
+            write(f"{top}/{i}.txt")
+            write(f"{top}/sub/deeper/{i}.txt")
+    simulator.latency = 0.002
+    created = _record_creates(simulator)
+
+    report = make_sync(make_repo(store), workers=8).sync()
+
+    assert not report.failures
+    order = {rel_id: n for n, rel_id in enumerate(created)}
+    assert len(order) == len(created) == 30  # 6 carpetas + 24 archivos
+    for rel_id, n in order.items():
+        parent = rel_id.rpartition("/")[0]
+        if parent:
+            assert order[parent] < n, rel_id
+    # Cada página quedó vinculada a la de su carpeta
+    pages = simulator.live_pages()
+    for rel_id, page in pages.items():
+        parent = rel_id.rpartition("/")[0]
+        linked = page["properties"].get("Parent item", {}).get("relation", [])
+        assert [p["id"] for p in linked] == ([pages[parent]["id"]] if parent else [])
+
+
+def test_each_failure_is_reported_per_item(
+    simulator, store, make_repo, make_sync, write
+):
+    for i in range(10):
+        write(f"docs/{i}.txt")
+    handle = simulator.handle
+
+    def rejecting(request: httpx.Request) -> httpx.Response:
+        if b"3.txt" in request.content:
+            return httpx.Response(
+                400, json={"code": "validation_error", "message": "Rejected"}
+            )
+        return handle(request)
+
+    simulator.handle = rejecting
+    report = make_sync(make_repo(store), workers=4).sync()
+
+    assert [failure.rel_id for failure in report.failures] == ["docs/3.txt"]
+    assert report.counts["created"] == 10  # docs + los otros 9
+    assert "docs/3.txt" not in simulator.live_pages()
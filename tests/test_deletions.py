@@ -0,0 +1,81 @@
+"""Deleted items are archived, unless the deletion looks like a mistake."""
+
+import shutil
+
+from src.application.deletions import DeletionGuard, archive_order, collapse_to_roots
+
+
+def _tree(write, count: int) -> set[str]:
+    files = {f"docs/{i:02}.txt" for i in range(count)}
+    for rel_id in files:
+        write(rel_id)
+    return files | {"docs"}
+
+
+def test_deleted_files_are_archived(
+    simulator, store, make_repo, make_sync, write, root
+):
+    items = _tree(write, 12)
+    make_sync(make_repo(store)).sync()
+    for rel_id in ("docs/00.txt", "docs/01.txt"):
+        (root / rel_id).unlink()
+
+    report = make_sync(make_repo(store)).sync()
+
+    assert report.counts["archived"] == 2
+    assert set(simulator.live_pages()) == items - {"docs/00.txt", "docs/01.txt"}
+
+
+def test_empty_scan_archives_nothing(
+    simulator, store, make_repo, make_sync, write, root
+):
+    items = _tree(write, 3)
+    make_sync(make_repo(store)).sync()
+    # Volumen sin montar: la carpeta existe pero está vacía
+    shutil.rmtree(root / "docs")
+
+    report = make_sync(make_repo(store)).sync()
+
+    assert report.counts["archived"] == 0
+    assert set(simulator.live_pages()) == items
+
+
+def test_mass_deletion_above_the_ratio_is_blocked(
+    simulator, store, make_repo, make_sync, write, root
+):
+    items = _tree(write, 12)
+    make_sync(make_repo(store)).sync()
+    for i in range(9):
+        (root / f"docs/{i:02}.txt").unlink()
+    guard = DeletionGuard(max_ratio=0.5, min_items=5)
+
+    report = make_sync(make_repo(store), deletion_guard=guard).sync()
+    assert report.counts["archived"] == 0
+    assert set(simulator.live_pages()) == items
+
+    # Con el guard desactivado (MAX_DELETE_RATIO=1) se archiva
+    report = make_sync(
+        make_repo(store), deletion_guard=DeletionGuard(max_ratio=1.0)
+    ).sync()
+    assert report.counts["archived"] == 9
+
+
+def test_small_deletions_pass_the_guard():
+    guard = DeletionGuard(max_ratio=0.5, min_items=50)
+    # Bases chicas: borrar la mitad no bloquea por debajo de min_items
+    assert guard.check(missing=8, total=10, local=2) is None
+    assert guard.check(missing=60, total=100, local=40) is not None
+    assert guard.check(missing=1, total=10, local=0) is not None
+
+
+def test_removed_folder_is_one_group_archived_deepest_first():
+    missing = ["a", "a/b", "a/b/c.txt", "a/d.txt", "e.txt"]
+
+    assert {
+        root: sorted(items) for root, items in collapse_to_roots(missing).items()
+    } == {
+        "a": ["a", "a/b", "a/b/c.txt", "a/d.txt"],
+        "e.txt": ["e.txt"],
+    }
+    order = archive_order(missing)
+    assert order.index("a/b/c.txt") < order.index("a/b") < order.index("a")
@@ -0,0 +1,44 @@
+"""Databases without the Parent item relation (sub-items turned off)."""
+
+from src.application.diff import ChangeKind, classify_change
+from src.domain import FileMeta, RemotePage
+
+
+def _without_parent_relation(simulator):
+    """The database refuses to add relations, as with sub-items disabled."""
+    add_property = simulator._add_property
+
+    def add(name, type_, config):
+        if type_ != "relation":
+            add_property(name, type_, config)
+
+    simulator._add_property = add
+
+
+def test_nested_items_are_unchanged_without_parent_relation(
+    simulator, store, make_repo, make_sync, write
+):
+    _without_parent_relation(simulator)
+    write("docs/a.txt")
+    write("docs/deep/b.txt")
+    repo = make_repo(store)
+    assert not repo.tracks_parent
+
+    report = make_sync(repo).sync()
+    assert not report.failures
+    simulator.reset_stats()
+
+    # Antes cada item anidado salía MOVED en todos los runs
+    report = make_sync(make_repo(store)).sync()
+    assert report.counts == {"unchanged": 4}
+    assert simulator.stats["pages.update"] == 0
+
+
+def test_parent_is_compared_only_when_tracked():
+    meta = FileMeta("docs/a.txt", 1, 1.0, "test", False)
+    remote = RemotePage("page-a", 1, 1.0, None)
+
+    assert classify_change(meta, remote, None) is ChangeKind.MOVED
+    assert classify_change(meta, remote, None, track_parent=False) is (
+        ChangeKind.UNCHANGED
+    )
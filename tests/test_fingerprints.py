@@ -0,0 +1,68 @@
+"""Fingerprinting a big tree: bounded work in flight, fingerprints saved as
+they come."""
+
+import os
+
+from src.application import fingerprints
+from src.application.fingerprints import IN_FLIGHT_PER_WORKER, Fingerprinter
+from src.domain import FileMeta
+from src.infrastructure.content_hash import ALGORITHM, hash_file
+
+
+class RecordingCache:
+    def __init__(self, store):
+        self._store = store
+        self.batches: list[int] = []
+
+    def get_fingerprint(self, meta):
+        return self._store.get_fingerprint(meta)
+
+    def put_fingerprints(self, metas):
+        self.batches.append(len(metas))
+        self._store.put_fingerprints(metas)
+
+
+def _metas(root, write, n):
+    for i in range(n):
+        st = os.stat(write(f"docs/{i}.txt", str(i)))
+        yield FileMeta(
+            f"docs/{i}.txt",
+            st.st_size,
+            st.st_mtime,
+            "laptop",
+            file_key=(st.st_dev, st.st_ino),
+            root=root,
+            status_change_epoch=st.st_ctime,
+        )
+
+
+def test_hashes_stream_with_bounded_submissions_and_batched_saves(
+    root, store, write, monkeypatch
+):
+    monkeypatch.setattr(fingerprints, "FLUSH_EVERY", 5)
+    metas = list(_metas(root, write, 30))
+    pulled = 0
+
+    def scan():
+        nonlocal pulled
+        for meta in metas:
+            pulled += 1
+            yield meta
+
+    cache = RecordingCache(store)
+    hasher = Fingerprinter(hash_file, ALGORITHM, cache, workers=2)
+    out = []
+    for meta in hasher.fingerprint_all(scan()):
+        out.append(meta)
+        # El escaneo no se lee entero antes de entregar el primer hash
+        assert pulled - len(out) <= 2 * IN_FLIGHT_PER_WORKER
+    assert len(out) == 30 and all(meta.fingerprint for meta in out)
+    # Guardadas por tandas mientras corre, no todas al final
+    assert sum(cache.batches) == 30
+    assert len(cache.batches) > 1 and max(cache.batches) <= 5
+
+    # Segunda pasada: todo sale de la caché, nada se vuelve a guardar
+    cache.batches.clear()
+    again = {m.rel_id: m.fingerprint for m in hasher.fingerprint_all(iter(metas))}
+    assert again == {m.rel_id: m.fingerprint for m in out}
+    assert cache.batches == []
@@ -0,0 +1,73 @@
+"""Folders are planned from the scan and created level by level; files only
+look their parent up in memory."""
+
+import json
+
+import httpx
+
+
+def _rel_id(request: httpx.Request) -> str | None:
+    """RelativeID a page create is for."""
+    for value in json.loads(request.content)["properties"].values():
+        if value.get("rich_text"):
+            return value["rich_text"][0]["text"]["content"]
+    return None
+
+
+def test_deep_tree_costs_one_request_per_item(
+    simulator, store, make_repo, make_sync, write
+):
+    deep = "/".join(f"d{i}" for i in range(10))
+    for name in ("a", "b", "c"):
+        write(f"{deep}/{name}.txt")
+    repo = make_repo(store)
+    simulator.reset_stats()
+
+    make_sync(repo, workers=4).sync()
+
+    assert simulator.stats["pages.create"] == 10 + 3
+    assert simulator.stats["databases.query"] == 1
+
+
+def test_children_of_a_failed_folder_are_held_back(
+    simulator, store, make_repo, make_sync, write
+):
+    write("docs/a.txt")
+    write("docs/sub/b.txt")
+    write("other/c.txt")
+    handle = simulator.handle
+    sent: list[str] = []
+
+    def rejecting_docs(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST" and request.url.path.endswith("/pages"):
+            sent.append(_rel_id(request))
+            if sent[-1] == "docs":
+                return httpx.Response(
+                    400, json={"code": "validation_error", "message": "Rejected"}
+                )
+        return handle(request)
+
+    simulator.handle = rejecting_docs
+    report = make_sync(make_repo(store), workers=4).sync()
+    simulator.handle = handle
+
+    # Ni un intento para lo que está adentro: cada uno volvería a crear docs
+    assert sorted(sent) == ["docs", "other", "other/c.txt"]
+    assert sorted(failure.rel_id for failure in report.failures) == [
+        "docs",
+        "docs/a.txt",
+        "docs/sub",
+        "docs/sub/b.txt",
+    ]
+
+    report = make_sync(make_repo(store)).sync()
+    assert not report.failures
+    assert set(simulator.live_pages()) == {
+        "docs",
+        "docs/a.txt",
+        "docs/sub",
+        "docs/sub/b.txt",
+        "other",
+        "other/c.txt",
+    }
+    assert not simulator.duplicates()
@@ -0,0 +1,112 @@
+"""gitignore semantics of the ignore rules, as the scanner applies them."""
+
+import pytest
+
+from src.application.factories import FileMetaFactory
+from src.application.ignore import IgnoreRules
+from src.application.scanner import FileScanner
+
+
+@pytest.fixture
+def scan(root):
+    def scan(rules: IgnoreRules | None = None) -> set[str]:
+        factory = FileMetaFactory(root, "test", rules)
+        return {meta.rel_id for meta in FileScanner(factory).scan()}
+
+    return scan
+
+
+def test_defaults_skip_hidden_and_office_temp_files(scan, write):
+    write("doc.docx")
+    write("~$doc.docx")
+    write(".git/config")
+    write("notes/.DS_Store")
+
+    assert scan() == {"doc.docx", "notes"}
+
+
+def test_patterns_without_slash_match_at_any_depth(scan, write):
+    write("a.log")
+    write("src/deep/b.log")
+    write("src/c.txt")
+
+    assert scan(IgnoreRules(["*.log"])) == {"src", "src/deep", "src/c.txt"}
+
+
+def test_trailing_slash_only_matches_directories(scan, write):
+    write("build/out.bin")
+    write("src/build")  # un archivo llamado build
+
+    assert scan(IgnoreRules(["build/"])) == {"src", "src/build"}
+
+
+def test_leading_or_inner_slash_anchors_to_the_rules_folder(scan, write):
+    write("out/a.bin")
+    write("src/out/b.bin")
+    write("docs/x.tmp")
+    write("src/docs/y.tmp")
+    write("src/.syncignore", "/gen\n")
+    write("src/gen/z.py")
+    write("gen/w.py")
+
+    kept = scan(IgnoreRules(["/out", "docs/*.tmp"]))
+
+    assert "out" not in kept and "src/out/b.bin" in kept
+    assert "docs/x.tmp" not in kept and "src/docs/y.tmp" in kept
+    # "/gen" en src/.syncignore es src/gen, no gen
+    assert "src/gen" not in kept and "gen/w.py" in kept
+
+
+def test_negation_and_last_matching_rule_wins(scan, write):
+    write("a.log")
+    write("keep.log")
+    write("sub/keep.log")
+
+    assert scan(IgnoreRules(["*.log", "!keep.log"])) == {
+        "keep.log",
+        "sub",
+        "sub/keep.log",
+    }
+    # Al revés, la última regla vuelve a ignorarlo
+    assert scan(IgnoreRules(["!keep.log", "*.log"])) == {"sub"}
+
+
+def test_deeper_syncignore_overrides_shallower_rules(scan, write):
+    write(".syncignore", "*.pdf\n")
+    write("a.pdf")
+    write("papers/b.pdf")
+    write("papers/.syncignore", "!*.pdf\n")
+
+    assert scan() == {"papers", "papers/b.pdf"}
+
+
+def test_nothing_is_reincluded_inside_an_ignored_folder(scan, write):
+    write("logs/keep.txt")
+    write("logs/other.txt")
+
+    # Como en git: la carpeta ni se lista
+    assert scan(IgnoreRules(["logs/", "!logs/keep.txt"])) == set()
+
+
+def test_watch_events_are_decided_like_the_scan(root, write):
+    write(".syncignore", "cache/\n*.tmp\n")
+    write("sub/.syncignore", "!*.tmp\n")
+    factory = FileMetaFactory(root, "test")
+
+    assert not factory.should_process(write("cache/a.txt"))
+    assert not factory.should_process(write("a.tmp"))
+    assert factory.should_process(write("sub/b.tmp"))
+    assert factory.should_process(write("sub/c.txt"))
+
+
+def test_size_extension_and_stats(scan, write):
+    write("big.bin", "x" * (1048576 + 1))
+    write("small.bin")
+    write("movie.MKV")
+    rules = IgnoreRules(max_size=1048576, extensions=["mkv"])
+
+    assert scan(rules) == {"small.bin"}
+    assert sorted(str(rule) for rule in rules.take_stats()) == [
+        "config: extension .mkv",
+        "config: size > 1 MiB",
+    ]
@@ -0,0 +1,45 @@
+"""The index fetched at the start of a sync is authoritative: a path it does
+not know does not exist, and finding that out costs no request."""
+
+from src.application.factories import FileMetaFactory
+
+
+def test_first_sync_costs_one_request_per_item(
+    simulator, store, make_repo, make_sync, write
+):
+    for i in range(5):
+        for j in range(4):
+            write(f"projects/p{i}/src/{j}.py")
+    repo = make_repo(store)
+    simulator.reset_stats()
+
+    report = make_sync(repo, workers=4).sync()
+
+    items = 1 + 5 * 2 + 5 * 4  # projects, p*, p*/src, archivos
+    assert report.counts["created"] == items
+    assert simulator.stats["pages.create"] == items
+    # Un solo query: el snapshot (vacío); ningún lookup por RelativeID
+    assert simulator.stats["databases.query"] == 1
+    assert simulator.requests == items + 1
+
+
+def test_unknown_path_is_created_without_a_lookup(
+    simulator, store, make_repo, make_sync, write, root
+):
+    write("docs/a.txt")
+    repo = make_repo(store)
+    make_sync(repo).sync()
+    simulator.reset_stats()
+
+    # Fuera de un run (p.ej. el modo watch): el índice del último sync manda
+    repo.upsert_file(
+        FileMetaFactory(root, "test").create_from_path(write("docs/new.txt"))
+    )
+    repo.upsert_file(
+        FileMetaFactory(root, "test").create_from_path(write("docs/a.txt", "v2"))
+    )
+
+    assert simulator.stats["databases.query"] == 0
+    assert simulator.stats["pages.create"] == 1
+    assert simulator.stats["pages.update"] == 1
+    assert not simulator.duplicates()
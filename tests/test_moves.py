@@ -0,0 +1,126 @@
+"""Renames and moves update the existing page instead of archiving it."""
+
+from dataclasses import replace
+
+from src.application.moves import detect_moves
+from src.domain import FileMeta, RemotePage
+
+
+def _page_ids(simulator) -> dict[str, str]:
+    return {rel_id: page["id"] for rel_id, page in simulator.live_pages().items()}
+
+
+def test_renamed_file_keeps_its_page(
+    simulator, store, make_repo, make_sync, write, root
+):
+    write("a.txt", "content")
+    write("b.txt", "other")
+    make_sync(make_repo(store)).sync()
+    before = _page_ids(simulator)
+    (root / "a.txt").rename(root / "renamed.txt")
+
+    report = make_sync(make_repo(store)).sync()
+
+    assert report.counts["renamed"] == 1
+    assert report.counts["archived"] == 0
+    assert _page_ids(simulator) == {
+        "renamed.txt": before["a.txt"],
+        "b.txt": before["b.txt"],
+    }
+
+
+def test_moved_folder_moves_its_whole_subtree(
+    simulator, store, make_repo, make_sync, write, root
+):
+    write("old/a.txt", "a")
+    write("old/deep/b.txt", "bb")
+    write("dest/keep.txt", "ccc")
+    make_sync(make_repo(store)).sync()
+    before = _page_ids(simulator)
+    (root / "old").rename(root / "dest" / "new")
+
+    report = make_sync(make_repo(store)).sync()
+
+    assert report.counts["archived"] == 0
+    assert report.counts["created"] == 0
+    pages = simulator.live_pages()
+    after = _page_ids(simulator)
+    for old, new in (
+        ("old", "dest/new"),
+        ("old/a.txt", "dest/new/a.txt"),
+        ("old/deep", "dest/new/deep"),
+        ("old/deep/b.txt", "dest/new/deep/b.txt"),
+    ):
+        assert after[new] == before[old]
+    # La jerarquía en Notion sigue a la carpeta nueva
+    parent = pages["dest/new/deep/b.txt"]["properties"]["Parent item"]["relation"]
+    assert parent == [{"id": before["old/deep"]}]
+    assert not simulator.duplicates()
+
+
+def test_new_file_with_a_twin_is_created(
+    simulator, store, make_repo, make_sync, write, root
+):
+    write("a.txt", "same")
+    make_sync(make_repo(store)).sync()
+    # Copia nueva, el original sigue: no es un movimiento
+    write("copy.txt", "same")
+
+    report = make_sync(make_repo(store)).sync()
+
+    assert report.counts["created"] == 1
+    assert set(simulator.live_pages()) == {"a.txt", "copy.txt"}
+
+
+def test_new_file_reusing_a_deleted_inode_is_not_a_rename(
+    simulator, store, make_repo, make_sync, write, root
+):
+    write("a.txt", "old content")
+    write("b.txt", "other")
+    make_sync(make_repo(store)).sync()
+    before = _page_ids(simulator)
+    (root / "a.txt").unlink()
+    stat = write("y.txt", "an unrelated file").stat()
+    # El sistema de archivos le dio a y.txt el inode que fue de a.txt
+    page = store.load()["a.txt"]
+    store.put("a.txt", replace(page, file_key=(stat.st_dev, stat.st_ino)))
+    simulator.age(60)
+
+    report = make_sync(make_repo(store, full_reconcile_every=None)).sync()
+
+    assert report.counts["renamed"] == 0
+    assert report.counts["created"] == 1
+    assert report.counts["archived"] == 1
+    after = _page_ids(simulator)
+    assert set(after) == {"b.txt", "y.txt"}
+    assert after["y.txt"] != before["a.txt"]
+
+
+def test_new_folder_reusing_a_deleted_inode_does_not_take_its_subtree():
+    # "old" borrada con su contenido; "new" es otra carpeta con el mismo inode
+    missing = {
+        "old": RemotePage("p-old", file_key=(1, 10)),
+        "old/main.py": RemotePage("p-main", 5, 100.0, "p-old", (1, 11)),
+    }
+    created = [
+        FileMeta("new", 0, 300.0, "test", True, (1, 10)),
+        FileMeta("new/main.py", 42, 300.0, "test", False, (1, 12)),
+    ]
+
+    assert detect_moves(created, missing) == {}
+
+
+def test_inode_breaks_a_tie_between_folder_origins():
+    missing = {
+        "x": RemotePage("p-x", file_key=(1, 1)),
+        "x/a.txt": RemotePage("p-xa", 1, 100.0, "p-x", (1, 2)),
+        "y": RemotePage("p-y", file_key=(1, 3)),
+        "y/b.txt": RemotePage("p-yb", 2, 100.0, "p-y", (1, 4)),
+    }
+    created = [
+        FileMeta("z", 0, 300.0, "test", True, (1, 3)),
+        FileMeta("z/a.txt", 1, 100.0, "test", False, (1, 2)),
+        FileMeta("z/b.txt", 2, 100.0, "test", False, (1, 4)),
+    ]
+
+    assert detect_moves(created, missing)["z"] == "y"
@@ -0,0 +1,129 @@
+"""Several targets sharing one database: namespaces, fairness and the shared
+page index."""
+
+import threading
+
+import httpx
+
+from src.application.factories import FileMetaFactory
+from src.application.metrics import SyncMetrics
+from src.application.multi_root import FairScheduler, MultiRootSync
+from src.application.namespaces import NamespacedRepository, SharedSnapshot
+from src.application.synchronizer import Synchronizer
+
+
+def _target(tmp_path, snapshot, namespace, files):
+    root = tmp_path / (namespace or "shared")
+    for rel_id in files:
+        path = root / rel_id
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel_id)
+    repo = NamespacedRepository(snapshot, namespace)
+    factory = FileMetaFactory(root, namespace or "shared")
+    return root, repo, Synchronizer(repo, factory, root)
+
+
+def test_each_target_gets_its_own_prefix(simulator, store, make_repo, tmp_path):
+    snapshot = SharedSnapshot(make_repo(store, devices=True))
+    _, _, laptop = _target(tmp_path, snapshot, "laptop", ["docs/a.txt"])
+    _, _, desktop = _target(tmp_path, snapshot, "desktop", ["docs/a.txt", "b.txt"])
+    engine = MultiRootSync({"laptop": laptop, "desktop": desktop}, SyncMetrics())
+
+    reports = engine.sync()
+
+    assert not any(report.failures for report in reports.values())
+    assert set(simulator.live_pages()) == {
+        "laptop",
+        "laptop/docs",
+        "laptop/docs/a.txt",
+        "desktop",
+        "desktop/docs",
+        "desktop/docs/a.txt",
+        "desktop/b.txt",
+    }
+    # Cada uno ve solo su parte, con sus RelativeIDs locales
+    simulator.age(60)
+    reports = engine.sync()
+    assert reports["laptop"].counts == {"unchanged": 2}
+    assert reports["desktop"].counts == {"unchanged": 3}
+
+
+def test_target_without_namespace_leaves_the_others_alone(
+    simulator, store, make_repo, tmp_path
+):
+    snapshot = SharedSnapshot(make_repo(store, devices=True))
+    _, _, laptop = _target(tmp_path, snapshot, "laptop", ["a.txt"])
+    root, _, shared = _target(tmp_path, snapshot, None, ["notes.txt"])
+    engine = MultiRootSync({"laptop": laptop, "shared": shared}, SyncMetrics())
+    engine.sync()
+    assert set(simulator.live_pages()) == {"laptop", "laptop/a.txt", "notes.txt"}
+
+    # "namespace": null escribe sin prefijo y nunca archiva lo de otro dispositivo
+    (root / "notes.txt").unlink()
+    (root / "new.txt").write_text("new")
+    simulator.age(60)
+    reports = engine.sync()
+
+    assert reports["shared"].counts["archived"] == 1
+    assert set(simulator.live_pages()) == {"laptop", "laptop/a.txt", "new.txt"}
+
+
+def test_lanes_take_turns_on_the_workers():
+    scheduler = FairScheduler(1)
+    ran: list[str] = []
+    gate = threading.Event()
+    try:
+        blocker = scheduler.submit("big", gate.wait)
+        futures = [scheduler.submit("big", ran.append, "big") for _ in range(4)]
+        futures += [scheduler.submit("small", ran.append, "small") for _ in range(2)]
+        gate.set()
+        for future in [blocker, *futures]:
+            future.result(timeout=5)
+    finally:
+        scheduler.close()
+
+    # Un target grande no hace esperar al chico hasta el final
+    assert ran[:4] == ["small", "big", "small", "big"]
+
+
+def test_refetch_while_another_target_writes_keeps_the_index(
+    simulator, make_repo, tmp_path
+):
+    """A target that syncs again refetches while another target is still
+    creating pages: what it creates meanwhile must stay in the index."""
+    handle = simulator.handle
+    during_query: list = []
+
+    def hooked(request: httpx.Request) -> httpx.Response:
+        response = handle(request)
+        if request.url.path.endswith("/query") and during_query:
+            # El query ya se respondió: lo que se escribe ahora no está en él
+            worker = threading.Thread(target=during_query.pop())
+            worker.start()
+            worker.join()
+        return response
+
+    simulator.handle = hooked
+    # Sin state store cada fetch es un query completo
+    repo = make_repo(devices=True)
+    snapshot = SharedSnapshot(repo, max_age=0)
+    _, _, desktop = _target(tmp_path, snapshot, "desktop", ["x.txt"])
+    root, laptop, _ = _target(tmp_path, snapshot, "laptop", [])
+    factory = FileMetaFactory(root, "laptop")
+
+    def upload(rel_id: str):
+        path = root / rel_id
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel_id)
+        laptop.upsert_file(factory.create_from_path(path))
+
+    desktop.sync()
+    # El otro target crea laptop/docs/ mientras desktop vuelve a pedir el snapshot
+    during_query.append(lambda: upload("docs/a.txt"))
+    desktop.sync()
+    upload("docs/b.txt")
+
+    assert not simulator.duplicates()
+    assert {
+        rel_id for rel_id in simulator.live_pages() if rel_id.startswith("laptop")
+    } == {"laptop", "laptop/docs", "laptop/docs/a.txt", "laptop/docs/b.txt"}
@@ -0,0 +1,136 @@
+"""The opener only opens signed links, clicked by the user, that do not run
+anything."""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+
+from src.application.priority import PriorityPolicy
+from src.infrastructure.magic_link import SantiFSMagicLinkGenerator
+from src.infrastructure.opener import OpenerService, PathIndex
+
+SECRET = "install-secret"
+# Lo que manda el navegador al seguir un enlace
+CLICK = {"sec-fetch-mode": "navigate", "sec-fetch-dest": "document"}
+
+
+@pytest.fixture
+def opened():
+    return []
+
+
+@pytest.fixture
+def make_service(root, opened):
+    def make(**kwargs) -> OpenerService:
+        async def launcher(path: Path):
+            opened.append(path)
+
+        return OpenerService(PathIndex([(None, root)]), launcher, port=0, **kwargs)
+
+    return make
+
+
+def _get(service: OpenerService, link: str, headers=CLICK) -> int:
+    url = urlsplit(link)
+    target = f"{url.path}?{url.query}"
+    status, _, _ = asyncio.run(service._dispatch("GET", target, dict(headers)))
+    return status
+
+
+def test_signed_link_opens_the_file(make_service, opened, write):
+    path = write("docs/a.txt")
+    link = SantiFSMagicLinkGenerator(secret=SECRET).generate(Path("docs/a.txt"))
+
+    assert _get(make_service(secret=SECRET), link) == 200
+    assert opened == [path.resolve()]
+
+
+@pytest.mark.parametrize("secret", [None, "another-install"])
+def test_links_not_signed_by_this_install_are_refused(
+    make_service, opened, write, secret
+):
+    write("a.txt")
+    link = SantiFSMagicLinkGenerator(secret=secret).generate(Path("a.txt"))
+
+    assert _get(make_service(secret=SECRET), link) == 403
+    assert opened == []
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        # <img src> o fetch() desde otra página
+        {"sec-fetch-mode": "no-cors", "sec-fetch-dest": "image"},
+        {"sec-fetch-mode": "cors", "sec-fetch-dest": "empty"},
+        # La página del opener embebida en un iframe
+        {"sec-fetch-mode": "navigate", "sec-fetch-dest": "iframe"},
+        # Navegador sin Fetch Metadata, pero con Origin: lo pidió un script
+        {"origin": "https://evil.example"},
+    ],
+)
+def test_requests_a_page_makes_on_its_own_are_refused(
+    make_service, opened, write, headers
+):
+    write("a.txt")
+    link = SantiFSMagicLinkGenerator().generate(Path("a.txt"))
+
+    assert _get(make_service(), link, headers) == 403
+    assert opened == []
+
+
+def test_executables_are_not_launched_unless_allowed(make_service, opened, write):
+    path = write("tools/setup.EXE")
+    link = SantiFSMagicLinkGenerator(secret=SECRET).generate(Path("tools/setup.EXE"))
+
+    assert _get(make_service(secret=SECRET), link) == 403
+    assert opened == []
+    service = make_service(secret=SECRET, allow_executables=True)
+    assert _get(service, link) == 200
+    assert opened == [path.resolve()]
+
+
+def test_new_secret_rewrites_the_links_with_the_normal_writes(
+    simulator, store, make_repo, make_sync, write
+):
+    write("docs/a.txt")
+    make_sync(make_repo(store)).sync()
+    old_folder_link = simulator.live_pages()["docs"]["properties"]["MagicLink"]["url"]
+    signed = SantiFSMagicLinkGenerator(secret=SECRET)
+
+    report = make_sync(make_repo(store, link_generator=signed)).sync()
+    assert report.counts["modified"] == 1
+    links = {
+        rel_id: page["properties"]["MagicLink"]["url"]
+        for rel_id, page in simulator.live_pages().items()
+    }
+    assert links["docs/a.txt"] == signed.generate(Path("docs/a.txt"))
+    # Las carpetas no se abren con el opener: no se reescriben
+    assert links["docs"] == old_folder_link
+    # Ya reescritos: el próximo run no los toca
+    report = make_sync(make_repo(store, link_generator=signed)).sync()
+    assert report.counts["modified"] == 0
+
+
+def test_link_rewrite_respects_the_time_budget(
+    simulator, store, make_repo, make_sync, write
+):
+    old = time.time() - 7 * 24 * 3600
+    for i in range(3):
+        os.utime(write(f"docs/{i}.txt"), (old, old))
+    make_sync(make_repo(store)).sync()
+    signed = SantiFSMagicLinkGenerator(secret=SECRET)
+
+    repo = make_repo(store, link_generator=signed)
+    report = make_sync(repo, priority=PriorityPolicy(time_budget=0)).sync()
+    assert report.counts["deferred"] > 0
+    # Lo diferido sigue firmado con el secreto viejo: el próximo run lo toma
+    assert not make_sync(repo).sync().failures
+    assert all(
+        page["properties"]["MagicLink"]["url"] == signed.generate(Path(rel_id))
+        for rel_id, page in simulator.live_pages().items()
+        if rel_id != "docs"
+    )
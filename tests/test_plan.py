@@ -0,0 +1,79 @@
+"""A dry-run plan is only a proposal: saving it loses nothing, and running it
+later re-checks every operation against the disk and Notion."""
+
+import json
+
+from src.application.plan import CostModel, SyncPlan
+
+WRITES = ("pages.create", "pages.update")
+
+
+def _writes(simulator) -> int:
+    return sum(simulator.stats[endpoint] for endpoint in WRITES)
+
+
+def test_dry_run_sends_no_writes(simulator, store, make_repo, make_sync, write, root):
+    write("docs/a.txt")
+    write("docs/b.txt")
+    make_sync(make_repo(store)).sync()
+    write("docs/a.txt", "changed")
+    write("docs/new/c.txt")
+    (root / "docs" / "b.txt").unlink()
+    simulator.age(60)
+    simulator.reset_stats()
+
+    plan = make_sync(make_repo(store), journal=store).plan()
+
+    assert plan.counts() == {
+        "folder-create": 1,
+        "create": 1,
+        "update": 1,
+        "move": 0,
+        "archive": 1,
+    }
+    assert _writes(simulator) == 0
+    assert store.pending_run() == []
+
+
+def test_plan_survives_a_json_round_trip(
+    simulator, store, make_repo, make_sync, write, root
+):
+    write("docs/a.txt", "content")
+    write("old.txt")
+    make_sync(make_repo(store)).sync()
+    (root / "docs" / "a.txt").rename(root / "docs" / "renamed.txt")
+    (root / "old.txt").unlink()
+    write("docs/new.txt")
+    simulator.age(60)
+
+    plan = make_sync(make_repo(store)).plan()
+    text = json.dumps(plan.to_dict(CostModel(requests_per_second=3, workers=2)))
+
+    assert SyncPlan.from_dict(json.loads(text)) == plan
+    assert {op.kind for op in plan.operations} == {"create", "move", "archive"}
+
+
+def test_stale_plan_does_not_undo_newer_changes(
+    simulator, store, make_repo, make_sync, write, root
+):
+    write("docs/a.txt", "v1")
+    write("docs/b.txt")
+    make_sync(make_repo(store)).sync()
+    write("docs/a.txt", "v2")
+    (root / "docs" / "b.txt").unlink()
+    simulator.age(60)
+    plan = make_sync(make_repo(store), journal=store).plan()
+    assert plan.counts()["update"] == 1 and plan.counts()["archive"] == 1
+
+    # Entre el plan y su ejecución: a.txt vuelve a cambiar y b.txt vuelve
+    write("docs/a.txt", "version three")
+    write("docs/b.txt")
+    simulator.age(60)
+
+    report = make_sync(make_repo(store), journal=store).execute(plan)
+
+    assert not report.failures
+    pages = simulator.live_pages()
+    assert "docs/b.txt" in pages
+    assert pages["docs/a.txt"]["properties"]["Size"]["number"] == len("version three")
+    assert store.pending_run() == []
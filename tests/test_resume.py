@@ -0,0 +1,123 @@
+"""A run cut off mid-push is finished by the next one from its journal."""
+
+import httpx
+import pytest
+
+from src.application.report import SyncReport
+
+
+class Crash(BaseException):
+    """The process dies: nothing catches it on the way out."""
+
+
+@pytest.fixture(autouse=True)
+def crash_ends_the_run(monkeypatch):
+    """The pool hands worker exceptions to the report; a Crash goes on up
+    from there and ends the run the way a kill would."""
+    record = SyncReport.record
+
+    def record_or_crash(self, rel_id, action, error=None):
+        if isinstance(error, Crash):
+            raise error
+        record(self, rel_id, action, error)
+
+    monkeypatch.setattr(SyncReport, "record", record_or_crash)
+
+
+def _crash_after_creates(simulator, creates: int, lose_response: bool = False):
+    """Kills the run at page create number `creates` + 1. With
+    `lose_response` Notion applies that create but the answer never comes."""
+    handle = simulator.handle
+    seen = 0
+
+    def crashing(request: httpx.Request) -> httpx.Response:
+        nonlocal seen
+        if request.method == "POST" and request.url.path.endswith("/pages"):
+            seen += 1
+            if seen > creates:
+                if lose_response:
+                    handle(request)
+                raise Crash()
+        return handle(request)
+
+    simulator.handle = crashing
+    return lambda: setattr(simulator, "handle", handle)
+
+
+@pytest.mark.parametrize("lose_response", [False, True])
+def test_interrupted_run_is_resumed_without_duplicates(
+    simulator, store, make_repo, make_sync, write, lose_response
+):
+    files = {f"docs/{i}.txt" for i in range(6)}
+    for rel_id in files:
+        write(rel_id)
+    restore = _crash_after_creates(simulator, 3, lose_response)
+    with pytest.raises(Crash):
+        make_sync(make_repo(store), journal=store).sync()
+    restore()
+    assert store.pending_run()
+
+    synchronizer = make_sync(make_repo(store), journal=store)
+    report = synchronizer.sync()
+
+    assert synchronizer.resumed
+    assert not report.failures
+    assert set(simulator.live_pages()) == files | {"docs"}
+    assert not simulator.duplicates()
+    assert store.pending_run() == []
+
+
+def test_resume_only_replays_the_journal(simulator, store, make_repo, make_sync, write):
+    write("a.txt")
+    write("b.txt")
+    restore = _crash_after_creates(simulator, 1)
+    with pytest.raises(Crash):
+        make_sync(make_repo(store), journal=store).sync()
+    restore()
+    # Aparece después del corte: no estaba planeado
+    write("late.txt")
+
+    report = make_sync(make_repo(store), journal=store).sync()
+    assert "late.txt" not in simulator.live_pages()
+    assert report.counts["created"] == 1
+
+    # El run siguiente vuelve a escanear y lo encuentra
+    simulator.age(60)
+    report = make_sync(make_repo(store), journal=store).sync()
+    assert not report.failures
+    assert set(simulator.live_pages()) == {"a.txt", "b.txt", "late.txt"}
+
+
+def test_create_that_landed_is_retried_as_an_update(
+    simulator, store, make_repo, make_sync, write
+):
+    for i in range(3):
+        write(f"docs/{i}.txt")
+    # docs + 2 archivos; el tercero llega a Notion pero la respuesta se pierde
+    restore = _crash_after_creates(simulator, 3, lose_response=True)
+    with pytest.raises(Crash):
+        make_sync(make_repo(store), journal=store).sync()
+    restore()
+    (landed,) = set(simulator.live_pages()) - set(store.load())
+    page_id = simulator.live_pages()[landed]["id"]
+
+    # El query de la base todavía no la ve; buscarla por RelativeID sí
+    handle = simulator.handle
+
+    def lagging(request: httpx.Request) -> httpx.Response:
+        response = handle(request)
+        if not request.url.path.endswith("/query") or b"equals" in request.content:
+            return response
+        data = response.json()
+        data["results"] = [p for p in data["results"] if p["id"] != page_id]
+        return httpx.Response(response.status_code, json=data)
+
+    simulator.handle = lagging
+    report = make_sync(make_repo(store), journal=store).sync()
+    simulator.handle = handle
+
+    assert not report.failures
+    assert report.counts["created"] == 0
+    assert report.counts["modified"] == 1
+    assert not simulator.duplicates()
+    assert store.pending_run() == []
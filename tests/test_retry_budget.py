@@ -0,0 +1,66 @@
+"""RETRY_BUDGET is a budget per run, not per process."""
+
+import httpx
+import pytest
+
+from src.infrastructure.notion_http import (
+    NotionHttp,
+    RetryBudgetExhausted,
+    RetryPolicy,
+)
+from src.infrastructure.rate_limiter import TokenBucket
+
+
+def _flaky_creates(simulator):
+    """Every page create fails once with a 503 before it goes through."""
+    handle = simulator.handle
+    failed: set[bytes] = set()
+
+    def flaky(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST" and request.url.path.endswith("/pages"):
+            if request.content not in failed:
+                failed.add(request.content)
+                return httpx.Response(503, json={"code": "service_unavailable"})
+        return handle(request)
+
+    simulator.handle = flaky
+
+
+def test_budget_starts_over_with_every_sync_run(
+    simulator, store, make_repo, make_sync, write
+):
+    _flaky_creates(simulator)
+    repo = make_repo(store, retry_policy=RetryPolicy(base_delay=0.001, run_budget=2))
+    synchronizer = make_sync(repo)
+
+    write("a.txt")
+    write("b.txt")
+    assert synchronizer.sync().counts["created"] == 2
+    # Otros dos reintentos con el mismo cliente: agotaría un presupuesto global
+    write("c.txt")
+    write("d.txt")
+    report = synchronizer.sync()
+
+    assert not report.failures
+    assert report.counts["created"] == 2
+    assert set(simulator.live_pages()) == {"a.txt", "b.txt", "c.txt", "d.txt"}
+
+
+def test_budget_is_shared_within_a_run_until_reset():
+    responses = iter([503, 200, 503, 503, 200])
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(next(responses), json={})
+    )
+    api = NotionHttp(
+        httpx.Client(transport=transport, base_url="https://api.test/"),
+        TokenBucket(rate=1e9, burst=10**9),
+        RetryPolicy(base_delay=0.0, run_budget=1),
+    )
+    api.request("GET", "users/me")
+    with pytest.raises(RetryBudgetExhausted):
+        api.request("GET", "users/me")
+
+    api.reset_budget()
+    assert api.retries_left == 1
+    api.request("GET", "users/me")
+    assert api.retries_left == 0
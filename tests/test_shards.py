@@ -0,0 +1,73 @@
+"""The sharded scan finds what the serial scan finds."""
+
+import os
+
+from src.application.diff import ChangeKind, diff_against
+from src.application.factories import FileMetaFactory
+from src.application.ignore import IgnoreRules
+from src.application.scanner import FileScanner
+from src.application.shards import ShardedScan
+
+
+def _tree(write):
+    for group in range(12):
+        for item in range(3):
+            write(f"g{group:02}/sub/{item}.txt")
+            write(f"g{group:02}/{item}.log")
+    write("top.txt")
+
+
+def _serial(factory, snapshot):
+    changes = {}
+    for meta in FileScanner(factory).scan():
+        changes[meta.rel_id] = diff_against(meta, snapshot)
+    return changes
+
+
+def test_sharded_scan_matches_the_serial_scan(
+    simulator, store, make_repo, make_sync, write, root
+):
+    _tree(write)
+    make_sync(make_repo(store)).sync()
+    # Cambios repartidos entre varios shards
+    for group in (1, 5, 9):
+        path = root / f"g{group:02}/sub/0.txt"
+        path.write_text("changed")
+        os.utime(path, (1, 1))
+    write("g03/new.txt")
+    snapshot = make_repo(store).get_all_active_files()
+    factory = FileMetaFactory(root, "test", IgnoreRules(["*.log"]))
+
+    result = ShardedScan(factory, 2).scan(snapshot)
+    sharded_stats = factory.ignore.take_stats()
+    serial = _serial(factory, snapshot)
+
+    assert result.shards > 1
+    assert len(result.writes) == 4
+    assert result.local_ids == set(serial)
+    assert {meta.rel_id: change for meta, change in result.writes} == {
+        rel_id: change
+        for rel_id, change in serial.items()
+        if change is not ChangeKind.UNCHANGED
+    }
+    assert result.unchanged == sum(
+        change is ChangeKind.UNCHANGED for change in serial.values()
+    )
+    # Lo que ignoró cada proceso se suma en este
+    assert sharded_stats == factory.ignore.take_stats()
+    assert sum(sharded_stats.values()) == 36
+
+
+def test_sharded_sync_writes_like_a_serial_one(
+    simulator, store, make_repo, make_sync, write
+):
+    _tree(write)
+
+    report = make_sync(make_repo(store), shard_processes=2).sync()
+
+    assert not report.failures
+    # 12 grupos con su sub/, 72 archivos y top.txt
+    assert len(simulator.live_pages()) == 12 * 2 + 72 + 1
+    assert not simulator.duplicates()
+    report = make_sync(make_repo(store), shard_processes=2).sync()
+    assert report.counts == {"unchanged": 97}
@@ -0,0 +1,48 @@
+"""The snapshot streams in as Notion pages it, with only the properties the
+diff reads."""
+
+import httpx
+
+
+def test_snapshot_query_asks_only_for_the_properties_it_reads(
+    simulator, make_repo, make_sync, write
+):
+    write("docs/a.txt")
+    make_sync(make_repo()).sync()
+    handle = simulator.handle
+    asked: list[list[str]] = []
+    returned: set[str] = set()
+
+    def recording(request: httpx.Request) -> httpx.Response:
+        response = handle(request)
+        if request.url.path.endswith("/query"):
+            asked.append(request.url.params.get_list("filter_properties"))
+            for page in response.json()["results"]:
+                returned.update(page["properties"])
+        return response
+
+    simulator.handle = recording
+    assert set(make_repo().get_all_active_files()) == {"docs", "docs/a.txt"}
+
+    assert asked and all(asked)
+    assert "RelativeID" in returned
+    # El nombre y el MagicLink no se usan para comparar: no viajan
+    assert not returned & {"Name", "MagicLink"}
+
+
+def test_first_records_arrive_before_the_last_page_is_fetched(
+    simulator, make_repo, make_sync, write
+):
+    for i in range(250):
+        write(f"docs/{i}.txt")
+    make_sync(make_repo()).sync()
+    repo = make_repo()
+    simulator.reset_stats()
+
+    records = repo.iter_active_files()
+    rel_id, page = next(records)
+    assert simulator.stats["databases.query"] == 1
+    assert page.page_id
+
+    assert len([rel_id, *(r for r, _ in records)]) == 251
+    assert simulator.stats["databases.query"] == 3
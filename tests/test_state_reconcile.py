@@ -0,0 +1,81 @@
+"""Pages archived by hand in Notion while the local index still lists them."""
+
+import os
+from datetime import timedelta
+
+from src.infrastructure.notion_adapter import FULL_RECONCILE_EVERY
+
+
+def _touch(path, seconds=10):
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + seconds))
+
+
+def test_update_of_archived_page_creates_it_again(
+    simulator, store, make_repo, make_sync, write
+):
+    a = write("a.txt")
+    write("b.txt")
+    make_sync(make_repo(store)).sync()
+    simulator.archive("a.txt")
+    simulator.age(60)
+
+    # Sin fetch completo el índice sigue creyendo que a.txt existe
+    repo = make_repo(store, full_reconcile_every=None)
+    _touch(a)
+    report = make_sync(repo).sync()
+
+    assert not report.failures
+    assert set(simulator.live_pages()) == {"a.txt", "b.txt"}
+    assert not simulator.duplicates()
+    # La página nueva quedó en el índice: el run siguiente no escribe nada
+    report = make_sync(make_repo(store, full_reconcile_every=None)).sync()
+    assert report.counts == {"unchanged": 2}
+
+
+def test_move_of_archived_page_creates_it_at_the_new_path(
+    simulator, store, make_repo, make_sync, write, root
+):
+    write("a.txt", "content")
+    make_sync(make_repo(store)).sync()
+    simulator.archive("a.txt")
+    simulator.age(60)
+
+    (root / "a.txt").rename(root / "renamed.txt")
+    report = make_sync(make_repo(store, full_reconcile_every=None)).sync()
+
+    assert not report.failures
+    assert set(simulator.live_pages()) == {"renamed.txt"}
+
+
+def test_periodic_full_reconcile_forgets_archived_pages(
+    simulator, store, make_repo, make_sync, write
+):
+    write("a.txt")
+    write("b.txt")
+    make_sync(make_repo(store)).sync()
+    simulator.archive("a.txt")
+    simulator.age(60)
+
+    # Reconcile reciente: el fetch incremental no ve el archivado
+    report = make_sync(make_repo(store)).sync()
+    assert report.counts == {"unchanged": 2}
+
+    # Vencido: se baja la base completa y a.txt vuelve a crearse
+    store.last_full_reconcile = "2000-01-01T00:00:00+00:00"
+    report = make_sync(make_repo(store)).sync()
+    assert report.counts == {"created": 1, "unchanged": 1}
+    assert set(simulator.live_pages()) == {"a.txt", "b.txt"}
+    assert store.last_full_reconcile > "2000"
+
+
+def test_full_reconcile_interval_is_respected(store, make_repo, make_sync, write):
+    write("a.txt")
+    make_sync(make_repo(store)).sync()
+    first = store.last_full_reconcile
+    assert first is not None
+
+    make_sync(make_repo(store, full_reconcile_every=FULL_RECONCILE_EVERY)).sync()
+    assert store.last_full_reconcile == first
+    make_sync(make_repo(store, full_reconcile_every=timedelta(0))).sync()
+    assert store.last_full_reconcile > first
@@ -0,0 +1,30 @@
+"""SYNC_TIME_BUDGET: what a run defers is picked up by the next one."""
+
+import os
+import time
+
+from src.application.priority import PriorityPolicy
+
+
+def test_deferred_work_is_found_again_by_the_next_run(
+    simulator, store, make_repo, make_sync, write
+):
+    # Fuera del hot set: con el budget agotado quedan diferidos
+    old = time.time() - 7 * 24 * 3600
+    for i in range(5):
+        path = write(f"docs/{i}.txt")
+        os.utime(path, (old, old))
+    repo = make_repo(store)
+
+    report = make_sync(
+        repo, journal=store, priority=PriorityPolicy(time_budget=0)
+    ).sync()
+    deferred = report.counts["deferred"]
+    assert deferred > 0
+    # El run terminó: no queda nada para reanudar
+    assert store.pending_run() == []
+
+    report = make_sync(repo, journal=store).sync()
+    assert not report.failures
+    assert set(simulator.live_pages()) == {"docs"} | {f"docs/{i}.txt" for i in range(5)}
+    assert not simulator.duplicates()
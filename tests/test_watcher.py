@@ -0,0 +1,169 @@
+"""Watch mode: bursts of events fold into the minimal set of writes."""
+
+import sys
+import threading
+
+import pytest
+
+from src.application.factories import FileMetaFactory
+from src.application.watcher import EventCoalescer, WatchSynchronizer
+from src.domain import FsEvent
+from src.infrastructure import fs_events
+from src.infrastructure.fs_events import InotifySource
+
+
+def _coalesce(*events: FsEvent):
+    coalescer = EventCoalescer()
+    for event in events:
+        coalescer.add(event)
+    return coalescer.drain()
+
+
+def test_created_then_deleted_is_nothing(root):
+    changes = _coalesce(
+        FsEvent("created", root / "tmp.swp"),
+        FsEvent("modified", root / "tmp.swp"),
+        FsEvent("deleted", root / "tmp.swp"),
+    )
+    assert not changes.upserts and not changes.moves
+    # Nunca llegó a Notion: el flush no encuentra nada que archivar
+    assert changes.deletes == {root / "tmp.swp"}
+
+
+def test_chained_renames_collapse_into_one_move(root):
+    changes = _coalesce(
+        FsEvent("moved", root / "a.txt", dest_path=root / "b.txt"),
+        FsEvent("moved", root / "b.txt", dest_path=root / "c.txt"),
+    )
+    assert changes.moves == {root / "c.txt": root / "a.txt"}
+
+    # Y si vuelve a su nombre no queda nada que hacer
+    back = _coalesce(
+        FsEvent("moved", root / "a.txt", dest_path=root / "b.txt"),
+        FsEvent("moved", root / "b.txt", dest_path=root / "a.txt"),
+    )
+    assert not back
+
+
+def test_pending_writes_travel_with_a_moved_folder(root):
+    changes = _coalesce(
+        FsEvent("created", root / "docs" / "new.txt"),
+        FsEvent("moved", root / "docs", True, dest_path=root / "papers"),
+    )
+    assert changes.upserts == {root / "papers" / "new.txt"}
+    assert changes.moves == {root / "papers": root / "docs"}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify")
+def test_inotify_pairs_moves_by_cookie(root, tmp_path, write, monkeypatch):
+    # Sin ventana: un IN_MOVED_FROM sin pareja en el mismo read es un borrado
+    monkeypatch.setattr(fs_events, "MOVE_PAIR_WINDOW", 0)
+    write("docs/a.txt")
+    write("docs/sub/b.txt")
+    write("gone.txt")
+    source = InotifySource(root)
+    try:
+        (root / "docs" / "a.txt").rename(root / "docs" / "c.txt")
+        (root / "docs").rename(root / "papers")
+        (root / "gone.txt").rename(tmp_path / "outside.txt")
+        events = source.read_events(timeout=1.0)
+
+        assert (
+            FsEvent("moved", root / "docs" / "a.txt", dest_path=root / "docs" / "c.txt")
+            in events
+        )
+        assert (
+            FsEvent("moved", root / "docs", True, dest_path=root / "papers") in events
+        )
+        assert FsEvent("deleted", root / "gone.txt") in events
+        # El watch de la carpeta siguió al rename: sus eventos traen la ruta nueva
+        write("papers/sub/new.txt")
+        assert FsEvent("created", root / "papers" / "sub" / "new.txt") in (
+            source.read_events(timeout=1.0)
+        )
+    finally:
+        source.close()
+
+
+class ScriptedSource:
+    """Runs each step (a filesystem change returning its events) once the
+    initial sync is done, then stops the watcher."""
+
+    def __init__(self, steps, stop: threading.Event):
+        self._steps = list(steps)
+        self._stop = stop
+
+    def read_events(self, timeout: float) -> list[FsEvent]:
+        if not self._steps:
+            self._stop.set()
+            return []
+        return self._steps.pop(0)()
+
+    def close(self):
+        pass
+
+
+def _page_ids(simulator) -> dict[str, str]:
+    return {rel_id: page["id"] for rel_id, page in simulator.live_pages().items()}
+
+
+def test_moved_folder_moves_its_descendants(
+    simulator, store, make_repo, make_sync, write, root
+):
+    write("docs/a.txt")
+    write("docs/sub/b.txt")
+    repo = make_repo(store)
+    before: dict[str, str] = {}
+
+    def move():
+        before.update(_page_ids(simulator))
+        (root / "docs").rename(root / "papers")
+        return [FsEvent("moved", root / "docs", True, dest_path=root / "papers")]
+
+    stop = threading.Event()
+    WatchSynchronizer(
+        make_sync(repo, journal=store),
+        repo,
+        FileMetaFactory(root, "test"),
+        ScriptedSource([move], stop),
+        root,
+        debounce=0,
+    ).run(stop)
+
+    # Un solo evento de la carpeta mueve también cada página de adentro
+    assert _page_ids(simulator) == {
+        "papers": before["docs"],
+        "papers/a.txt": before["docs/a.txt"],
+        "papers/sub": before["docs/sub"],
+        "papers/sub/b.txt": before["docs/sub/b.txt"],
+    }
+    assert not simulator.duplicates()
+
+
+def test_temporary_file_sends_nothing(
+    simulator, store, make_repo, make_sync, write, root
+):
+    write("docs/a.txt")
+    repo = make_repo(store)
+
+    def save_with_swap_file():
+        simulator.reset_stats()
+        swap = write("docs/.a.txt.swp")
+        swap.unlink()
+        return [
+            FsEvent("created", swap),
+            FsEvent("modified", swap),
+            FsEvent("deleted", swap),
+        ]
+
+    stop = threading.Event()
+    WatchSynchronizer(
+        make_sync(repo, journal=store),
+        repo,
+        FileMetaFactory(root, "test"),
+        ScriptedSource([save_with_swap_file], stop),
+        root,
+        debounce=0,
+    ).run(stop)
+
+    assert simulator.requests == 0
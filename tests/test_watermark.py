@@ -0,0 +1,44 @@
+"""Warm runs fetch only the pages edited since the previous reconcile."""
+
+from datetime import datetime, timedelta, timezone
+
+from src.infrastructure.notion_adapter import WATERMARK_SAFETY
+
+
+def test_warm_run_fetches_only_edited_pages(
+    simulator, store, make_repo, make_sync, write
+):
+    for name in ("a.txt", "b.txt", "c.txt"):
+        write(name)
+    make_sync(make_repo(store)).sync()
+    simulator.age(60)
+    simulator.reset_stats()
+
+    report = make_sync(make_repo(store)).sync()
+
+    assert report.counts == {"unchanged": 3}
+    # Una sola página de query (vacía) y ninguna escritura
+    assert simulator.stats["databases.query"] == 1
+    assert simulator.requests == simulator.stats["databases.query"] + 1
+
+
+def test_edit_in_the_same_minute_as_the_watermark_is_seen(
+    simulator, store, make_repo, make_sync, write
+):
+    write("a.txt", "local")
+    started = datetime.now(timezone.utc)
+    make_sync(make_repo(store)).sync()
+    watermark = datetime.fromisoformat(store.watermark)
+    assert watermark <= started - WATERMARK_SAFETY + timedelta(seconds=1)
+
+    # Editada a mano justo después del run: Notion la fecha al minuto, que
+    # puede quedar antes del inicio del run
+    page_id = simulator.live_pages()["a.txt"]["id"]
+    simulator.client().patch(
+        f"pages/{page_id}", json={"properties": {"Size": {"number": 999}}}
+    )
+
+    report = make_sync(make_repo(store, full_reconcile_every=None)).sync()
+
+    assert report.counts["modified"] == 1
+    assert simulator.live_pages()["a.txt"]["properties"]["Size"]["number"] == 5